@@ -0,0 +1,87 @@
+"""
+Measures the startup of a process that records with dsvisualizer. Each case
+runs in a new interpreter and reports its time and whether it loaded the
+Jupyter widget stack (ipywidgets and traitlets).
+
+- import: `import dsvisualizer`.
+- record: import, then record a list with a `@node` class.
+- visualize: record, then build the widget with `visualize()`.
+
+Recording alone shouldn't load the widget stack, the process exits with an
+error if it does.
+
+Run with ``python benchmarks/bench_import.py``.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+IMPORT = "import dsvisualizer\n"
+
+RECORD = """
+@dsvisualizer.node()
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+logger = dsvisualizer.Logger()
+with logger:
+    head = None
+    for i in range(100):
+        head = Node(i, head)
+"""
+
+VISUALIZE = "logger.visualize()\n"
+
+CASES = {
+    "import": IMPORT,
+    "record": IMPORT + RECORD,
+    "visualize": IMPORT + RECORD + VISUALIZE,
+}
+
+# Runs the code of a case and prints the time it took and the widget modules
+# that were loaded
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+exec(compile({code!r}, "<case>", "exec"))
+seconds = time.perf_counter() - start
+modules = sorted(
+    name for name in ("ipywidgets", "traitlets") if name in sys.modules
+)
+print(json.dumps({{"seconds": seconds, "modules": modules}}))
+"""
+
+
+def run(code: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(code=code)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in CASES.items():
+        runs = [run(code) for _ in range(args.repeat)]
+        best = min(r["seconds"] for r in runs)
+        modules = runs[0]["modules"]
+        results[name] = modules
+        loaded = ", ".join(modules) or "no widget modules"
+        print(f"{name:>10s} {best * 1e3:8.1f} ms  {loaded}")
+    if results["record"]:
+        sys.exit("Recording imported " + ", ".join(results["record"]))
+
+
+if __name__ == "__main__":
+    main()
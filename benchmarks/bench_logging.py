@@ -0,0 +1,112 @@
+"""
+Measures the cost of recording linked list operations with each recording
+policy.
+
+Run with ``python benchmarks/bench_logging.py``.
+"""
+
+import argparse
+import time
+
+from dsvisualizer import (
+    RECORD_ALL,
+    RECORD_MUTATIONS,
+    RECORD_TRAVERSALS,
+    container,
+    node,
+)
+
+POLICIES = {
+    "all": RECORD_ALL,
+    "mutations": RECORD_MUTATIONS,
+    "traversals": RECORD_TRAVERSALS,
+}
+
+
+def make_list(policy):
+    @node("value", "next", policy=policy)
+    class Node:
+        def __init__(self, value, next):
+            self.value = value
+            self.next = next
+
+    @container(policy=policy)
+    class List:
+        def __init__(self):
+            self.head = None
+
+        def push(self, v):
+            self.head = Node(v, self.head)
+
+        def append(self, v):
+            if self.head is None:
+                self.head = Node(v, None)
+                return
+            n = self.head
+            while n.next is not None:
+                n = n.next
+            n.next = Node(v, None)
+
+        def sum(self):
+            total = 0
+            n = self.head
+            while n is not None:
+                total += n.value
+                n = n.next
+            return total
+
+    return List
+
+
+def push(l, size: int):
+    """Pushes `size` nodes and traverses the list once."""
+    for i in range(size):
+        l.push(i)
+    l.sum()
+
+
+def append(l, size: int):
+    """Appends `size` nodes, traversing the list on every append."""
+    for i in range(size):
+        l.append(i)
+
+
+WORKLOADS = {"push": push, "append": append}
+
+
+def bench(cls, workload, size: int, repeat: int):
+    """Returns the best time and the number of recorded operations."""
+    best = float("inf")
+    for _ in range(repeat):
+        l = cls()
+        start = time.perf_counter()
+        workload(l, size)
+        best = min(best, time.perf_counter() - start)
+    return best, len(l._logger.trace)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS)
+    )
+    parser.add_argument(
+        "--policies", nargs="+", choices=list(POLICIES), default=list(POLICIES)
+    )
+    args = parser.parse_args()
+
+    for workload in args.workloads:
+        for name in args.policies:
+            cls = make_list(POLICIES[name])
+            for size in args.sizes:
+                elapsed, ops = bench(cls, WORKLOADS[workload], size, args.repeat)
+                print(
+                    f"{workload:>7s} {name:>10s} {size:>7d} nodes:"
+                    f" {elapsed * 1e3:9.2f} ms {ops:>8d} ops"
+                )
+
+
+if __name__ == "__main__":
+    main()
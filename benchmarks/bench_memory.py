@@ -0,0 +1,85 @@
+"""
+Compares the memory used to store a trace as a list of `Operation`
+dataclasses with the columnar `Trace`.
+
+Run with ``python benchmarks/bench_memory.py``.
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from dsvisualizer.operations import GetNext, GetValue, Init, Metadata, Operation
+from dsvisualizer.trace import Trace
+
+LINES = [
+    "    def append(self, v):\n",
+    "        node = self.head\n",
+    "        while node.next is not None:\n",
+    "            node = node.next\n",
+    "        node.next = Node(v, None)\n",
+]
+
+
+def workload(size: int):
+    """Yields `size` operations: an init followed by reads of that node."""
+    for i in range(size):
+        if i % 3 == 0:
+            yield Init(i, str(i % 1000), i - 3 if i else None), i % 7
+        elif i % 3 == 1:
+            yield GetValue(i - 1), i % 7
+        else:
+            yield GetNext(i - 2), i % 7
+
+
+def build_dataclasses(size: int):
+    # Each operation used to get its own formatted copy of the source.
+    return [
+        Operation(
+            op,
+            Metadata(
+                animate=True,
+                source=[
+                    f"{'> ' if n == 12 else '  '}{n:2d} {line}"
+                    for n, line in enumerate(LINES, start=10)
+                ],
+            ),
+        )
+        for op, _ in workload(size)
+    ]
+
+
+def build_trace(size: int):
+    trace = Trace()
+    for op, location in workload(size):
+        trace.append(op, location)
+    return trace
+
+
+def measure(build, size: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build(size)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**4, 10**5, 10**6])
+    args = parser.parse_args()
+
+    print(f"{'ops':>8s} {'dataclasses':>14s} {'trace':>14s} {'ratio':>7s}")
+    for size in args.sizes:
+        old = measure(build_dataclasses, size)
+        new = measure(build_trace, size)
+        print(
+            f"{size:>8d} {old / size:>10.1f} B/op {new / size:>10.1f} B/op"
+            f" {old / new:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
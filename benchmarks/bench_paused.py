@@ -0,0 +1,91 @@
+"""
+Compares a linked list built from undecorated classes with the same list
+built from `@node` and `@container` classes while recording is paused, and
+while it is recording.
+
+Run with ``python benchmarks/bench_paused.py``.
+"""
+
+import argparse
+import time
+
+from dsvisualizer import RECORD_MUTATIONS, container, node, paused
+
+
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+class List:
+    def __init__(self):
+        self.head = None
+
+    def push(self, v):
+        self.head = Node(v, self.head)
+
+    def sum(self):
+        total = 0
+        n = self.head
+        while n is not None:
+            total += n.value
+            n = n.next
+        return total
+
+
+def instrumented(policy):
+    @node("value", "next", policy=policy)
+    class InstrumentedNode(Node):
+        pass
+
+    @container(policy=policy)
+    class InstrumentedList(List):
+        def push(self, v):
+            self.head = InstrumentedNode(v, self.head)
+
+        def sum(self):
+            return List.sum(self)
+
+    return InstrumentedList
+
+
+def workload(cls, size: int, traversals: int):
+    l = cls()
+    for i in range(size):
+        l.push(i)
+    for _ in range(traversals):
+        l.sum()
+
+
+def bench(cls, size: int, traversals: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload(cls, size, traversals)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--traversals", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cls = instrumented(RECORD_MUTATIONS)
+    baseline = bench(List, args.size, args.traversals, args.repeat)
+    with paused():
+        paused_time = bench(cls, args.size, args.traversals, args.repeat)
+    recording = bench(cls, args.size, args.traversals, 1)
+    for name, elapsed in [
+        ("undecorated", baseline),
+        ("paused", paused_time),
+        ("recording", recording),
+    ]:
+        print(f"{name:>12s}: {elapsed * 1e3:9.2f} ms {elapsed / baseline:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Measures the replay engine on a random trace: the time of the first
+`state_at`, which builds the checkpoints, the time of later seeks, and the
+memory the checkpoints take.
+
+Run with ``python benchmarks/bench_replay.py``.
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from dsvisualizer.operations import GetNext, GetValue, Init, SetNext, SetValue
+from dsvisualizer.replay import Replay
+from dsvisualizer.trace import Trace
+
+
+def build_trace(size: int, seed: int = 0) -> Trace:
+    """About one node every five operations, the rest read and change them."""
+    rng = random.Random(seed)
+    trace = Trace()
+    trace.append(Init(0, "0", None), None)
+    nodes = 1
+    for _ in range(size - 1):
+        id = rng.randrange(nodes)
+        kind = rng.randrange(5)
+        if kind == 0:
+            op = Init(nodes, str(nodes), id)
+            nodes += 1
+        elif kind == 1:
+            op = SetValue(id, str(rng.randrange(1000)))
+        elif kind == 2:
+            op = SetNext(id, rng.randrange(nodes))
+        elif kind == 3:
+            op = GetValue(id)
+        else:
+            op = GetNext(id)
+        trace.append(op, None)
+    return trace
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**4, 10**5, 10**6])
+    parser.add_argument("--seeks", type=int, default=20)
+    parser.add_argument(
+        "--max-checkpoint-mb",
+        type=float,
+        default=256,
+        help="memory budget of the checkpoints, 0 for no budget",
+    )
+    args = parser.parse_args()
+    budget = int(args.max_checkpoint_mb * 2**20) or None
+
+    print(
+        f"{'ops':>8s} {'nodes':>8s} {'checkpoints':>11s} {'first':>10s}"
+        f" {'seek':>10s} {'memory':>10s} {'interval':>8s}"
+    )
+    rng = random.Random(1)
+    for size in args.sizes:
+        trace = build_trace(size)
+        start = time.perf_counter()
+        replay = Replay(trace, max_checkpoint_bytes=budget)
+        replay.state_at(size)
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.seeks):
+            replay.state_at(rng.randrange(size + 1))
+        seek = (time.perf_counter() - start) / args.seeks
+
+        # Memory kept by the checkpoints of a new replay
+        gc.collect()
+        tracemalloc.start()
+        replay = Replay(trace, max_checkpoint_bytes=budget)
+        replay.state_at(size)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{size:>8d} {1 + max(trace.ids):>8d} {len(replay._checkpoints):>11d}"
+            f" {first * 1e3:>8.0f}ms {seek * 1e3:>8.1f}ms"
+            f" {memory / 2**20:>8.2f}MB {replay.checkpoint_every:>8d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
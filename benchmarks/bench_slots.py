@@ -0,0 +1,113 @@
+"""
+Compares `@node` classes that store the fields in the `__dict__` of the
+nodes with slotted ones, `@node(slots=True)`, and with the same undecorated
+classes.
+
+- memory: bytes per node of a list built while recording. The trace is
+  freed before measuring, so only the nodes are counted.
+- access: time per node of a traversal that reads the value and the next
+  pointer of every node, while recording with a policy that doesn't record
+  reads and while paused.
+
+Run with ``python benchmarks/bench_slots.py``.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from dsvisualizer import RECORD_MUTATIONS, Logger, node, paused
+
+
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+class SlottedNode:
+    __slots__ = ("value", "next")
+
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+def instrumented(slots: bool):
+    @node("value", "next", policy=RECORD_MUTATIONS, slots=slots)
+    class InstrumentedNode:
+        def __init__(self, value, next):
+            self.value = value
+            self.next = next
+
+    return InstrumentedNode
+
+
+def build(cls, size: int):
+    head = None
+    for i in range(size):
+        head = cls(i, head)
+    return head
+
+
+def traverse(head) -> int:
+    total = 0
+    n = head
+    while n is not None:
+        total += n.value
+        n = n.next
+    return total
+
+
+def memory(cls, size: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    logger = Logger()
+    with logger:
+        head = build(cls, size)
+    del logger
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del head
+    return current / size
+
+
+def access(cls, size: int, repeat: int) -> float:
+    with Logger():
+        head = build(cls, size)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            traverse(head)
+            best = min(best, time.perf_counter() - start)
+    return best / size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10**6)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    classes = [
+        ("undecorated", Node),
+        ("undecorated slots", SlottedNode),
+        ("@node", instrumented(False)),
+        ("@node slots", instrumented(True)),
+    ]
+    print(f"{'':>18s} {'memory':>12s} {'recording':>14s} {'paused':>14s}")
+    for name, cls in classes:
+        bytes_per_node = memory(cls, args.size)
+        recording = access(cls, args.size, args.repeat)
+        with paused():
+            paused_time = access(cls, args.size, args.repeat)
+        print(
+            f"{name:>18s} {bytes_per_node:>7.1f} B/node"
+            f" {recording * 1e9:>6.1f} ns/node {paused_time * 1e9:>6.1f} ns/node"
+        )
+
+
+if __name__ == "__main__":
+    main()
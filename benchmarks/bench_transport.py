@@ -0,0 +1,118 @@
+"""
+Compares the size and the encode/decode time of the JSON and binary wire
+formats of `OperationsWidget.operations`, and the throughput of a round trip
+through the serialized dict with that of `dataclasses.asdict`, which the
+table-driven encoder replaced.
+
+Run with ``python benchmarks/bench_transport.py``.
+"""
+
+import argparse
+import json
+import time
+from dataclasses import asdict
+
+from dsvisualizer.logger import Logger
+from dsvisualizer.operations import (
+    GetNext,
+    GetValue,
+    Init,
+    Operations,
+    VisualizationMetadata,
+)
+from dsvisualizer.traits import (
+    BINARY_COLUMNS,
+    deserialize_operations,
+    serialize_operations,
+    serialize_operations_binary,
+)
+
+
+def make_logger(size: int) -> Logger:
+    logger = Logger()
+    with logger:
+        for i in range(size):
+            if i % 3 == 0:
+                logger.log(Init(i, str(i), i - 3 if i else None))
+            elif i % 3 == 1:
+                logger.log(GetValue(i - 1))
+            else:
+                logger.log(GetNext(i - 2))
+    return logger
+
+
+def send_json(operations):
+    message = json.dumps(serialize_operations(operations)).encode()
+    return message, len(message)
+
+
+def receive_json(message):
+    return deserialize_operations(json.loads(message))
+
+
+def send_binary(operations):
+    state = serialize_operations_binary(operations)
+    buffers = [state.pop(key).tobytes() for key in BINARY_COLUMNS]
+    message = json.dumps(state).encode()
+    return (message, buffers), len(message) + sum(len(b) for b in buffers)
+
+
+def receive_binary(sent):
+    message, buffers = sent
+    state = json.loads(message)
+    state.update(zip(BINARY_COLUMNS, buffers))
+    return deserialize_operations(state)
+
+
+def measure(send, receive, operations):
+    start = time.perf_counter()
+    sent, size = send(operations)
+    encoded = time.perf_counter()
+    receive(sent)
+    decoded = time.perf_counter()
+    return size, encoded - start, decoded - encoded
+
+
+def throughput(run, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5])
+    args = parser.parse_args()
+
+    print(f"{'ops':>8s} {'format':>7s} {'bytes':>12s} {'encode':>10s} {'decode':>10s}")
+    for size in args.sizes:
+        logger = make_logger(size)
+        operations = logger._build_operations(VisualizationMetadata(), 0)
+        for name, send, receive in [
+            ("json", send_json, receive_json),
+            ("binary", send_binary, receive_binary),
+        ]:
+            nbytes, encode, decode = measure(send, receive, operations)
+            print(
+                f"{size:>8d} {name:>7s} {nbytes:>12d}"
+                f" {encode * 1e3:>8.1f}ms {decode * 1e3:>8.1f}ms"
+            )
+
+    print(f"\n{'ops':>8s} {'round trip':>12s} {'asdict':>12s}")
+    for size in args.sizes:
+        logger = make_logger(size)
+        view = logger._build_operations(VisualizationMetadata(), 0)
+        operations = Operations(list(view.operations), snippets=view.snippets)
+        n = len(operations.operations)
+        round_trip = throughput(
+            lambda: deserialize_operations(serialize_operations(operations))
+        )
+        dataclass = throughput(lambda: asdict(operations))
+        print(f"{size:>8d} {n / round_trip:>10.0f}/s {n / dataclass:>10.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Measures the cost of calling container methods: a recursive method that
+calls itself once per node, with a policy that doesn't record reads so the
+time is spent in the method wrappers.
+
+Run with ``python benchmarks/bench_wrapper.py``.
+"""
+
+import argparse
+import sys
+import time
+
+from dsvisualizer import RECORD_MUTATIONS, container, node
+
+
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+class List:
+    def __init__(self):
+        self.head = None
+
+    def push(self, v):
+        self.head = Node(v, self.head)
+
+    def length(self, n):
+        if n is None:
+            return 0
+        return 1 + self.length(n.next)
+
+
+def instrumented():
+    @node("value", "next", policy=RECORD_MUTATIONS)
+    class InstrumentedNode(Node):
+        pass
+
+    @container(policy=RECORD_MUTATIONS)
+    class InstrumentedList(List):
+        def push(self, v):
+            self.head = InstrumentedNode(v, self.head)
+
+        def length(self, n):
+            if n is None:
+                return 0
+            return 1 + self.length(n.next)
+
+    return InstrumentedList
+
+
+def bench(cls, depth: int, calls: int, repeat: int) -> float:
+    l = cls()
+    for i in range(depth):
+        l.push(i)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            l.length(l.head)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depth", type=int, default=500)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * args.depth))
+
+    method_calls = (args.depth + 1) * args.calls
+    baseline = bench(List, args.depth, args.calls, args.repeat)
+    wrapped = bench(instrumented(), args.depth, args.calls, args.repeat)
+    for name, elapsed in [("undecorated", baseline), ("container", wrapped)]:
+        print(
+            f"{name:>12s}: {elapsed * 1e3:9.2f} ms"
+            f" {elapsed / method_calls * 1e9:7.1f} ns/call"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Benchmark suite for recording, serialization and visualization. Runs
+headlessly, no browser or kernel is needed.
+
+- record: time per recorded operation of the push, append, traverse and
+  reverse workloads, and the overhead over the same undecorated classes.
+- serialize: encode and decode throughput of the JSON and binary formats.
+- visualize: latency of `Logger.visualize()` until the widget state is
+  serialized for the frontend.
+
+Each benchmark runs at every size, given as a number of operations. Results
+can be saved as JSON and compared with a previous run:
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --compare before.json
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from bench_transport import receive_binary, receive_json, send_binary, send_json
+
+import dsvisualizer
+from dsvisualizer import Logger, container, node
+
+Workload = Callable[[Any, int], Callable[[], None]]
+
+
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+class LinkedList:
+    def __init__(self):
+        self.head = None
+
+    def push(self, v):
+        self.head = Node(v, self.head)
+
+    def append(self, v):
+        if self.head is None:
+            self.head = Node(v, None)
+            return
+        n = self.head
+        while n.next is not None:
+            n = n.next
+        n.next = Node(v, None)
+
+    def sum(self):
+        total = 0
+        n = self.head
+        while n is not None:
+            total += n.value
+            n = n.next
+        return total
+
+    def reverse(self):
+        previous = None
+        n = self.head
+        while n is not None:
+            next = n.next
+            n.next = previous
+            previous = n
+            n = next
+        self.head = previous
+
+
+def instrumented():
+    """`LinkedList` and `Node` with the decorators applied to copies."""
+
+    @node("value", "next")
+    class InstrumentedNode(Node):
+        pass
+
+    @container()
+    class InstrumentedList(LinkedList):
+        def push(self, v):
+            self.head = InstrumentedNode(v, self.head)
+
+        def append(self, v):
+            if self.head is None:
+                self.head = InstrumentedNode(v, None)
+                return
+            n = self.head
+            while n.next is not None:
+                n = n.next
+            n.next = InstrumentedNode(v, None)
+
+    return InstrumentedList
+
+
+# Nodes of the lists that are traversed or reversed repeatedly
+LIST_NODES = 1000
+
+
+def push(l, size: int):
+    """Pushes `size` nodes, one `Init` each."""
+    return lambda: [l.push(i) for i in range(size)]
+
+
+def append(l, size: int):
+    """Appends nodes at the tail. Each append traverses the whole list."""
+    nodes = max(1, int((2 * size) ** 0.5))
+    return lambda: [l.append(i) for i in range(nodes)]
+
+
+def traverse(l, size: int):
+    """Sums a list repeatedly, reading the value and next of every node."""
+    nodes = min(size, LIST_NODES)
+    for i in range(nodes):
+        l.push(i)
+    return lambda: [l.sum() for _ in range(max(1, size // (2 * nodes)))]
+
+
+def reverse(l, size: int):
+    """Reverses a list in place repeatedly, reading and setting every next."""
+    nodes = min(size, LIST_NODES)
+    for i in range(nodes):
+        l.push(i)
+    return lambda: [l.reverse() for _ in range(max(1, size // (2 * nodes)))]
+
+
+WORKLOADS: Dict[str, Workload] = {
+    "push": push,
+    "append": append,
+    "traverse": traverse,
+    "reverse": reverse,
+}
+
+
+def timed(run: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def bench_record(name: str, size: int, repeat: int) -> Dict[str, Any]:
+    workload = WORKLOADS[name]
+    cls = instrumented()
+    best = baseline = float("inf")
+    for _ in range(repeat):
+        l = cls()
+        run = workload(l, size)
+        recorded = len(l._logger.trace)
+        best = min(best, timed(run))
+        ops = len(l._logger.trace) - recorded
+        baseline = min(baseline, timed(workload(LinkedList(), size)))
+    return {
+        "ops": ops,
+        "seconds": best,
+        "ns_per_op": best / ops * 1e9,
+        "overhead_ns_per_op": (best - baseline) / ops * 1e9,
+    }
+
+
+def make_logger(size: int) -> Logger:
+    """Logger with about `size` operations of all kinds."""
+    l = instrumented()()
+    for i in range(max(1, min(size // 4, LIST_NODES))):
+        l.push(i)
+    while len(l._logger.trace) < size:
+        l.sum()
+        l.reverse()
+    return l._logger
+
+
+def bench_serialize(logger: Logger, send, receive, repeat: int) -> Dict[str, Any]:
+    operations = logger.operations
+    encode = decode = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sent, nbytes = send(operations)
+        encode = min(encode, time.perf_counter() - start)
+        decode = min(decode, timed(lambda: receive(sent)))
+    ops = len(operations.operations)
+    return {
+        "ops": ops,
+        "bytes": nbytes,
+        "encode_seconds": encode,
+        "decode_seconds": decode,
+        "encode_ops_per_second": ops / encode,
+        "decode_ops_per_second": ops / decode,
+    }
+
+
+def bench_visualize(logger: Logger, binary: bool, repeat: int) -> Dict[str, Any]:
+    def visualize():
+        logger.visualized_upto = 0
+        logger.visualize(binary=binary).get_state("operations")
+
+    # The first call imports ipywidgets
+    visualize()
+    best = min(timed(visualize) for _ in range(repeat))
+    return {"ops": len(logger.trace), "seconds": best}
+
+
+def run(sizes: List[int], groups: List[str], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+
+    def report(group: str, case: str, size: int, result: Dict[str, Any]):
+        result = {"group": group, "case": case, "size": size, **result}
+        results.append(result)
+        print(
+            f"{group:>9s} {case:>9s} {size:>8d}"
+            f" {result['ops']:>8d} ops {format_result(result)}",
+            flush=True,
+        )
+
+    for size in sizes:
+        if "record" in groups:
+            for name in WORKLOADS:
+                report("record", name, size, bench_record(name, size, repeat))
+        if "serialize" in groups or "visualize" in groups:
+            logger = make_logger(size)
+        if "serialize" in groups:
+            for case, send, receive in [
+                ("json", send_json, receive_json),
+                ("binary", send_binary, receive_binary),
+            ]:
+                result = bench_serialize(logger, send, receive, repeat)
+                report("serialize", case, size, result)
+        if "visualize" in groups:
+            for case, binary in [("json", False), ("binary", True)]:
+                result = bench_visualize(logger, binary, repeat)
+                report("visualize", case, size, result)
+    return results
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    if result["group"] == "record":
+        return (
+            f"{result['ns_per_op']:9.0f} ns/op"
+            f" {result['overhead_ns_per_op']:9.0f} ns/op overhead"
+        )
+    if result["group"] == "serialize":
+        return (
+            f"{result['bytes']:>11d} B"
+            f" encode {result['encode_seconds'] * 1e3:9.1f} ms"
+            f" decode {result['decode_seconds'] * 1e3:9.1f} ms"
+        )
+    return f"{result['seconds'] * 1e3:9.1f} ms"
+
+
+# Metric compared between runs for each group. Lower is better.
+METRICS = {
+    "record": "ns_per_op",
+    "serialize": "encode_seconds",
+    "visualize": "seconds",
+}
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any]):
+    previous = {(r["group"], r["case"], r["size"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for result in results:
+        old = previous.get((result["group"], result["case"], result["size"]))
+        if old is None:
+            continue
+        metric = METRICS[result["group"]]
+        ratio = result[metric] / old[metric]
+        print(
+            f"{result['group']:>9s} {result['case']:>9s} {result['size']:>8d}"
+            f" {metric:>15s} {ratio:6.2f}x"
+        )
+
+
+def metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "version": dsvisualizer.__version__,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5, 10**6]
+    )
+    parser.add_argument(
+        "--groups", nargs="+", choices=list(METRICS), default=list(METRICS)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Saves the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.groups, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,24 @@
 # Copyright (c) Jose Romero.
 # Distributed under the terms of the Modified BSD License.
 
-from .widget import *
 from .traits import *
 from .operations import *
 from .magic import *
 from .logger import *
+from .sinks import *
 
 from ._version import __version__, version_info
 
 
+def __getattr__(name):
+    # The widget imports ipywidgets, which recording doesn't need
+    if name in ("OperationsWidget", "OperationTrait"):
+        from . import widget
+
+        return getattr(widget, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def _jupyter_labextension_paths():
     """Called by Jupyter Lab Server to detect if it is a valid labextension and
     to install the widget
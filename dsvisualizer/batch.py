@@ -0,0 +1,169 @@
+import json
+import os
+import signal
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from dsvisualizer.logger import Logger
+from dsvisualizer.trace import Trace
+
+# A callable that takes the container, or a sequence of method calls, each a
+# tuple with the name of the method and its arguments
+Workload = Union[Callable[[Any], Any], Sequence[Tuple]]
+
+
+class RunTimeout(BaseException):
+    """
+    Raised in a run that takes longer than its timeout. It is not an
+    `Exception`, so workloads that catch every exception don't catch it.
+    """
+
+
+@dataclass
+class Run:
+    """
+    Result of running one workload. `path` is the trace file of the run,
+    which is saved even if the run failed. `error` is `None` if the run
+    finished.
+    """
+
+    workload: int
+    path: str
+    error: Optional[str]
+    seconds: float
+    logged: int
+
+
+class TraceSet:
+    """
+    Traces of a batch of runs, opened when they are accessed. Sets can be
+    merged, and saved as an index of their trace files.
+    """
+
+    def __init__(self, runs: Sequence[Run] = ()):
+        self.runs = list(runs)
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __iter__(self) -> Iterator[Run]:
+        return iter(self.runs)
+
+    def __add__(self, other: "TraceSet") -> "TraceSet":
+        return TraceSet(self.runs + other.runs)
+
+    @classmethod
+    def merge(cls, *sets: "TraceSet") -> "TraceSet":
+        return cls([run for s in sets for run in s.runs])
+
+    @property
+    def failed(self) -> List[Run]:
+        return [run for run in self.runs if run.error is not None]
+
+    def logger(self, index: int) -> Logger:
+        """Logger with the operations of a run, see `Logger.load`."""
+        return Logger.load(self.runs[index].path)
+
+    def visualize(self, index: int, **kwargs):
+        """Visualizes a run, takes the arguments of `Logger.visualize`."""
+        return self.logger(index).visualize(**kwargs)
+
+    def save(self, path: str):
+        """Saves the list of runs. The trace files are not copied."""
+        with open(path, "w") as f:
+            json.dump([asdict(run) for run in self.runs], f)
+
+    @classmethod
+    def load(cls, path: str) -> "TraceSet":
+        with open(path) as f:
+            return cls([Run(**run) for run in json.load(f)])
+
+
+def _timeout(signum, frame):
+    raise RunTimeout()
+
+
+def _truncate(trace: Trace):
+    """Drops an operation that was being recorded when the run was stopped."""
+    columns = [trace.opcodes, trace.ids, trace.nexts, trace.values, trace.sources]
+    length = min(map(len, columns))
+    for column in columns:
+        del column[length:]
+
+
+def _run(cls, workload: Workload, index: int, path: str, timeout: Optional[float]):
+    """Runs a workload in a worker and saves its trace to `path`."""
+    timed = timeout is not None and hasattr(signal, "setitimer")
+    container = None
+    error = None
+    start = time.perf_counter()
+    try:
+        if timed:
+            signal.signal(signal.SIGALRM, _timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            container = cls()
+            if callable(workload):
+                workload(container)
+            else:
+                for name, *args in workload:
+                    getattr(container, name)(*args)
+        finally:
+            if timed:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except RunTimeout:
+        error = f"Timed out after {timeout} seconds"
+    except Exception as e:
+        error = "".join(traceback.format_exception_only(type(e), e)).strip()
+    seconds = time.perf_counter() - start
+    logger = Logger() if container is None else container._logger
+    _truncate(logger.trace)
+    logger.save(path)
+    logger.close()
+    return Run(index, path, error, seconds, logger.logged)
+
+
+def run_batch(
+    cls,
+    workloads: Sequence[Workload],
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    directory: Optional[str] = None,
+) -> TraceSet:
+    """
+    Runs each workload on a new instance of the container class `cls` in a
+    pool of processes. Each run saves its trace to a file in `directory`,
+    a new temporary directory if it is not given, so only the path is sent
+    back. The class and the workloads must be picklable, so they have to be
+    defined at the top level of a module.
+
+    A run is stopped after `timeout` seconds, keeping the operations logged
+    until then. Timeouts use `SIGALRM` and are ignored where it is not
+    available.
+
+    Example:
+
+    >>> traces = run_batch(List, [[("push", i) for i in range(n)] for n in sizes])
+        traces.visualize(0)
+    """
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="dsvisualizer-")
+    else:
+        os.makedirs(directory, exist_ok=True)
+    with ProcessPoolExecutor(max_workers) as pool:
+        futures = [
+            pool.submit(
+                _run,
+                cls,
+                workload,
+                index,
+                os.path.join(directory, f"run-{index}.dsv"),
+                timeout,
+            )
+            for index, workload in enumerate(workloads)
+        ]
+        return TraceSet([future.result() for future in futures])
@@ -1,33 +1,164 @@
 import itertools
+from array import array
 import linecache
-from inspect import FrameInfo, stack
+import sys
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from inspect import FrameInfo
+from types import CodeType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from dsvisualizer.operations import (
+    GetNext,
+    GetValue,
+    Init,
     LinkedListOperation,
-    Metadata,
-    Operation,
     Operations,
+    SetNext,
+    SetValue,
+    Traverse,
     VisualizationMetadata,
 )
-from dsvisualizer.widget import OperationsWidget
+from dsvisualizer.reachability import deaths, root_ids
+from dsvisualizer.replay import HeapState, Replay, heap_state
+from dsvisualizer.sinks import Sink
+from dsvisualizer.spill import SpillFile
+from dsvisualizer.trace import NONE, OPCODES, TRAVERSE, OperationsView, Trace
+from dsvisualizer.tracefile import TraceFile, load_trace, save_trace
+from dsvisualizer.traits import TRACE_ENCODERS
+from dsvisualizer.values import ValueFormat
+
+if TYPE_CHECKING:
+    # The widget imports ipywidgets, so it is imported by `visualize()`
+    from dsvisualizer.widget import OperationsWidget
 
+# Logger that is used when the current thread or task hasn't set one
 _logger = None
+# Logger of the current thread or task
+_current: ContextVar["Logger"] = ContextVar("dsvisualizer_logger")
+# Tokens to restore the logger when leaving the `with` blocks of the current
+# context, innermost last
+_entered: ContextVar[Tuple[Token, ...]] = ContextVar("dsvisualizer_entered")
+
+# Code objects of the functions that wrap container methods. A frame running
+# one of these is skipped and the line that called the container method is
+# shown instead.
+WRAPPER_CODES: Set[CodeType] = set()
+
+
+@dataclass(frozen=True)
+class RecordingPolicy:
+    """
+    Which operations are recorded. `Init`, `SetValue` and `SetNext` are
+    always recorded.
+
+    `value_reads`: Record `GetValue`.
+
+    `next_reads`: Record `GetNext`.
+
+    `coalesce_next_reads`: Record consecutive `GetNext` along a chain of
+    nodes as a single `Traverse`.
+    """
+
+    value_reads: bool = True
+    next_reads: bool = True
+    coalesce_next_reads: bool = False
+
+
+RECORD_ALL = RecordingPolicy()
+RECORD_MUTATIONS = RecordingPolicy(value_reads=False, next_reads=False)
+RECORD_TRAVERSALS = RecordingPolicy(value_reads=False, coalesce_next_reads=True)
+
+# Eviction policies of a logger with a maximum number of operations
+DROP = "drop"
+SPILL = "spill"
+
+
+# Only one in this many source captures of each kind of operation is timed,
+# and the time spent capturing sources is estimated from them
+CAPTURE_SAMPLING = 16
+
+# Name of the operations with each opcode
+OPERATION_NAMES = {opcode: kind.operation for kind, opcode in OPCODES.items()}
+
+
+@dataclass
+class LoggerStats:
+    """Counters of a logger. Times are in seconds."""
+
+    # Recorded operations by name
+    operations: Dict[str, int] = field(default_factory=dict)
+    # Operations dropped by the recording policy or merged into a traversal
+    dropped: int = 0
+    # Nodes that appear in the operations
+    nodes: int = 0
+    # Source locations whose snippet was already formatted, and the ones
+    # that were formatted
+    snippet_hits: int = 0
+    snippet_misses: int = 0
+    # Estimated from a sample of the operations
+    source_capture_seconds: float = 0.0
+    # Time spent serializing the operations for the widgets, and sending
+    # them and creating the widgets
+    serialization_seconds: float = 0.0
+    sync_seconds: float = 0.0
+    visualizations: int = 0
+
+
+class LoggerHook:
+    """
+    Receives the events of a logger. Subclass it and override the events
+    that are needed, then add it with `Logger.add_hook`.
+    """
+
+    def on_operation(self, logger: "Logger", op: LinkedListOperation, recorded: bool):
+        """
+        Called for each operation passed to `Logger.log`. `recorded` is false
+        if the recording policy dropped it or merged it into a traversal.
+        """
+
+    def on_visualize(
+        self, logger: "Logger", widget: Optional["OperationsWidget"], seconds: float
+    ):
+        """
+        Called after `Logger.visualize`, with the widget it returned and the
+        time it took.
+        """
 
 
 def get_logger():
-    global _logger
-    return _logger
+    return _current.get(_logger)
 
 
 def set_logger(logger: "Logger"):
-    global _logger
-    _logger = logger
+    """Sets the logger of the current thread or asyncio task."""
+    _current.set(logger)
 
 
-def fmt_stack_entry(frame: FrameInfo, lines_before=2, lines_after=2):
-    filename = frame.filename
-    lineno = frame.lineno
+class SourceLocation(NamedTuple):
+    """
+    Location in the source code where an operation was logged. `caller` is the
+    location of the call to the container method, if there is one.
+    """
 
+    code: CodeType
+    filename: str
+    lineno: int
+    caller: Optional["SourceLocation"] = None
+
+
+def fmt_lines(filename: str, lineno: int, lines_before=2, lines_after=2):
     lines = linecache.getlines(filename)
     start = max(0, lineno - lines_before - 1)
     stop = min(len(lines), lineno + lines_after)
@@ -44,79 +175,610 @@ def fmt_stack_entry(frame: FrameInfo, lines_before=2, lines_after=2):
     return formatted_lines
 
 
-def get_code(depth=0, lines_before=2, lines_after=2):
-    s = stack()
-    callee = s[2 + depth]
-    formatted = fmt_stack_entry(callee, lines_before, lines_after)
-    if s[3 + depth].function == "wrapped":
-        caller = s[4 + depth]
-        return [caller.code_context[0]] + formatted
+def fmt_stack_entry(frame: FrameInfo, lines_before=2, lines_after=2):
+    return fmt_lines(frame.filename, frame.lineno, lines_before, lines_after)
+
+
+def fmt_source(location: SourceLocation, lines_before=2, lines_after=2):
+    formatted = fmt_lines(
+        location.filename, location.lineno, lines_before, lines_after
+    )
+    caller = location.caller
+    if caller is not None:
+        return [linecache.getline(caller.filename, caller.lineno)] + formatted
     else:
         return formatted
 
 
+def capture_source(depth=0) -> SourceLocation:
+    """
+    Returns the location of the frame `depth` levels above the caller of
+    `capture_source`'s caller. Only the frames that are needed are visited.
+    """
+    frame = sys._getframe(2 + depth)
+    code = frame.f_code
+    back = frame.f_back
+    caller = None
+    if back is not None and back.f_code in WRAPPER_CODES:
+        outer = back.f_back
+        if outer is not None:
+            caller = SourceLocation(
+                outer.f_code, outer.f_code.co_filename, outer.f_lineno
+            )
+    return SourceLocation(code, code.co_filename, frame.f_lineno, caller)
+
+
+def get_code(depth=0, lines_before=2, lines_after=2):
+    return fmt_source(capture_source(1 + depth), lines_before, lines_after)
+
+
 class Logger:
-    def __init__(self, logger: "Logger" = None, lines_before=2, lines_after=2):
+    def __init__(
+        self,
+        logger: "Logger" = None,
+        lines_before=2,
+        lines_after=2,
+        policy: RecordingPolicy = RECORD_ALL,
+        max_operations: Optional[int] = None,
+        eviction: str = DROP,
+        spill_path: Optional[str] = None,
+        value_format: ValueFormat = ValueFormat(),
+    ):
+        """
+        `max_operations`: Maximum number of operations kept in memory. When
+        there are more, the oldest ones are evicted until half of them are
+        left. The state of the nodes before the remaining operations is
+        kept, so replaying and visualizing still show every node.
+
+        `eviction`: `DROP` discards the evicted operations, and they are no
+        longer animated. While at least a quarter of `max_operations` have
+        been visualized and not dropped, only those are dropped. `SPILL`
+        writes the evicted operations to a file, and they are read back when
+        they are visualized or replayed, a chunk at a time.
+
+        `spill_path`: File for `SPILL`. A temporary file is used by default,
+        removed when the logger is closed or garbage collected.
+
+        `value_format`: How the values of the nodes are rendered and
+        truncated.
+        """
+        if eviction not in (DROP, SPILL):
+            raise ValueError(f"Unknown eviction policy {eviction!r}")
+        # Number of logged operations that have been visualized, including
+        # evicted ones
         self.visualized_upto = 0
         self.lines_before = lines_before
         self.lines_after = lines_after
+        self.policy = policy
+        # Ids of the nodes in the trace, by the id of the node object. Nodes
+        # are numbered from 0 in the order they are first logged.
+        self.node_ids: Dict[int, int] = {}
+        # Next pointers of the nodes, kept to coalesce traversals
+        self._nexts: Dict[int, Optional[int]] = {}
+        # Formatted source code shown by the operations. Locations that show
+        # the same lines share an entry.
+        self.snippets: List[List[str]] = []
+        self._snippet_index: Dict[Tuple, int] = {}
+        # Index in `snippets` of each location in the source table of the trace
+        self._location_snippets: List[int] = []
+        self.widget: Optional["OperationsWidget"] = None
+        # Number of snippets sent to `widget`
+        self._snippets_sent = 0
+        self._replay: Optional[Replay] = None
+        self._hooks: List[LoggerHook] = []
+        self._sinks: List[Sink] = []
+        # Number of logged operations sent to the sinks
+        self._streamed = 0
+        # Recorded operations by opcode
+        self._counts = [0] * len(OPCODES)
+        self._stats = LoggerStats()
+        self.max_operations = max_operations
+        self.eviction = eviction
+        self.spill_path = spill_path
+        self._spill: Optional[SpillFile] = None
+        # Trace file opened by `load`
+        self._trace_file: Optional[TraceFile] = None
+        # Number of operations evicted from the trace, and the state of the
+        # nodes before the first operation of the trace
+        self.evicted = 0
+        self._base: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
         if logger:
-            self.operations = logger.operations
+            self.trace = logger.trace
+            self.node_ids = logger.node_ids
+            self.evicted = logger.evicted
+            self._base = logger._base
         else:
-            self.operations = Operations()
+            self.trace = Trace(value_format)
+
+    def _node_id(self, id: int) -> int:
+        node_ids = self.node_ids
+        dense = node_ids.get(id)
+        if dense is None:
+            dense = node_ids[id] = len(node_ids)
+        return dense
 
     def log(self, op: LinkedListOperation):
-        self.operations.operations.append(
-            Operation(
-                operation=op,
-                metadata=Metadata(
-                    animate=True,
-                    source=get_code(1, self.lines_before, self.lines_after),
+        """
+        Records an operation. The ids of the nodes are replaced by their ids
+        in `node_ids`. Values don't need to be strings, they are rendered with
+        `value_format`.
+        """
+        if self._trace_file is not None:
+            raise RuntimeError("Loaded traces are read-only")
+        policy = self.policy
+        kind = type(op)
+        id = self._node_id(op.id)
+        next = None
+        value = NONE
+        if kind is GetValue:
+            if not policy.value_reads:
+                return self._dropped(op)
+        elif kind is GetNext:
+            if not policy.next_reads:
+                return self._dropped(op)
+            if policy.coalesce_next_reads and self._coalesce(id):
+                return self._dropped(op)
+        elif kind is Init or kind is SetNext:
+            if op.next is not None:
+                next = self._node_id(op.next)
+            if policy.coalesce_next_reads:
+                self._nexts[id] = next
+            if kind is Init:
+                value = self.trace.intern_value(op.value)
+        elif kind is SetValue:
+            value = self.trace.intern_value(op.value)
+        elif kind is Traverse:
+            next = self._node_id(op.to)
+        opcode = OPCODES[kind]
+        count = self._counts[opcode]
+        self._counts[opcode] = count + 1
+        if count % CAPTURE_SAMPLING:
+            location = capture_source(1)
+        else:
+            start = time.perf_counter()
+            location = capture_source(1)
+            elapsed = time.perf_counter() - start
+            self._stats.source_capture_seconds += elapsed * CAPTURE_SAMPLING
+        self.trace.record(opcode, id, next, value, location)
+        if self._sinks:
+            # The last operation can still be extended into a traversal
+            self._stream(self.logged - policy.coalesce_next_reads)
+        if self.max_operations is not None and len(self.trace) > self.max_operations:
+            self._evict()
+        for hook in self._hooks:
+            hook.on_operation(self, op, True)
+
+    def _dropped(self, op: LinkedListOperation):
+        self._stats.dropped += 1
+        for hook in self._hooks:
+            hook.on_operation(self, op, False)
+
+    def add_hook(self, hook: LoggerHook):
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: LoggerHook):
+        self._hooks.remove(hook)
+
+    def add_sink(self, sink: Sink):
+        """
+        Streams the operations logged from now on to the sink, see
+        `sinks.Sink`. With `max_operations` the memory used by the logger
+        stays bounded while the sink receives every operation.
+        """
+        if not self._sinks:
+            self._streamed = self.logged
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink: Sink):
+        """Sends the pending operations to the sink and removes it."""
+        self.flush()
+        self._sinks.remove(sink)
+
+    def flush(self):
+        """Sends the pending operations to the sinks and flushes them."""
+        self._stream(self.logged)
+        for sink in self._sinks:
+            sink.flush()
+
+    def _stream(self, upto: int):
+        """Sends the operations logged before the step `upto` to the sinks."""
+        if not self._sinks or self._streamed >= upto:
+            return
+        self._update_snippets()
+        trace = self.trace
+        opcodes, ids, nexts = trace.opcodes, trace.ids, trace.nexts
+        values, sources, strings = trace.values, trace.sources, trace.strings
+        snippets = self._location_snippets
+        # The snippets of these operations are all in the table already
+        for sink in self._sinks:
+            sink.add_snippets(self.snippets)
+        for step in range(self._streamed, upto):
+            i = step - self.evicted
+            next = nexts[i]
+            value = values[i]
+            record = {
+                "step": step,
+                "operation": TRACE_ENCODERS[opcodes[i]](
+                    ids[i],
+                    None if next == NONE else next,
+                    None if value == NONE else strings[value],
                 ),
+                "metadata": {"animate": True, "source": snippets[sources[i]]},
+            }
+            for sink in self._sinks:
+                sink.add(record)
+        self._streamed = upto
+
+    @property
+    def stats(self) -> LoggerStats:
+        """Counters of the operations logged so far and of the visualizations."""
+        stats = self._stats
+        stats.operations = {
+            OPERATION_NAMES[opcode]: count
+            for opcode, count in enumerate(self._counts)
+            if count
+        }
+        stats.nodes = len(self.node_ids)
+        return stats
+
+    @property
+    def logged(self) -> int:
+        """Number of logged operations, including evicted ones."""
+        return self.evicted + len(self.trace)
+
+    def _evict(self):
+        cut = len(self.trace) - self.max_operations // 2
+        visualized = self.visualized_upto - self.evicted
+        enough = max(self.max_operations // 4, 1)
+        if self.eviction == DROP and enough <= visualized < cut:
+            # Dropping only visualized operations keeps the others animated,
+            # as long as it frees enough room to not evict again right away.
+            # Otherwise the oldest ones are dropped anyway to stay bounded.
+            cut = visualized
+        if self.eviction == SPILL:
+            if self._spill is None:
+                self._spill = SpillFile(self.spill_path)
+            self._spill.append(self.trace, 0, cut)
+        # Operations held back for coalescing are streamed before they go
+        self._stream(self.evicted + cut)
+        # A single checkpoint, so the state is only copied once
+        replay = Replay(self.trace, checkpoint_every=cut + 1, base=self._base)
+        self._base = replay.raw_state_at(cut)
+        self.trace = self.trace.slice(cut, len(self.trace))
+        self.evicted += cut
+
+    def _coalesce(self, id: int) -> bool:
+        """
+        Merges a `GetNext` on the node `id` into the last operation, if it
+        is a traversal that hasn't been visualized and `id` continues it.
+        """
+        if self.logged <= max(self.visualized_upto, self._streamed):
+            return False
+        last = self.trace.traversed()
+        if last is None:
+            return False
+        if last == id:
+            return True
+        if self._nexts.get(last) != id:
+            return False
+        opcode = self.trace.opcodes[-1]
+        self._counts[opcode] -= 1
+        self._counts[TRAVERSE] += 1
+        self.trace.traverse_to(id)
+        return True
+
+    def _intern_snippet(self, location: SourceLocation) -> int:
+        caller = location.caller
+        key = (
+            location.filename,
+            location.lineno,
+            self.lines_before,
+            self.lines_after,
+            None
+            if caller is None
+            else linecache.getline(caller.filename, caller.lineno),
+        )
+        index = self._snippet_index.get(key)
+        if index is not None:
+            self._stats.snippet_hits += 1
+        else:
+            self._stats.snippet_misses += 1
+            index = len(self.snippets)
+            self._snippet_index[key] = index
+            self.snippets.append(
+                fmt_source(location, self.lines_before, self.lines_after)
             )
+        return index
+
+    def _update_snippets(self):
+        """Formats the snippets of the locations logged since the last call."""
+        locations = self.trace.locations
+        for location in locations[len(self._location_snippets) :]:
+            self._location_snippets.append(self._intern_snippet(location))
+
+    def source(self, index: int) -> List[str]:
+        """Formatted source code of the location with the given index."""
+        self._update_snippets()
+        return self.snippets[self._location_snippets[index]]
+
+    def _visible_trace(self, start: int = 0) -> Tuple[Trace, int]:
+        """
+        Returns the operations that can be visualized from the step `start`
+        and the number of operations logged before them. Spilled operations
+        are read back from `start`.
+        """
+        if self._spill is None or start >= self.evicted:
+            return self.trace, self.evicted
+        trace = self._spill.read(start, len(self._spill), self.trace)
+        trace.extend(self.trace)
+        return trace, start
+
+    def _initial_operations(self) -> List[Init]:
+        """`Init` operations that rebuild the nodes before the trace."""
+        return heap_state(self._base, self.trace.strings).initial_operations()
+
+    def _build_operations(
+        self,
+        metadata: VisualizationMetadata,
+        animate_from: int,
+        start: int = 0,
+        snippets_from: int = 0,
+        initial: Optional[List[Init]] = None,
+        roots: Optional[List[int]] = None,
+    ):
+        """
+        Operations logged since `start`, with the snippets added since
+        `snippets_from`. Steps count every logged operation. Operations
+        before `start` that were dropped are sent as `initial` nodes.
+
+        If `roots` is given the nodes that become unreachable from them are
+        removed, see `reachability.deaths`.
+        """
+        self._update_snippets()
+        trace, first = self._visible_trace(start)
+        if initial is None and start < first:
+            initial = self._initial_operations()
+        offset = max(start - first, 0)
+        died = []
+        if roots is not None:
+            # Nodes before the trace. Spilled operations are read from `start`
+            if first == 0:
+                base = []
+            elif first == self.evicted:
+                base = self._initial_operations()
+            elif initial is not None:
+                base = initial
+            else:
+                base = self.state_at(first).initial_operations()
+            dead = set()
+            for step, id in deaths(trace, roots, base):
+                if step < offset:
+                    dead.add(id)
+                else:
+                    died.append((step - offset, id))
+            initial = [op for op in initial or [] if op.id not in dead]
+        return Operations(
+            operations=OperationsView(
+                trace,
+                self._location_snippets.__getitem__,
+                max(animate_from - first, 0),
+                start=offset,
+            ),
+            metadata=metadata,
+            snippets=self.snippets[snippets_from:],
+            initial=initial or [],
+            deaths=died,
         )
 
+    @property
+    def replay(self) -> Replay:
+        """
+        Replay engine over the operations in memory. Its steps start at the
+        first operation that wasn't evicted.
+        """
+        if self._replay is None or self._replay.trace is not self.trace:
+            self._replay = Replay(self.trace, base=self._base)
+        return self._replay
+
+    def state_at(self, step: int) -> HeapState:
+        """State of the nodes after the first `step` logged operations."""
+        if step >= self.evicted:
+            return self.replay.state_at(step - self.evicted)
+        if self._spill is None:
+            raise IndexError("step was dropped from the logger")
+        # Replayed a chunk at a time, so the spilled operations are never all
+        # in memory
+        state: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+        for chunk in self._spill.chunks(0, step, self.trace):
+            replay = Replay(chunk, checkpoint_every=len(chunk) + 1, base=state)
+            state = replay.raw_state_at(len(chunk))
+        return heap_state(state, self.trace.strings)
+
+    @property
+    def operations(self) -> Operations:
+        """
+        The logged operations. The operations are built from the trace when
+        they are accessed.
+        """
+        return self._build_operations(VisualizationMetadata(), 0)
+
     def visualize(
-        self, transition_duration=1000, fade_in_duration=1000
-    ) -> OperationsWidget:
+        self,
+        transition_duration=1000,
+        fade_in_duration=1000,
+        binary=False,
+        append=False,
+        start: Optional[int] = None,
+        canvas_threshold=2000,
+        roots: Optional[Sequence[Any]] = None,
+    ) -> Optional["OperationsWidget"]:
         """
         Visualizes the logged operations. Only animates the operations that
-        haven't been animated yet.
-        """
-        operations = Operations(
-            operations=[
-                Operation(
-                    operation=o.operation,
-                    metadata=Metadata(
-                        animate=i >= self.visualized_upto, source=o.metadata.source
-                    ),
-                )
-                for i, o in enumerate(self.operations.operations)
-            ],
-            metadata=VisualizationMetadata(
-                transition_duration=transition_duration,
-                fade_in_duration=fade_in_duration,
-            ),
+        haven't been animated yet. If `binary` is true the operations are sent
+        to the frontend as binary buffers, which is faster for large traces.
+
+        If `append` is true the widget is kept by the logger, and the next
+        calls with `append` send only the new operations to that widget and
+        return `None` instead of creating a new widget.
+
+        If `start` is given a new widget shows the state of the nodes at that
+        step without animating the operations before it, and animates the
+        rest.
+
+        Above `canvas_threshold` nodes the frontend draws on a canvas, and
+        only draws and animates the nodes in view.
+
+        If `roots` is given the nodes are removed from a new widget when they
+        become unreachable from them, so rebuilt lists don't leave their old
+        nodes behind. Roots are nodes, or objects that hold nodes in their
+        attributes, directly or in lists, tuples, sets or dicts. Variables
+        aren't recorded, so a node is also kept until its last operation.
+        """
+        appending = append and self.widget is not None
+        serialized = self.widget.serialization_seconds if appending else 0.0
+        begin = time.perf_counter()
+        w = self._visualize(
+            transition_duration,
+            fade_in_duration,
+            binary,
+            append,
+            start,
+            canvas_threshold,
+            roots,
+        )
+        seconds = time.perf_counter() - begin
+        serialization = (self.widget if appending else w).serialization_seconds
+        serialization -= serialized
+        stats = self._stats
+        stats.serialization_seconds += serialization
+        stats.sync_seconds += seconds - serialization
+        stats.visualizations += 1
+        for hook in self._hooks:
+            hook.on_visualize(self, w, seconds)
+        return w
+
+    def _visualize(
+        self,
+        transition_duration: int,
+        fade_in_duration: int,
+        binary: bool,
+        append: bool,
+        start: Optional[int],
+        canvas_threshold: int,
+        roots: Optional[Sequence[Any]],
+    ) -> Optional["OperationsWidget"]:
+        metadata = VisualizationMetadata(
+            transition_duration=transition_duration,
+            fade_in_duration=fade_in_duration,
+            canvas_threshold=canvas_threshold,
         )
-        w = OperationsWidget()
-        w.operations = operations
-        self.visualized_upto = len(self.operations.operations)
+        if append and self.widget is not None:
+            self.widget.append(
+                self._build_operations(
+                    metadata,
+                    self.visualized_upto,
+                    start=self.visualized_upto,
+                    snippets_from=self._snippets_sent,
+                )
+            )
+            self.visualized_upto = self.logged
+            self._snippets_sent = len(self.snippets)
+            return None
+
+        from dsvisualizer.widget import OperationsWidget
+
+        w = OperationsWidget(binary=binary)
+        ids = None if roots is None else root_ids(roots, self.node_ids)
+        if start is None:
+            w.operations = self._build_operations(
+                metadata, self.visualized_upto, roots=ids
+            )
+        else:
+            w.operations = self._build_operations(
+                metadata,
+                start,
+                start=start,
+                initial=self.state_at(start).initial_operations(),
+                roots=ids,
+            )
+        self.visualized_upto = self.logged
+        if append:
+            self.widget = w
+            self._snippets_sent = len(self.snippets)
         return w
 
     def copy(self):
         return Logger(self)
 
+    def save(self, path: str):
+        """
+        Saves the logged operations and their source snippets to a trace
+        file, which can be opened with `Logger.load`. Spilled operations are
+        included.
+        """
+        self._update_snippets()
+        trace, first = self._visible_trace()
+        saved = trace.slice(0, 0)
+        saved.opcodes, saved.ids = trace.opcodes, trace.ids
+        saved.nexts, saved.values = trace.nexts, trace.values
+        snippet = self._location_snippets.__getitem__
+        saved.sources = array("q", map(snippet, trace.sources))
+        save_trace(path, TraceFile(saved, self.snippets, first, self._base))
+
+    @classmethod
+    def load(cls, path: str) -> "Logger":
+        """
+        Opens a trace file saved by `Logger.save`. The file is memory-mapped
+        and the operations are read when they are visualized or replayed.
+        Operations can't be logged to the returned logger. The file is
+        unmapped by `close`, or at the end of a `with` block, and the
+        operations are no longer available.
+        """
+        contents = load_trace(path)
+        logger = cls()
+        logger._trace_file = contents
+        logger.trace = contents.trace
+        logger.snippets = contents.snippets
+        logger._location_snippets = list(range(len(contents.snippets)))
+        logger.evicted = contents.evicted
+        logger._base = contents.base
+        return logger
+
+    def close(self):
+        """
+        Sends the pending operations to the sinks and closes them, and closes
+        the spill file, removing it if it is temporary, or the loaded trace
+        file.
+        """
+        self.flush()
+        for sink in self._sinks:
+            sink.close()
+        self._sinks.clear()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        if self._trace_file is not None:
+            # The columns of the trace were views of the file
+            self._trace_file.close()
+            self.trace = Trace()
+
     def __enter__(self):
-        self._saved_logger = get_logger()
-        set_logger(self)
+        _entered.set(_entered.get(()) + (_current.set(self),))
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        set_logger(self._saved_logger)
+        entered = _entered.get()
+        _entered.set(entered[:-1])
+        _current.reset(entered[-1])
+        if self._trace_file is not None:
+            self.close()
 
 
 def reset_logger():
-    set_logger(Logger())
+    """Replaces the default logger and uses it in the current context."""
+    global _logger
+    _logger = Logger()
+    set_logger(_logger)
 
 
 _logger = Logger()
@@ -1,9 +1,22 @@
+from contextlib import contextmanager
 from functools import wraps
+import inspect
 import itertools
+import os
 from types import FunctionType
+from typing import Any, List, Optional, Tuple
+from weakref import WeakKeyDictionary
 
 from dsvisualizer.operations import Init, GetNext, GetValue, SetNext, SetValue
-from dsvisualizer.logger import Logger, get_logger
+from dsvisualizer.logger import (
+    DROP,
+    RECORD_ALL,
+    WRAPPER_CODES,
+    Logger,
+    _current,
+    RecordingPolicy,
+    get_logger,
+)
 
 counter = itertools.count()
 
@@ -15,94 +28,399 @@ class Uninitialized:
 
 UNINITIALIZED = Uninitialized()
 
+# Attributes of the instrumented classes: for each class, the name, the
+# instrumented attribute and the attribute that is used while paused.
+# `_MISSING` removes the attribute from the class while paused.
+_MISSING = object()
+_instrumented: "WeakKeyDictionary[type, List[Tuple[str, Any, Any]]]"
+_instrumented = WeakKeyDictionary()
+# Number of active pauses
+_pauses = 1 if os.environ.get("DSVISUALIZER_PAUSED", "") not in ("", "0") else 0
+
+
+def _set(cls: type, name: str, attribute):
+    if attribute is not _MISSING:
+        setattr(cls, name, attribute)
+    elif name in cls.__dict__:
+        delattr(cls, name)
+
+
+def _install(cls: type, instrumented: bool):
+    for name, attribute, raw in _instrumented.get(cls, ()):
+        _set(cls, name, attribute if instrumented else raw)
+
+
+def _instrument(cls: type, name: str, attribute, raw=_MISSING):
+    """
+    Sets the instrumented `attribute` of the class, which is replaced by
+    `raw` while recording is paused.
+    """
+    _instrumented.setdefault(cls, []).append((name, attribute, raw))
+    _set(cls, name, raw if _pauses else attribute)
+
+
+def pause():
+    """
+    Stops recording the operations of every node and container. The
+    instrumented attributes and methods are removed from the classes, so
+    nodes and containers run at the speed of the undecorated classes.
+    Nodes created while paused are not shown. Calls to `pause` and
+    `resume` nest.
+
+    Recording starts paused if the environment variable
+    `DSVISUALIZER_PAUSED` is set to a value other than 0.
+    """
+    global _pauses
+    _pauses += 1
+    if _pauses == 1:
+        for cls in list(_instrumented):
+            _install(cls, False)
+
+
+def resume():
+    """Resumes recording after a call to `pause`."""
+    global _pauses
+    if _pauses == 0:
+        raise RuntimeError("recording is not paused")
+    _pauses -= 1
+    if _pauses == 0:
+        for cls in list(_instrumented):
+            _install(cls, True)
+
+
+def is_paused() -> bool:
+    return _pauses > 0
+
+
+@contextmanager
+def paused():
+    """
+    Context manager that pauses recording, see `pause`. Pausing is global,
+    it affects every thread and task.
+
+    Example:
+
+    >>> with paused():
+            for i in range(10**6):
+                l.push(i)
+    """
+    pause()
+    try:
+        yield
+    finally:
+        resume()
+
+
+class _NodeId:
+    """Assigns an id to a node the first time it is needed."""
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        id = obj.__dict__["_id"] = next(counter)
+        return id
+
+
+class _SlotNodeId:
+    """`_NodeId` for slotted nodes, stores the id in the slot."""
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            return self.slot.__get__(obj)
+        except AttributeError:
+            id = next(counter)
+            self.slot.__set__(obj, id)
+            return id
+
+
+def _peek(obj, slot):
+    """Value of the slot of the object, without logging the read."""
+    try:
+        return slot.__get__(obj)
+    except AttributeError:
+        return UNINITIALIZED
+
 
 class LinkedListMixin:
-    _value = UNINITIALIZED
-    _next = UNINITIALIZED
+    _id = _NodeId()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, value in list(cls.__dict__.items()):
+            if isinstance(value, (ValueField, NextField)):
+                _instrument(cls, name, value)
+                if isinstance(value, ValueField):
+                    cls._value_field = name
+                else:
+                    cls._next_field = name
 
     def __new__(cls, *args, **kwargs):
         obj = super(LinkedListMixin, cls).__new__(cls)
-        obj._id = next(counter)
-        # TODO: Replace with a more robust method for obtaining the args
-        get_logger().log(Init(obj._id, str(args[0]), args[1]._id if args[1] else None))
+        if not _pauses:
+            # TODO: Replace with a more robust method for obtaining the args
+            next = args[1]._id if args[1] is not None else None
+            get_logger().log(Init(obj._id, args[0], next))
         return obj
 
     def __repr__(self):
-        return f"({self._get_class_name()} {self._value} {self._next})"
+        value = self.__dict__.get(self._value_field, UNINITIALIZED)
+        next = self.__dict__.get(self._next_field, UNINITIALIZED)
+        return f"({self._get_class_name()} {value} {next})"
 
     def _get_class_name(self):
         return self.__class__.__name__
 
-    def visualize(self, transition_duration=1000, fade_in_duration=1000):
-        return get_logger().visualize(
-            transition_duration=transition_duration, fade_in_duration=fade_in_duration
-        )
+    def visualize(self, **kwargs):
+        """Takes the arguments of `Logger.visualize`."""
+        return get_logger().visualize(**kwargs)
 
 
 class ValueField:
+    """
+    Logs the reads and writes of the value of a node. The value is stored in
+    the attribute of the node with the same name, which is used directly
+    while recording is paused.
+    """
+
+    def __init__(self, reads=True):
+        self.reads = reads
+
     def __set_name__(self, owner, name):
         self.name = name
 
     def __get__(self, obj: LinkedListMixin, objtype=None):
-        get_logger().log(GetValue(obj._id))
-        return obj._value
+        if obj is None:
+            return self
+        if self.reads:
+            get_logger().log(GetValue(obj._id))
+        return obj.__dict__.get(self.name, UNINITIALIZED)
 
     def __set__(self, obj: LinkedListMixin, value):
-        if obj._value != UNINITIALIZED:
-            get_logger().log(SetValue(obj._id, str(value)))
-        obj._value = value
+        attributes = obj.__dict__
+        if self.name in attributes:
+            get_logger().log(SetValue(obj._id, value))
+        attributes[self.name] = value
 
 
 class NextField:
+    """Logs the reads and writes of the next pointer of a node."""
+
+    def __init__(self, reads=True):
+        self.reads = reads
+
     def __set_name__(self, owner, name):
         self.name = name
 
     def __get__(self, obj: LinkedListMixin, objtype=None):
-        get_logger().log(GetNext(obj._id))
-        return obj._next
+        if obj is None:
+            return self
+        if self.reads:
+            get_logger().log(GetNext(obj._id))
+        return obj.__dict__.get(self.name, UNINITIALIZED)
+
+    def __set__(self, obj, next):
+        attributes = obj.__dict__
+        if self.name in attributes:
+            get_logger().log(SetNext(obj._id, None if next is None else next._id))
+        attributes[self.name] = next
+
+
+class SlotValueField(ValueField):
+    """
+    `ValueField` of a slotted node. The value is stored in `slot`, the member
+    descriptor of the slot, which replaces this descriptor while recording
+    is paused.
+    """
+
+    def __init__(self, slot, reads=True):
+        super().__init__(reads)
+        self.slot = slot
+        self._get = slot.__get__
+        self._set = slot.__set__
+
+    def __get__(self, obj: LinkedListMixin, objtype=None):
+        if obj is None:
+            return self
+        if self.reads:
+            get_logger().log(GetValue(obj._id))
+        try:
+            return self._get(obj)
+        except AttributeError:
+            return UNINITIALIZED
+
+    def __set__(self, obj: LinkedListMixin, value):
+        try:
+            self._get(obj)
+        except AttributeError:
+            pass
+        else:
+            get_logger().log(SetValue(obj._id, value))
+        self._set(obj, value)
+
+
+class SlotNextField(NextField):
+    """`NextField` of a slotted node, see `SlotValueField`."""
+
+    def __init__(self, slot, reads=True):
+        super().__init__(reads)
+        self.slot = slot
+        self._get = slot.__get__
+        self._set = slot.__set__
+
+    def __get__(self, obj: LinkedListMixin, objtype=None):
+        if obj is None:
+            return self
+        if self.reads:
+            get_logger().log(GetNext(obj._id))
+        try:
+            return self._get(obj)
+        except AttributeError:
+            return UNINITIALIZED
 
     def __set__(self, obj, next):
-        if obj._next != UNINITIALIZED:
-            get_logger().log(SetNext(obj._id, next._id if next else None))
-        obj._next = next
+        try:
+            self._get(obj)
+        except AttributeError:
+            pass
+        else:
+            get_logger().log(SetNext(obj._id, None if next is None else next._id))
+        self._set(obj, next)
+
+
+def _slotted(cls: type, fields: Tuple[str, ...]) -> type:
+    """
+    Recreates the class with slots for `fields` and the id of the node, like
+    `dataclass(slots=True)`. A subclass would keep the `__dict__` of the
+    class, so the class is created again from its namespace.
+    """
+    own = cls.__dict__.get("__slots__", ())
+    own = (own,) if isinstance(own, str) else tuple(own)
+    inherited = set()
+    for base in cls.__mro__[1:]:
+        slots = base.__dict__.get("__slots__", ())
+        inherited.update((slots,) if isinstance(slots, str) else slots)
+    slots = [
+        name
+        for name in dict.fromkeys((*own, *fields, "_node_id"))
+        if name not in inherited
+    ]
+    # Nodes can still be weakly referenced
+    if not any(base.__weakrefoffset__ for base in cls.__bases__):
+        slots.append("__weakref__")
+
+    namespace = {
+        name: value
+        for name, value in cls.__dict__.items()
+        if name not in (*own, "__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = tuple(slots)
+    namespace["__qualname__"] = cls.__qualname__
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+
+    # Methods that use `super()` or `__class__` refer to the new class
+    for value in namespace.values():
+        function = getattr(value, "__func__", value)
+        if isinstance(function, FunctionType) and function.__closure__:
+            for name, cell in zip(function.__code__.co_freevars, function.__closure__):
+                if name == "__class__" and cell.cell_contents is cls:
+                    cell.cell_contents = slotted
+    return slotted
 
 
 def wrapper(method):
+    """
+    Wraps a container method so that it logs to the logger of the container.
+    Calls made while that logger is already the current one, like calls
+    between methods of the container and recursive calls, don't switch it.
+    """
+    if inspect.iscoroutinefunction(method):
+        # The logger is set in the context of the task that awaits the
+        # method, so it stays set across awaits and other tasks don't see it
+        @wraps(method)
+        async def wrapped_async(self, *args, **kwargs):
+            logger = self._logger
+            if _current.get(None) is logger:
+                return await method(self, *args, **kwargs)
+            token = _current.set(logger)
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                _current.reset(token)
+
+        return wrapped_async
+
     @wraps(method)
-    def wrapped(*args, **kwargs):
-        with args[0]._logger:
-            res = method(*args, **kwargs)
-        return res
+    def wrapped(self, *args, **kwargs):
+        logger = self._logger
+        if _current.get(None) is logger:
+            return method(self, *args, **kwargs)
+        token = _current.set(logger)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _current.reset(token)
 
     return wrapped
 
 
+def _wrap_methods(cls: type, names):
+    """Wraps the methods of the class with the given names once."""
+    for name in names:
+        value = inspect.getattr_static(cls, name)
+        if (
+            isinstance(value, FunctionType)
+            and name != "__init__"
+            and value.__code__ not in WRAPPER_CODES
+        ):
+            _instrument(cls, name, wrapper(value), value)
+
+
+async def _async_method():
+    pass
+
+
+WRAPPER_CODES.add(wrapper(lambda: None).__code__)
+WRAPPER_CODES.add(wrapper(_async_method).__code__)
+
+
 class ContainerBase(type):
     """This metaclass wraps classes that contain linked list nodes. It
     makes sure that the methods of the class always use the logger
     associated to that class."""
 
     def __new__(mcs, name, bases, namespace):
-        new_namespace = {
-            name: wrapper(value)
-            if isinstance(value, FunctionType) and name != "__init__"
-            else value
-            for name, value in namespace.items()
-        }
-        return super().__new__(mcs, name, bases, new_namespace)
+        cls = super().__new__(mcs, name, bases, namespace)
+        _wrap_methods(cls, namespace)
+        return cls
 
 
 class Container(metaclass=ContainerBase):
     def __init__(self):
         self._logger = Logger()
 
-    def visualize(self, transition_duration=1000, fade_in_duration=1000):
-        return self._logger.visualize(
-            transition_duration=transition_duration, fade_in_duration=fade_in_duration
-        )
-
-
-def container(lines_before=2, lines_after=2):
+    def visualize(self, prune=True, **kwargs):
+        """
+        Visualizes the operations of the container, takes the arguments of
+        `Logger.visualize`. If `prune` is true and no `roots` are given the
+        nodes that become unreachable from the container are removed.
+        """
+        if prune:
+            kwargs.setdefault("roots", (self,))
+        return self._logger.visualize(**kwargs)
+
+
+def container(
+    lines_before=2,
+    lines_after=2,
+    policy: RecordingPolicy = RECORD_ALL,
+    max_operations: Optional[int] = None,
+    eviction: str = DROP,
+):
     """
     This decorator declares the class as a linked list container so it can be
     visualized. The visualization shows the source code around the lines that
@@ -112,6 +430,11 @@ def container(lines_before=2, lines_after=2):
 
     `next_field`: Number of lines after to be displayed.
 
+    `policy`: Which operations are recorded by the logger of the container.
+
+    `max_operations`: Maximum number of operations kept in memory by the
+    logger. `eviction` is `DROP` or `SPILL`, see `Logger`.
+
     Example:
 
     >>> @container()
@@ -132,19 +455,22 @@ def container(lines_before=2, lines_after=2):
         init = cls.__init__
 
         def __init__(self):
-            self._logger = Logger(lines_before=lines_before, lines_after=lines_after)
+            self._logger = Logger(
+                lines_before=lines_before,
+                lines_after=lines_after,
+                policy=policy,
+                max_operations=max_operations,
+                eviction=eviction,
+            )
             init(self)
 
-        def visualize(self, transition_duration=1000, fade_in_duration=1000):
-            return self._logger.visualize(
-                transition_duration=transition_duration,
-                fade_in_duration=fade_in_duration,
-            )
+        def visualize(self, prune=True, **kwargs):
+            """See `Container.visualize`."""
+            if prune:
+                kwargs.setdefault("roots", (self,))
+            return self._logger.visualize(**kwargs)
 
-        for name in dir(cls):
-            value = getattr(cls, name)
-            if isinstance(value, FunctionType) and name != "__init__":
-                setattr(cls, name, wrapper(value))
+        _wrap_methods(cls, dir(cls))
 
         setattr(cls, "__init__", __init__)
         setattr(cls, "visualize", visualize)
@@ -153,7 +479,12 @@ def container(lines_before=2, lines_after=2):
     return decorator
 
 
-def node(value_field: str = "value", next_field: str = "next"):
+def node(
+    value_field: str = "value",
+    next_field: str = "next",
+    policy: RecordingPolicy = RECORD_ALL,
+    slots: Optional[bool] = None,
+):
     """
     This decorator declares the class as a linked list node so it can be visualized.
 
@@ -161,6 +492,15 @@ def node(value_field: str = "value", next_field: str = "next"):
 
     `next_field`: Name of the field that holds the next node in the linked list.
 
+    `policy`: Which operations on the node are recorded. Reads that the
+    policy drops are not sent to the logger at all.
+
+    `slots`: If true the class is recreated with `__slots__` for the fields
+    and the id of the node, so the nodes have no `__dict__` and use less
+    memory. The decorator then returns the new class. By default the nodes
+    are slotted if the class defines `__slots__`. The bases of the class
+    must define `__slots__` too for the nodes to have no `__dict__`.
+
     Example:
 
     >>> @node('head', 'tail')
@@ -171,45 +511,64 @@ def node(value_field: str = "value", next_field: str = "next"):
     """
 
     def decorator(cls):
+        slotted = "__slots__" in cls.__dict__ if slots is None else slots
+        if slotted:
+            cls = _slotted(cls, (value_field, next_field))
+            value_slot = inspect.getattr_static(cls, value_field)
+            next_slot = inspect.getattr_static(cls, next_field)
         init = cls.__init__
 
-        setattr(cls, value_field, ValueField())
-        setattr(cls, next_field, NextField())
-
         def __init__(self, *args, **kwargs):
-            self._next = UNINITIALIZED
-            self._value = UNINITIALIZED
-            self._id = next(counter)
             init(self, *args, **kwargs)
 
             if value_field in kwargs:
                 value = kwargs[value_field]
-                n = kwargs.get(next_field, None)._id
+                n = kwargs.get(next_field)
+                n = None if n is None else n._id
             else:
                 value = args[0]
-                n = args[1]._id if args[1] else None
+                n = args[1]._id if args[1] is not None else None
 
-            get_logger().log(Init(self._id, str(value), n))
+            get_logger().log(Init(self._id, value, n))
 
         def __repr__(self):
-            return f"({self._get_class_name()} {self._value} {self._next})"
+            if slotted:
+                value = _peek(self, value_slot)
+                next = _peek(self, next_slot)
+            else:
+                value = self.__dict__.get(value_field, UNINITIALIZED)
+                next = self.__dict__.get(next_field, UNINITIALIZED)
+            return f"({self._get_class_name()} {value} {next})"
 
         def _get_class_name(self):
             return self.__class__.__name__
 
-        def visualize(self, transition_duration=1000, fade_in_duration=1000):
+        def visualize(self, **kwargs):
             """
-            Visualizes the logged operations in the current logger. If the node
-            belongs to a container the current logger is the logger of that
-            container. Only animates the operations that haven't been animated
-            yet.
+            Visualizes the logged operations in the current logger, takes the
+            arguments of `Logger.visualize`. If the node belongs to a container
+            the current logger is the logger of that container. Only animates
+            the operations that haven't been animated yet.
             """
-            return get_logger().visualize(
-                transition_duration=transition_duration,
-                fade_in_duration=fade_in_duration,
-            )
-
-        setattr(cls, "__init__", __init__)
+            return get_logger().visualize(**kwargs)
+
+        if slotted:
+            value_descriptor = SlotValueField(value_slot, reads=policy.value_reads)
+            next_descriptor = SlotNextField(next_slot, reads=policy.next_reads)
+            # While paused the slots are used directly
+            value_raw, next_raw = value_slot, next_slot
+            node_id = _SlotNodeId(inspect.getattr_static(cls, "_node_id"))
+        else:
+            value_descriptor = ValueField(reads=policy.value_reads)
+            next_descriptor = NextField(reads=policy.next_reads)
+            value_raw = next_raw = _MISSING
+            node_id = _NodeId()
+        value_descriptor.__set_name__(cls, value_field)
+        next_descriptor.__set_name__(cls, next_field)
+        _instrument(cls, value_field, value_descriptor, value_raw)
+        _instrument(cls, next_field, next_descriptor, next_raw)
+        _instrument(cls, "__init__", __init__, init)
+        setattr(cls, "_id", node_id)
         setattr(cls, "__repr__", __repr__)
         setattr(cls, "_get_class_name", _get_class_name)
         setattr(cls, "visualize", visualize)
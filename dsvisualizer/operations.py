@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Any, Union, List
+from typing import Any, Union, List, Tuple
 
 
 @dataclass(frozen=True)
@@ -36,13 +36,23 @@ class GetNext:
     id: int
 
 
+@dataclass(frozen=True)
+class Traverse:
+    """Consecutive `GetNext` on the nodes of a chain, from `id` to `to`."""
+
+    operation: str = field(init=False, repr=False, default="traverse")
+    id: int
+    to: int
+
+
 @dataclass(frozen=True)
 class Metadata:
     animate: bool
-    source: List[str]
+    # Index in `Operations.snippets`, or the lines of source code
+    source: Union[int, List[str]]
 
 
-LinkedListOperation = Union[Init, SetValue, GetValue, SetNext, GetNext]
+LinkedListOperation = Union[Init, SetValue, GetValue, SetNext, GetNext, Traverse]
 
 
 @dataclass(frozen=True)
@@ -55,9 +65,21 @@ class Operation:
 class VisualizationMetadata:
     transition_duration: int = 1000
     fade_in_duration: int = 1000
+    # Nodes above which the frontend draws on a canvas
+    canvas_threshold: int = 2000
 
 
 @dataclass(frozen=True)
 class Operations:
     operations: List[Operation] = field(default_factory=list)
     metadata: VisualizationMetadata = VisualizationMetadata()
+    snippets: List[List[str]] = field(default_factory=list)
+    # Nodes shown without animation before the operations
+    initial: List[Init] = field(default_factory=list)
+    # Nodes removed after the operations, as (index of the operation, node id)
+    deaths: List[Tuple[int, int]] = field(default_factory=list)
+
+    def source(self, operation: Operation) -> List[str]:
+        """Lines of source code of one of the operations."""
+        source = operation.metadata.source
+        return self.snippets[source] if isinstance(source, int) else source
@@ -0,0 +1,122 @@
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from dsvisualizer.operations import Init
+from dsvisualizer.trace import INIT, NONE, SET_NEXT, TRAVERSE, Trace
+
+
+def root_ids(objects: Iterable, node_ids: Dict[int, int]) -> List[int]:
+    """
+    Ids in the trace of the nodes held by `objects`. Each object is a node,
+    or an object that holds nodes in its attributes, directly or in lists,
+    tuples, sets or dicts. Nodes that weren't logged are skipped.
+    """
+
+    def nodes(value):
+        if hasattr(type(value), "_id"):
+            yield value
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            for item in value:
+                if hasattr(type(item), "_id"):
+                    yield item
+        elif isinstance(value, dict):
+            for item in value.values():
+                if hasattr(type(item), "_id"):
+                    yield item
+
+    ids = []
+    for obj in objects:
+        values = [obj] if hasattr(type(obj), "_id") else []
+        values.extend(getattr(obj, "__dict__", {}).values())
+        for value in values:
+            for node in nodes(value):
+                dense = node_ids.get(node._id)
+                if dense is not None:
+                    ids.append(dense)
+    return ids
+
+
+def deaths(
+    trace: Trace, roots: Iterable[int] = (), initial: Sequence[Init] = ()
+) -> List[Tuple[int, int]]:
+    """
+    Steps at which the nodes become unreachable, as `(step, id)` pairs in the
+    order they die. A node dies after step `i` when no live node points to
+    it, it isn't one of the `roots` and no operation after `i` uses it. The
+    variables of the program aren't recorded, so using a node later is taken
+    as a variable holding it until then.
+
+    `initial` are the nodes before the first operation. The ones that die
+    before it have step -1.
+
+    Nodes are counted by references, so the nodes of a cycle never die.
+    """
+    opcodes, ids, nexts = trace.opcodes, trace.ids, trace.nexts
+    roots = list(roots)
+    initial_ids = [op.id for op in initial]
+    initial_ids.extend(op.next for op in initial if op.next is not None)
+    size = 1 + max(
+        max(ids, default=NONE),
+        max(nexts, default=NONE),
+        max(initial_ids, default=NONE),
+        max(roots, default=NONE),
+    )
+
+    # Last step that uses each node
+    never = -1
+    last = [never] * size
+    for i in range(len(trace)):
+        last[ids[i]] = i
+        opcode = opcodes[i]
+        if nexts[i] != NONE and (
+            opcode == INIT or opcode == SET_NEXT or opcode == TRAVERSE
+        ):
+            last[nexts[i]] = i
+    for id in roots:
+        last[id] = len(trace)
+
+    alive = [False] * size
+    # Number of live nodes that point to each node
+    refs = [0] * size
+    next_of = [NONE] * size
+    died: List[Tuple[int, int]] = []
+
+    def release(id: int, step: int):
+        # The nodes that only this node kept alive die with it
+        while alive[id] and refs[id] == 0 and last[id] <= step:
+            alive[id] = False
+            died.append((step, id))
+            next = next_of[id]
+            next_of[id] = NONE
+            if next == NONE:
+                return
+            refs[next] -= 1
+            id = next
+
+    for op in initial:
+        alive[op.id] = True
+        if op.next is not None:
+            next_of[op.id] = op.next
+            refs[op.next] += 1
+    for op in initial:
+        release(op.id, never)
+
+    # Nodes created while paused are first seen when they are used
+    for i in range(len(trace)):
+        id = ids[i]
+        opcode = opcodes[i]
+        next = nexts[i]
+        alive[id] = True
+        if opcode == INIT or opcode == SET_NEXT:
+            old = next_of[id]
+            next_of[id] = next
+            if next != NONE:
+                alive[next] = True
+                refs[next] += 1
+            if old != NONE:
+                refs[old] -= 1
+                release(old, i)
+        elif opcode == TRAVERSE:
+            alive[next] = True
+            release(next, i)
+        release(id, i)
+    return died
@@ -0,0 +1,160 @@
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from dsvisualizer.operations import Init
+from dsvisualizer.trace import INIT, NONE, SET_NEXT, SET_VALUE, Trace
+
+# Value of the nodes whose value wasn't recorded, shown like the value of a
+# node initialized without one
+UNKNOWN_VALUE = "uninitialized"
+
+
+@dataclass(frozen=True)
+class HeapState:
+    """
+    Values and next pointers of the nodes at some step of a trace. Nodes
+    created while recording was paused only have the fields that were set
+    since.
+    """
+
+    values: Dict[int, str]
+    nexts: Dict[int, Optional[int]]
+
+    def initial_operations(self) -> List[Init]:
+        """`Init` operations that rebuild this state, in creation order."""
+        values, nexts = self.values, self.nexts
+        return [
+            Init(id, values.get(id, UNKNOWN_VALUE), nexts.get(id))
+            for id in dict.fromkeys([*values, *nexts])
+        ]
+
+
+# Index in the string table of the value and next id of each node. Missing
+# next pointers are `NONE`.
+_State = Tuple[Dict[int, int], Dict[int, int]]
+
+
+def heap_state(state: _State, strings: List[str]) -> HeapState:
+    """`HeapState` with the values of `state` looked up in `strings`."""
+    values, nexts = state
+    return HeapState(
+        values={id: strings[value] for id, value in values.items()},
+        nexts={id: None if next == NONE else next for id, next in nexts.items()},
+    )
+
+
+# Marks the ids without a value or a next pointer in a `_Columns` state
+_ABSENT = -2
+
+# The same state as flat columns indexed by node id, which take much less
+# memory than dicts and are copied at once
+_Columns = Tuple[array, array]
+
+
+def _columns(state: _State) -> _Columns:
+    values, nexts = state
+    size = 1 + max(max(values, default=-1), max(nexts, default=-1))
+    columns = (array("q", [_ABSENT]) * size, array("q", [_ABSENT]) * size)
+    for id, value in values.items():
+        columns[0][id] = value
+    for id, next in nexts.items():
+        columns[1][id] = next
+    return columns
+
+
+def _size(columns: _Columns) -> int:
+    values, nexts = columns
+    return values.itemsize * (len(values) + len(nexts))
+
+
+def _dict(column: array) -> Dict[int, int]:
+    state = dict(enumerate(column))
+    if _ABSENT in column:
+        return {id: x for id, x in state.items() if x != _ABSENT}
+    return state
+
+
+class Replay:
+    """
+    Reconstructs the state of the nodes of a trace at any step by replaying
+    its operations. A checkpoint of the state is kept every
+    `checkpoint_every` operations, so finding the state at a step only
+    replays the operations since the checkpoint before it. Checkpoints are
+    created when they are first needed, so the trace can keep growing.
+
+    The checkpoints take at most `max_checkpoint_bytes`, 16 bytes per node
+    each. When a longer trace needs more the interval is doubled and every
+    other checkpoint is dropped, so seeks replay more operations. If it is
+    `None` the checkpoints are never dropped.
+    """
+
+    def __init__(
+        self,
+        trace: Trace,
+        checkpoint_every: int = 4096,
+        base: Optional[_State] = None,
+        max_checkpoint_bytes: Optional[int] = 256 * 2**20,
+    ):
+        self.trace = trace
+        self.checkpoint_every = checkpoint_every
+        self.max_checkpoint_bytes = max_checkpoint_bytes
+        # State before the operation `i * checkpoint_every`. `base` is the
+        # state before the first operation of the trace.
+        self._checkpoints: List[_Columns] = [_columns(base or ({}, {}))]
+        self._checkpoint_bytes = _size(self._checkpoints[0])
+
+    def _replay(self, state: _Columns, start: int, stop: int):
+        values, nexts = state
+        trace = self.trace
+        opcodes, ids = trace.opcodes, trace.ids
+        if start < stop:
+            missing = max(ids[start:stop]) + 1 - len(values)
+            if missing > 0:
+                values.extend(array("q", [_ABSENT]) * missing)
+                nexts.extend(array("q", [_ABSENT]) * missing)
+        for i in range(start, stop):
+            opcode = opcodes[i]
+            if opcode == INIT:
+                values[ids[i]] = trace.values[i]
+                nexts[ids[i]] = trace.nexts[i]
+            elif opcode == SET_VALUE:
+                values[ids[i]] = trace.values[i]
+            elif opcode == SET_NEXT:
+                nexts[ids[i]] = trace.nexts[i]
+
+    def _checkpoint(self, step: int) -> Tuple[_Columns, int]:
+        """The last checkpoint before `step`, and the step it was taken at."""
+        checkpoints = self._checkpoints
+        while step // self.checkpoint_every >= len(checkpoints):
+            k = self.checkpoint_every
+            last = len(checkpoints) - 1
+            values, nexts = checkpoints[last]
+            state = (values[:], nexts[:])
+            self._replay(state, last * k, (last + 1) * k)
+            checkpoints.append(state)
+            self._checkpoint_bytes += _size(state)
+            limit = self.max_checkpoint_bytes
+            if limit is not None and self._checkpoint_bytes > limit:
+                # Checkpoints at multiples of twice the interval are kept
+                self.checkpoint_every *= 2
+                del checkpoints[1::2]
+                self._checkpoint_bytes = sum(map(_size, checkpoints))
+        index = step // self.checkpoint_every
+        return checkpoints[index], index * self.checkpoint_every
+
+    def raw_state_at(self, step: int) -> _State:
+        """
+        State after the first `step` operations of the trace, with the index
+        in the string table of each value.
+        """
+        if not 0 <= step <= len(self.trace):
+            raise IndexError("step out of range")
+        (values, nexts), start = self._checkpoint(step)
+        state = (values[:], nexts[:])
+        self._replay(state, start, step)
+        return _dict(state[0]), _dict(state[1])
+
+    def state_at(self, step: int) -> HeapState:
+        """State after the first `step` operations of the trace."""
+        return heap_state(self.raw_state_at(step), self.trace.strings)
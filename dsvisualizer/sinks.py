@@ -0,0 +1,172 @@
+import abc
+import asyncio
+import inspect
+import json
+import socket
+import time
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
+
+# Records sent to the sinks:
+#
+# - An operation, in the format of `serialize_operation` with the step it was
+#   logged at, and the source as an index into the snippet table:
+#   {"step": 3, "operation": {...}, "metadata": {"animate": true, "source": 0}}
+# - A snippet, sent before the first operation that uses it:
+#   {"snippet": 0, "lines": [...]}
+Record = Dict[str, Any]
+
+
+class Sink(abc.ABC):
+    """
+    Receives the operations of a logger as they are logged, in batches.
+    Subclass it and implement `write`, then add it with `Logger.add_sink`.
+
+    `batch_size`: Number of records kept before they are written.
+
+    `flush_interval`: Seconds after which the records kept are written when
+    the next one arrives, even if the batch is not full. If `None` they are
+    only written when the batch is full or the sink is flushed.
+    """
+
+    def __init__(self, batch_size: int = 1000, flush_interval: Optional[float] = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._batch: List[Record] = []
+        self._flushed = time.monotonic()
+        # Number of snippets of the logger that have been sent
+        self._snippets_sent = 0
+
+    def add(self, record: Record):
+        """Adds a record to the batch, and writes the batch if it is due."""
+        batch = self._batch
+        batch.append(record)
+        if len(batch) >= self.batch_size or (
+            self.flush_interval is not None
+            and time.monotonic() - self._flushed >= self.flush_interval
+        ):
+            self.flush()
+
+    def add_snippets(self, snippets: List[List[str]]):
+        """Adds the snippets of the table that haven't been sent."""
+        for index in range(self._snippets_sent, len(snippets)):
+            self.add({"snippet": index, "lines": snippets[index]})
+        self._snippets_sent = len(snippets)
+
+    def flush(self):
+        """Writes the records kept."""
+        batch = self._batch
+        self._batch = []
+        self._flushed = time.monotonic()
+        if batch:
+            self.write(batch)
+
+    @abc.abstractmethod
+    def write(self, batch: List[Record]):
+        """Writes a batch of records."""
+
+    def close(self):
+        self.flush()
+
+
+def _json_lines(batch: List[Record]) -> str:
+    return "".join(json.dumps(record) + "\n" for record in batch)
+
+
+class JsonLinesSink(Sink):
+    """
+    Writes the records to a file, one JSON document per line. `file` is a
+    path, which is truncated, or a text file, which is not closed by the sink.
+    """
+
+    def __init__(
+        self,
+        file: Union[str, IO[str]],
+        batch_size: int = 1000,
+        flush_interval: Optional[float] = 1.0,
+    ):
+        super().__init__(batch_size, flush_interval)
+        if isinstance(file, str):
+            self.file = open(file, "w")
+            self._owned = True
+        else:
+            self.file = file
+            self._owned = False
+
+    def write(self, batch: List[Record]):
+        self.file.write(_json_lines(batch))
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        if self._owned:
+            self.file.close()
+
+
+class QueueSink(Sink):
+    """
+    Puts each batch of records, as a list, in a queue. A bounded
+    `queue.Queue` blocks the logger until the consumer catches up.
+
+    For an `asyncio.Queue` consumed by an event loop in another thread pass
+    the `loop`. A bounded queue then blocks the logger too, until the loop
+    has put the batch.
+
+    Without the `loop` the batches are put with `put_nowait`, from the thread
+    of the loop, which can't wait for its consumer. A batch that doesn't fit
+    in a bounded queue is dropped and counted in `dropped`, so logging never
+    fails because the consumer is behind.
+    """
+
+    def __init__(
+        self,
+        queue,
+        batch_size: int = 1,
+        flush_interval: Optional[float] = None,
+        loop=None,
+    ):
+        super().__init__(batch_size, flush_interval)
+        self.queue = queue
+        self.loop = loop
+        # Number of batches that didn't fit in the queue
+        self.dropped = 0
+
+    def write(self, batch: List[Record]):
+        queue = self.queue
+        if not inspect.iscoroutinefunction(queue.put):
+            queue.put(batch)
+        elif self.loop is None:
+            try:
+                queue.put_nowait(batch)
+            except asyncio.QueueFull:
+                self.dropped += 1
+        elif queue.maxsize > 0:
+            asyncio.run_coroutine_threadsafe(queue.put(batch), self.loop).result()
+        else:
+            self.loop.call_soon_threadsafe(queue.put_nowait, batch)
+
+
+class SocketSink(Sink):
+    """
+    Sends the records to a socket, one JSON document per line. `address` is
+    the path of a Unix socket or a `(host, port)` pair.
+    """
+
+    def __init__(
+        self,
+        address: Union[str, Tuple[str, int]],
+        batch_size: int = 1000,
+        flush_interval: Optional[float] = 1.0,
+    ):
+        super().__init__(batch_size, flush_interval)
+        if isinstance(address, str):
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(address)
+        else:
+            self.socket = socket.create_connection(address)
+
+    def write(self, batch: List[Record]):
+        self.socket.sendall(_json_lines(batch).encode())
+
+    def close(self):
+        super().close()
+        self.socket.close()
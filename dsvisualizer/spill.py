@@ -0,0 +1,87 @@
+import os
+import struct
+import tempfile
+import weakref
+from typing import IO, Iterator, Optional
+
+from dsvisualizer.trace import Trace
+
+# Opcode, id, next id, value index and source index of an operation
+RECORD = struct.Struct("<bqqqq")
+# Number of operations read at once by `SpillFile.chunks`
+CHUNK_SIZE = 1 << 16
+
+
+def _close(file: IO[bytes], temporary: Optional[str]):
+    file.close()
+    if temporary is not None:
+        os.remove(temporary)
+
+
+class SpillFile:
+    """
+    Append-only file with the operations evicted from the trace of a
+    logger, one fixed-width record per operation. The string and source
+    tables are not written, they stay in the trace that is kept in memory.
+    If `path` is not given a temporary file is used and removed on `close`,
+    or when the spill file is garbage collected if it wasn't closed.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="dsvisualizer-", suffix=".spill")
+            self.file = os.fdopen(fd, "w+b")
+            self.temporary = True
+        else:
+            self.file = open(path, "w+b")
+            self.temporary = False
+        self.path = path
+        self.length = 0
+        self._finalizer = weakref.finalize(
+            self, _close, self.file, path if self.temporary else None
+        )
+
+    def __len__(self):
+        return self.length
+
+    def append(self, trace: Trace, start: int, stop: int):
+        """Writes the operations of `trace` between `start` and `stop`."""
+        pack = RECORD.pack
+        opcodes, ids, nexts = trace.opcodes, trace.ids, trace.nexts
+        values, sources = trace.values, trace.sources
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(
+            b"".join(
+                pack(opcodes[i], ids[i], nexts[i], values[i], sources[i])
+                for i in range(start, stop)
+            )
+        )
+        self.length += stop - start
+
+    def read(self, start: int, stop: int, tables: Trace) -> Trace:
+        """
+        Reads the operations between `start` and `stop` into a trace that
+        shares the string and source tables of `tables`.
+        """
+        trace = tables.slice(0, 0)
+        self.file.flush()
+        self.file.seek(start * RECORD.size)
+        data = self.file.read((stop - start) * RECORD.size)
+        for opcode, id, next, value, source in RECORD.iter_unpack(data):
+            trace.opcodes.append(opcode)
+            trace.ids.append(id)
+            trace.nexts.append(next)
+            trace.values.append(value)
+            trace.sources.append(source)
+        return trace
+
+    def chunks(self, start: int, stop: int, tables: Trace) -> Iterator[Trace]:
+        """
+        Reads the operations between `start` and `stop` in traces of at most
+        `CHUNK_SIZE` operations, see `read`.
+        """
+        for first in range(start, stop, CHUNK_SIZE):
+            yield self.read(first, min(first + CHUNK_SIZE, stop), tables)
+
+    def close(self):
+        self._finalizer()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jose Romero.
+# Distributed under the terms of the Modified BSD License.
+
+from dsvisualizer.batch import TraceSet, run_batch
+from dsvisualizer.magic import container, node
+from dsvisualizer.operations import Init
+
+
+@node("value", "next")
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+@container()
+class List:
+    def __init__(self):
+        self.head = None
+
+    def push(self, v):
+        self.head = Node(v, self.head)
+
+    def sum(self):
+        total = 0
+        n = self.head
+        while n is not None:
+            total += n.value
+            n = n.next
+        return total
+
+    def cycle(self):
+        self.head.next = self.head
+
+    def pop(self):
+        self.head = self.head.next
+
+
+def push_three(l):
+    for i in range(3):
+        l.push(i)
+
+
+def runaway(l):
+    l.push(0)
+    l.cycle()
+    try:
+        l.sum()
+    except Exception:
+        pass
+
+
+def test_run_batch(tmp_path):
+    workloads = [
+        [("push", i) for i in range(n)] + [("sum",)] for n in range(1, 5)
+    ] + [push_three]
+    traces = run_batch(List, workloads, max_workers=2, directory=str(tmp_path))
+
+    assert len(traces) == 5
+    assert traces.failed == []
+    for n, run in zip(range(1, 5), traces):
+        operations = traces.logger(run.workload).operations.operations
+        inits = [op for op in operations if isinstance(op.operation, Init)]
+        assert len(inits) == n
+        assert run.logged == len(operations)
+    assert traces.logger(4).state_at(3).values == {0: "0", 1: "1", 2: "2"}
+
+
+def test_failed_and_stopped_runs(tmp_path):
+    traces = run_batch(
+        List, [[("pop",)], runaway], timeout=0.5, directory=str(tmp_path)
+    )
+
+    failed, stopped = traces
+    assert "AttributeError" in failed.error
+    assert failed.logged == 0
+    assert stopped.error.startswith("Timed out")
+    assert stopped.logged > 2
+    # The trace is kept until the run was stopped
+    assert len(traces.logger(1).operations.operations) == stopped.logged
+
+
+def test_merge_and_save(tmp_path):
+    first = run_batch(List, [[("push", 1)]], directory=str(tmp_path / "a"))
+    second = run_batch(List, [[("push", 2)], [("push", 3)]])
+    merged = TraceSet.merge(first, second)
+    assert len(merged) == len(first + second) == 3
+
+    path = str(tmp_path / "runs.json")
+    merged.save(path)
+    loaded = TraceSet.load(path)
+    assert loaded.runs == merged.runs
+    assert loaded.logger(2).state_at(1).values == {0: "3"}
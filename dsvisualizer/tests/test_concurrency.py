@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jose Romero.
+# Distributed under the terms of the Modified BSD License.
+
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dsvisualizer.logger import Logger, get_logger
+from dsvisualizer.magic import container, node
+from dsvisualizer.operations import Init
+
+
+@node("value", "next")
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+@container()
+class List:
+    def __init__(self):
+        self.head = None
+        self.ids = set()
+
+    def push(self, v):
+        self.head = Node(v, self.head)
+        self.ids.add(self.head._id)
+
+    async def push_async(self, v):
+        await asyncio.sleep(0)
+        self.head = Node(v, self.head)
+        await asyncio.sleep(0)
+        self.ids.add(self.head._id)
+        self.head.value
+
+
+def assert_isolated(lists, size):
+    for l in lists:
+        ops = [op.operation for op in l._logger.operations.operations]
+        inits = [op for op in ops if isinstance(op, Init)]
+        assert len(inits) == size
+        assert {op.id for op in ops} == set(range(size))
+        assert set(l._logger.node_ids) == l.ids
+
+
+@pytest.fixture
+def switch_often():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_threads(switch_often):
+    size = 200
+    lists = [List() for _ in range(8)]
+    barrier = threading.Barrier(len(lists))
+
+    def fill(l):
+        barrier.wait()
+        for i in range(size):
+            l.push(i)
+
+    with ThreadPoolExecutor(len(lists)) as pool:
+        list(pool.map(fill, lists))
+
+    assert_isolated(lists, size)
+
+
+def test_async_tasks():
+    size = 50
+    lists = [List() for _ in range(100)]
+
+    async def fill(l):
+        for i in range(size):
+            await l.push_async(i)
+
+    async def main():
+        await asyncio.gather(*(fill(l) for l in lists))
+
+    asyncio.run(main())
+    assert_isolated(lists, size)
+
+
+def test_async_source_shows_caller():
+    l = List()
+
+    async def main():
+        await l.push_async(1)
+
+    asyncio.run(main())
+    operations = l._logger.operations
+    assert "await l.push_async(1)" in operations.source(operations.operations[0])[0]
+
+
+def test_reentrant_with():
+    outer = get_logger()
+    logger = Logger()
+    with logger:
+        with logger:
+            assert get_logger() is logger
+        assert get_logger() is logger
+    assert get_logger() is outer
@@ -0,0 +1,493 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jose Romero.
+# Distributed under the terms of the Modified BSD License.
+
+import gc
+import os
+import subprocess
+import sys
+
+import pytest
+
+from dsvisualizer import spill
+from dsvisualizer.logger import (
+    RECORD_MUTATIONS,
+    RECORD_TRAVERSALS,
+    SPILL,
+    Logger,
+    LoggerHook,
+)
+from dsvisualizer.magic import container, node, paused
+from dsvisualizer.operations import GetNext, GetValue, Init, SetNext, Traverse
+
+
+@node("value", "next")
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+@container()
+class List:
+    def __init__(self):
+        self.head = None
+
+    def push(self, v):
+        self.head = Node(v, self.head)
+
+
+def test_source_of_container_method():
+    l = List()
+    l.push(1)
+
+    operations = l._logger.operations
+    source = operations.source(operations.operations[0])
+    assert source[0].strip() == "l.push(1)"
+    assert any(
+        line.startswith(">") and "self.head = Node(v, self.head)" in line
+        for line in source[1:]
+    )
+
+
+def test_source_without_container():
+    with Logger(lines_before=0, lines_after=0) as logger:
+        n = Node(1, None)
+
+    [operation] = logger.operations.operations
+    [line] = logger.operations.source(operation)
+    assert line.startswith(">")
+    assert "n = Node(1, None)" in line
+
+
+def test_snippets_are_shared():
+    l = List()
+    for i in range(10):
+        l.push(i)
+
+    operations = l._logger.operations
+    assert len(operations.snippets) == 1
+    assert all(op.metadata.source == 0 for op in operations.operations)
+
+
+def make_list(policy):
+    @container(policy=policy)
+    class List:
+        def __init__(self):
+            self.head = None
+
+        def append(self, v):
+            if self.head is None:
+                self.head = Node(v, None)
+                return
+            n = self.head
+            while n.next is not None:
+                n = n.next
+            n.next = Node(v, None)
+
+    return List
+
+
+def test_record_mutations():
+    l = make_list(RECORD_MUTATIONS)()
+    for i in range(3):
+        l.append(i)
+
+    ops = [op.operation for op in l._logger.operations.operations]
+    assert [type(op) for op in ops] == [Init, Init, SetNext, Init, SetNext]
+
+
+def test_coalesce_traversals():
+    l = make_list(RECORD_TRAVERSALS)()
+    for i in range(5):
+        l.append(i)
+
+    # Nodes are numbered in creation order, and appended at the tail
+    ids = list(range(5))
+
+    ops = [op.operation for op in l._logger.operations.operations]
+    assert ops[-3:] == [
+        Traverse(ids[0], ids[3]),
+        Init(ids[4], "4", None),
+        SetNext(ids[3], ids[4]),
+    ]
+    assert sum(isinstance(op, (GetNext, Traverse)) for op in ops) == 4
+
+
+def test_coalesce_stops_at_visualized_operations():
+    with Logger(policy=RECORD_TRAVERSALS) as logger:
+        n = Node(1, Node(2, None))
+        n.next
+    logger.visualized_upto = len(logger.trace)
+    with logger:
+        n.next.next
+
+    ops = [op.operation for op in logger.operations.operations]
+    # The nodes were logged from the tail
+    assert ops[-2:] == [GetNext(1), Traverse(1, 0)]
+
+
+def test_dense_node_ids():
+    with Logger():
+        Node(0, None)
+    with Logger() as second:
+        n = Node(1, Node(2, None))
+        n.value
+
+    assert [op.operation for op in second.operations.operations] == [
+        Init(0, "2", None),
+        Init(1, "1", 0),
+        GetValue(1),
+    ]
+    assert second.node_ids == {n.__dict__["next"]._id: 0, n._id: 1}
+
+
+def make_values(logger, size):
+    with logger:
+        head = None
+        for i in range(size):
+            head = Node(i, head)
+            head.value = i + 1
+    return head
+
+
+def test_drop_evicted_operations():
+    logger = Logger(max_operations=100)
+    head = make_values(logger, 200)
+
+    assert len(logger.trace) <= 100
+    assert logger.logged == 400
+    state = logger.state_at(logger.logged)
+    assert len(state.values) == 200
+    assert state.values[logger.node_ids[head._id]] == "200"
+    with pytest.raises(IndexError):
+        logger.state_at(0)
+
+    operations = logger.operations
+    assert len(operations.operations) == len(logger.trace)
+    assert len(operations.initial) == 200 - len(logger.trace) // 2
+
+
+def test_drop_visualized_operations_first():
+    logger = Logger(max_operations=100)
+    make_values(logger, 20)
+    logger.visualize()
+    make_values(logger, 31)
+
+    assert logger.evicted == 40
+    assert len(logger.trace) == 62
+    # Without enough visualized operations the oldest ones are dropped
+    make_values(logger, 20)
+    assert logger.evicted == 91
+    assert len(logger.trace) == 51
+
+
+def test_spill_evicted_operations(tmp_path):
+    path = tmp_path / "trace.spill"
+    logger = Logger(max_operations=100, eviction=SPILL, spill_path=str(path))
+    make_values(logger, 200)
+
+    assert len(logger.trace) <= 100
+    assert path.stat().st_size > 0
+    operations = logger.operations
+    assert len(operations.operations) == 400
+    assert operations.initial == []
+    assert logger.state_at(2).values == {operations.operations[0].operation.id: "1"}
+    logger.close()
+
+
+def test_spill_is_replayed_in_chunks(monkeypatch):
+    logger = Logger()
+    make_values(logger, 100)
+    spilled = Logger(max_operations=20, eviction=SPILL)
+    make_values(spilled, 100)
+    monkeypatch.setattr(spill, "CHUNK_SIZE", 16)
+    reads = []
+    read = spilled._spill.read
+
+    def recorded_read(start, stop, tables):
+        reads.append(stop - start)
+        return read(start, stop, tables)
+
+    spilled._spill.read = recorded_read
+    for step in [0, 1, 16, 17, 150]:
+        assert spilled.state_at(step) == logger.state_at(step)
+    assert max(reads) == 16
+    spilled.close()
+
+
+def test_temporary_spill_file_is_removed():
+    logger = Logger(max_operations=10, eviction=SPILL)
+    make_values(logger, 20)
+    path = logger._spill.path
+    assert os.path.exists(path)
+    del logger
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def rebuild_list(logger, size):
+    """Pushes to an immutable list, copying it each time."""
+    with logger:
+        head = None
+        for i in range(size):
+            values = []
+            n = head
+            while n is not None:
+                values.append(n.value)
+                n = n.next
+            head = None
+            for value in reversed(values):
+                head = Node(value, head)
+            head = Node(i, head)
+    return head
+
+
+def test_spill_is_read_from_start():
+    logger = Logger()
+    head = rebuild_list(logger, 12)
+    spilled = Logger(max_operations=50, eviction=SPILL)
+    spilled_head = rebuild_list(spilled, 12)
+    reads = []
+    read = spilled._spill.read
+
+    def recorded_read(start, stop, tables):
+        reads.append((start, stop))
+        return read(start, stop, tables)
+
+    spilled._spill.read = recorded_read
+    start = spilled.evicted // 2
+    operations = spilled.visualize(start=start, roots=[spilled_head]).operations
+    assert (start, spilled.evicted) in reads
+    assert all(read_start in (0, start) for read_start, _ in reads)
+    assert operations == logger.visualize(start=start, roots=[head]).operations
+    assert spilled.operations == logger.operations
+    spilled.close()
+
+
+def test_nodes_created_while_paused(tmp_path):
+    with paused():
+        a = Node(0, None)
+        b = Node(1, None)
+    logger = Logger()
+    with logger:
+        a.value = 5
+        b.next = a
+        Node(2, None)
+    a_id, b_id = logger.node_ids[a._id], logger.node_ids[b._id]
+
+    state = logger.state_at(2)
+    assert state.values == {a_id: "5"} and state.nexts == {b_id: a_id}
+    initial = [Init(a_id, "5", None), Init(b_id, "uninitialized", a_id)]
+    assert state.initial_operations() == initial
+    assert logger.visualize(start=2).operations.initial == initial
+
+    # The same nodes before the operations kept in memory, and in a file
+    evicted = Logger(max_operations=1)
+    with evicted:
+        a.value = 5
+        b.next = a
+        Node(2, None)
+    assert evicted.operations.initial == initial
+    path = str(tmp_path / "trace.dsv")
+    evicted.save(path)
+    assert Logger.load(path).operations == evicted.operations
+
+
+def test_unknown_eviction():
+    with pytest.raises(ValueError):
+        Logger(eviction="compress")
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "trace.dsv")
+    logger = Logger()
+    make_values(logger, 50)
+    logger.save(path)
+
+    loaded = Logger.load(path)
+    assert loaded.operations == logger.operations
+    assert loaded.state_at(loaded.logged) == logger.state_at(logger.logged)
+
+
+def test_loaded_traces_are_read_only(tmp_path):
+    path = str(tmp_path / "trace.dsv")
+    logger = Logger()
+    make_values(logger, 5)
+    logger.save(path)
+
+    with Logger.load(path) as loaded:
+        assert loaded.operations == logger.operations
+        with pytest.raises(RuntimeError, match="read-only"):
+            loaded.log(GetValue(0))
+    assert loaded._trace_file.mapping.closed
+    loaded.close()
+
+
+def test_save_and_load_dropped_operations(tmp_path):
+    path = str(tmp_path / "trace.dsv")
+    logger = Logger(max_operations=40)
+    make_values(logger, 50)
+    logger.save(path)
+
+    loaded = Logger.load(path)
+    assert loaded.logged == logger.logged
+    assert loaded.operations == logger.operations
+
+
+def test_values_are_not_compared():
+    class Value:
+        def __eq__(self, other):
+            raise AssertionError("values are not compared")
+
+        __ne__ = __eq__
+
+        def __str__(self):
+            return "value"
+
+    with Logger() as logger:
+        n = Node(Value(), None)
+        n.value = Value()
+
+    values = [op.operation.value for op in logger.operations.operations]
+    assert values == ["value", "value"]
+
+
+def test_stats_and_hooks():
+    events = []
+
+    class Hook(LoggerHook):
+        def on_operation(self, logger, op, recorded):
+            events.append((type(op), recorded))
+
+        def on_visualize(self, logger, widget, seconds):
+            events.append(widget)
+
+    logger = Logger(policy=RECORD_TRAVERSALS)
+    logger.add_hook(Hook())
+    with logger:
+        n = Node(1, Node(2, Node(3, None)))
+        n.value
+        n.next.next
+        n.next.next
+
+    stats = logger.stats
+    assert stats.operations == {"init": 3, "traverse": 2}
+    # The value read and the reads merged into the traversals
+    assert stats.dropped == 3
+    assert stats.nodes == 3
+    assert events == [(Init, True)] * 3 + [(GetValue, False)] + [
+        (GetNext, True),
+        (GetNext, False),
+    ] * 2
+
+    w = logger.visualize()
+    assert events[-1] is w
+    stats = logger.stats
+    assert stats.visualizations == 1
+    # Snippets are formatted when the operations are visualized
+    assert stats.snippet_hits + stats.snippet_misses == len(logger.trace.locations)
+
+
+@container()
+class ImmutableList:
+    def __init__(self):
+        self.head = None
+
+    def push(self, v):
+        # Copies the list instead of changing it
+        values = []
+        n = self.head
+        while n is not None:
+            values.append(n.value)
+            n = n.next
+        head = None
+        for value in reversed(values):
+            head = Node(value, head)
+        self.head = Node(v, head)
+
+
+def live_nodes(operations):
+    nodes = {op.id for op in operations.initial}
+    for op in operations.operations:
+        if isinstance(op.operation, Init):
+            nodes.add(op.operation.id)
+    return nodes - {id for _, id in operations.deaths}
+
+
+def test_prune_unreachable_nodes():
+    l = ImmutableList()
+    for i in range(5):
+        l.push(i)
+
+    operations = l.visualize().operations
+    # Each push copies the list, only the last copy is reachable
+    assert len(live_nodes(operations)) == 5
+    assert len(operations.deaths) == 1 + 2 + 3 + 4
+    assert [step for step, _ in operations.deaths] == sorted(
+        step for step, _ in operations.deaths
+    )
+    for step, id in operations.deaths:
+        assert all(
+            id not in (op.operation.id, getattr(op.operation, "next", None))
+            for op in operations.operations[step + 1 :]
+        )
+
+    assert l.visualize(prune=False).operations.deaths == []
+
+
+def test_prune_from_start():
+    l = ImmutableList()
+    for i in range(3):
+        l.push(i)
+    start = l._logger.logged
+    l.push(3)
+
+    operations = l.visualize(start=start).operations
+    # The nodes of the first two pushes died before `start`
+    assert len(operations.initial) == 3
+    assert len(live_nodes(operations)) == 4
+    assert all(0 <= step < len(operations.operations) for step, _ in operations.deaths)
+
+
+def test_cycles_are_not_pruned():
+    with Logger() as logger:
+        a = Node(0, None)
+        b = Node(1, a)
+        a.next = b
+        del a, b
+        c = Node(2, None)
+
+    operations = logger.visualize(roots=[c]).operations
+    assert operations.deaths == []
+
+
+def test_node_visualize_takes_roots():
+    with Logger():
+        Node(0, None)
+        b = Node(1, None)
+        assert b.visualize().operations.deaths == []
+        assert b.visualize(roots=[b]).operations.deaths == [(0, 0)]
+
+
+def test_recording_does_not_import_widgets():
+    code = """
+import sys
+import dsvisualizer
+
+@dsvisualizer.node()
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+with dsvisualizer.Logger():
+    Node(1, None)
+print(sorted(m for m in ("ipywidgets", "traitlets") if m in sys.modules))
+"""
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "[]"
@@ -5,7 +5,9 @@
 # Distributed under the terms of the Modified BSD License.
 
 import pytest
-from dsvisualizer.magic import container, node
+from dsvisualizer.logger import Logger, get_logger
+from dsvisualizer.magic import container, is_paused, node, paused
+from dsvisualizer.operations import Init, SetValue
 
 # from dsvisualizer.operations import Operation, Operations
 
@@ -66,3 +68,150 @@ def test_container():
 
     assert l.head.value == 1
     assert l.head.next.value == 2
+
+
+def test_paused():
+    @node('value', 'next')
+    class Node:
+        def __init__(self, value, next):
+            self.value = value
+            self.next = next
+
+    @container()
+    class List:
+        def __init__(self):
+            self.head = None
+
+        def push(self, v):
+            self.head = Node(v, self.head)
+
+    l = List()
+    l.push(1)
+    with paused():
+        with paused():
+            l.push(2)
+            assert "value" not in Node.__dict__
+            assert l.head.value == 2
+        assert is_paused()
+        l.push(3)
+    assert not is_paused()
+    l.push(4)
+
+    ops = [op.operation for op in l._logger.operations.operations]
+    assert [op.value for op in ops if isinstance(op, Init)] == ["1", "4"]
+    assert [l.head.next.value, l.head.next.next.value] == [3, 2]
+
+
+def test_class_created_while_paused():
+    with paused():
+        @node('value', 'next')
+        class Node:
+            def __init__(self, value, next):
+                self.value = value
+                self.next = next
+
+        n = Node(1, None)
+
+    with Logger() as logger:
+        n.value = 2
+        Node(3, n)
+    ops = [op.operation for op in logger.operations.operations]
+    assert [type(op) for op in ops] == [SetValue, Init]
+
+
+def test_recursive_container_method():
+    @node('value', 'next')
+    class Node:
+        def __init__(self, value, next):
+            self.value = value
+            self.next = next
+
+    @container()
+    class List:
+        def __init__(self):
+            self.head = None
+
+        def push(self, v):
+            self.head = Node(v, self.head)
+
+        def length(self, n):
+            return 0 if n is None else 1 + self.length(n.next)
+
+        @staticmethod
+        def empty():
+            return List()
+
+    @container()
+    class Stack(List):
+        pass
+
+    assert Stack.length is List.length
+    l = Stack.empty()
+    for i in range(100):
+        l.push(i)
+    outer = get_logger()
+    assert l.length(l.head) == 100
+    assert get_logger() is outer
+    # 100 `Init` and 100 `GetNext`
+    assert len(l._logger.trace) == 200
+
+
+def test_slotted_node():
+    class Base:
+        __slots__ = ()
+
+    @node('value', 'next', slots=True)
+    class Node(Base):
+        def __init__(self, value, next):
+            super().__init__()
+            self.value = value
+            self.next = next
+
+    with Logger() as logger:
+        n = Node(1, None)
+        m = Node(2, n)
+        n.value = 3
+        assert m.next.value == 3
+        m.next = None
+    assert not hasattr(n, "__dict__")
+    assert repr(m) == "(Node 2 None)"
+    assert Node.__qualname__.endswith("test_slotted_node.<locals>.Node")
+    ops = [op.operation for op in logger.operations.operations]
+    assert [type(op).__name__ for op in ops] == [
+        "Init",
+        "Init",
+        "SetValue",
+        "GetNext",
+        "GetValue",
+        "SetNext",
+    ]
+
+    with paused():
+        # The slots are used directly
+        assert type(Node.__dict__["value"]).__name__ == "member_descriptor"
+        p = Node(4, m)
+        assert p.next.value == 2
+    assert p.value == 4
+
+
+def test_node_with_slots():
+    @node('value', 'next')
+    class Node:
+        __slots__ = ('value', 'next')
+
+        def __init__(self, value, next):
+            self.value = value
+            self.next = next
+
+    with Logger() as logger:
+        n = Node(1, Node(2, None))
+        n.next.value = 5
+    assert not hasattr(n, "__dict__")
+    assert n.next.value == 5
+    ops = [op.operation for op in logger.operations.operations]
+    assert [type(op).__name__ for op in ops] == [
+        "Init",
+        "Init",
+        "GetNext",
+        "SetValue",
+    ]
@@ -6,9 +6,85 @@
 
 import pytest
 
+from ..logger import Logger
+from ..magic import node
+from ..operations import Init, SetValue
 from ..widget import OperationsWidget
 
 
 def test_operation_creation_blank():
     w = OperationsWidget()
     assert w.operations.operations == []
+
+
+@node("value", "next")
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+def test_append(mock_comm):
+    logger = Logger()
+    with logger:
+        n = Node("0", None)
+    w = logger.visualize(append=True)
+    w.comm = mock_comm
+    assert len(w.operations.operations) == 1
+
+    with logger:
+        m = Node("1", n)
+        m.value
+    assert logger.visualize(append=True) is None
+
+    content = mock_comm.log_send[-1][1]["data"]["content"]
+    assert content["method"] == "append"
+    assert [op["operation"] for op in content["operations"]["operations"]] == [
+        {"operation": "init", "id": 1, "value": "1", "next": 0},
+        {"operation": "get_value", "id": 1},
+    ]
+    # Only the new snippets are sent, the sources index the whole table
+    assert len(content["operations"]["snippets"]) == 2
+    assert [op["metadata"]["source"] for op in content["operations"]["operations"]] == [
+        1,
+        2,
+    ]
+    assert logger.visualized_upto == 3
+
+
+def test_append_binary(mock_comm):
+    logger = Logger()
+    w = logger.visualize(binary=True, append=True)
+    w.comm = mock_comm
+
+    with logger:
+        logger.log(Init(0, "0", None))
+    logger.visualize(append=True)
+
+    kwargs = mock_comm.log_send[-1][1]
+    content = kwargs["data"]["content"]
+    assert content["operations"]["format"] == "binary"
+    assert content["operations"]["length"] == 1
+    assert len(kwargs["buffers"]) == len(content["buffer_paths"])
+    assert content["operations"]["strings"] == ["0"]
+
+    with logger:
+        logger.log(Init(1, "1", 0))
+        logger.log(SetValue(0, "0"))
+    logger.visualize(append=True)
+
+    # Only the new strings are sent, the values index the whole table
+    kwargs = mock_comm.log_send[-1][1]
+    operations = kwargs["data"]["content"]["operations"]
+    assert operations["strings"] == ["1"]
+    assert operations["strings_from"] == 1
+    values = kwargs["buffers"][content["buffer_paths"].index("values")]
+    assert list(memoryview(values).cast("B").cast("i")) == [1, 0]
+
+
+def test_canvas_threshold():
+    logger = Logger()
+    with logger:
+        Node("0", None)
+    w = logger.visualize(canvas_threshold=10)
+    assert w.get_state("operations")["operations"]["metadata"]["canvas_threshold"] == 10
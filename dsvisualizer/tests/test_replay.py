@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jose Romero.
+# Distributed under the terms of the Modified BSD License.
+
+import random
+
+import pytest
+
+from dsvisualizer.logger import Logger
+from dsvisualizer.operations import GetNext, GetValue, Init, SetNext, SetValue
+from dsvisualizer.replay import HeapState, Replay
+from dsvisualizer.trace import Trace
+
+
+def random_operations(n, seed=0):
+    rng = random.Random(seed)
+    operations = [Init(0, "0", None)]
+    nodes = 1
+    while len(operations) < n:
+        id = rng.randrange(nodes)
+        kind = rng.randrange(5)
+        if kind == 0:
+            operations.append(Init(nodes, str(nodes), rng.choice([None, id])))
+            nodes += 1
+        elif kind == 1:
+            operations.append(SetValue(id, str(rng.random())))
+        elif kind == 2:
+            operations.append(SetNext(id, rng.choice([None, rng.randrange(nodes)])))
+        elif kind == 3:
+            operations.append(GetValue(id))
+        else:
+            operations.append(GetNext(id))
+    return operations
+
+
+def expected_state(operations):
+    values, nexts = {}, {}
+    for op in operations:
+        if isinstance(op, Init):
+            values[op.id] = op.value
+            nexts[op.id] = op.next
+        elif isinstance(op, SetValue):
+            values[op.id] = op.value
+        elif isinstance(op, SetNext):
+            nexts[op.id] = op.next
+    return HeapState(values, nexts)
+
+
+def test_state_at():
+    operations = random_operations(500)
+    trace = Trace()
+    for op in operations:
+        trace.append(op, None)
+
+    replay = Replay(trace, checkpoint_every=16)
+    for step in [500, 0, 1, 15, 16, 17, 250, 499]:
+        assert replay.state_at(step) == expected_state(operations[:step])
+    with pytest.raises(IndexError):
+        replay.state_at(501)
+
+
+def test_state_at_growing_trace():
+    operations = random_operations(100)
+    trace = Trace()
+    replay = Replay(trace, checkpoint_every=8)
+    for i, op in enumerate(operations):
+        trace.append(op, None)
+        if i % 10 == 0:
+            assert replay.state_at(i + 1) == expected_state(operations[: i + 1])
+
+
+def test_checkpoints_are_kept():
+    operations = random_operations(500)
+    trace = Trace()
+    for op in operations:
+        trace.append(op, None)
+
+    replay = Replay(trace, checkpoint_every=4)
+    replay.state_at(500)
+    assert len(replay._checkpoints) == 126
+    assert replay.checkpoint_every == 4
+
+
+def test_checkpoint_memory_is_capped():
+    operations = random_operations(500)
+    trace = Trace()
+    for op in operations:
+        trace.append(op, None)
+
+    replay = Replay(trace, checkpoint_every=4, max_checkpoint_bytes=16 * 1024)
+    assert replay.state_at(500) == expected_state(operations)
+    assert replay._checkpoint_bytes <= 16 * 1024
+    assert replay._checkpoint_bytes == sum(
+        16 * len(values) for values, _ in replay._checkpoints
+    )
+    assert replay.checkpoint_every > 4
+    for step in [0, 3, 127, 128, 300, 499]:
+        assert replay.state_at(step) == expected_state(operations[:step])
+
+
+def test_initial_operations():
+    state = expected_state(random_operations(200, seed=1))
+    assert expected_state(state.initial_operations()) == state
+
+
+def test_visualize_from_step():
+    logger = Logger()
+    with logger:
+        for op in random_operations(50):
+            logger.log(op)
+
+    w = logger.visualize(start=40)
+    assert w.operations.initial == logger.state_at(40).initial_operations()
+    assert len(w.operations.operations) == 10
+    assert all(op.metadata.animate for op in w.operations.operations)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jose Romero.
+# Distributed under the terms of the Modified BSD License.
+
+import asyncio
+import json
+import queue
+import socket
+import threading
+
+import pytest
+
+from dsvisualizer.logger import RECORD_TRAVERSALS, SPILL, Logger
+from dsvisualizer.magic import node
+from dsvisualizer.sinks import JsonLinesSink, QueueSink, Sink, SocketSink
+from dsvisualizer.traits import deserialize_operation
+
+
+@node("value", "next")
+class Node:
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+
+
+def make_list(logger, size):
+    with logger:
+        head = None
+        for i in range(size):
+            head = Node(i, head)
+        n = head
+        while n is not None:
+            n = n.next
+    return head
+
+
+class ListSink(Sink):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+
+    def write(self, batch):
+        self.batches.append(batch)
+
+
+def streamed(records):
+    """Streamed operations, with the lines of their source."""
+    snippets = {}
+    operations = []
+    for record in records:
+        if "snippet" in record:
+            snippets[record["snippet"]] = record["lines"]
+        else:
+            operation = deserialize_operation(record)
+            source = snippets[operation.metadata.source]
+            operations.append((operation.operation, source))
+    return operations
+
+
+def logged(logger):
+    operations = logger.operations
+    return [(op.operation, operations.source(op)) for op in operations.operations]
+
+
+def test_sink_receives_every_operation():
+    logger = Logger()
+    sink = ListSink(batch_size=8, flush_interval=None)
+    logger.add_sink(sink)
+    make_list(logger, 10)
+
+    assert all(len(batch) == 8 for batch in sink.batches)
+    logger.flush()
+    records = [record for batch in sink.batches for record in batch]
+    assert [r["step"] for r in records if "step" in r] == list(range(20))
+    assert streamed(records) == logged(logger)
+
+
+def test_coalesced_traversals_are_streamed_once():
+    logger = Logger(policy=RECORD_TRAVERSALS)
+    sink = ListSink(flush_interval=None)
+    logger.add_sink(sink)
+    make_list(logger, 10)
+    logger.close()
+
+    [records] = sink.batches
+    assert streamed(records) == logged(logger)
+    assert records[-1]["operation"] == {"operation": "traverse", "id": 9, "to": 0}
+
+
+def test_evicted_operations_are_streamed(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    logger = Logger(max_operations=16)
+    logger.add_sink(JsonLinesSink(path, batch_size=4))
+    make_list(logger, 100)
+    logger.close()
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    steps = [r["step"] for r in records if "step" in r]
+    assert steps == list(range(200))
+    assert len(logger.trace) <= 16
+
+
+def test_coalesced_operations_are_streamed_before_eviction():
+    # Every operation is evicted as soon as it is logged, before the next one
+    # could extend it into a traversal
+    logger = Logger(policy=RECORD_TRAVERSALS, max_operations=1, eviction=SPILL)
+    sink = ListSink(flush_interval=None)
+    logger.add_sink(sink)
+    make_list(logger, 5)
+    logger.flush()
+
+    [records] = sink.batches
+    assert [r["step"] for r in records if "step" in r] == list(range(logger.logged))
+    assert streamed(records) == logged(logger)
+
+
+def test_queue_sink():
+    q = queue.Queue(maxsize=2)
+    logger = Logger()
+    logger.add_sink(QueueSink(q, batch_size=5))
+    received = []
+
+    def consume():
+        while True:
+            batch = q.get()
+            if batch is None:
+                return
+            received.extend(batch)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    make_list(logger, 50)
+    logger.close()
+    q.put(None)
+    consumer.join()
+    assert streamed(received) == logged(logger)
+
+
+def test_asyncio_queue_sink():
+    async def main():
+        q = asyncio.Queue()
+        logger = Logger()
+        logger.add_sink(QueueSink(q))
+        make_list(logger, 3)
+        logger.close()
+        return [record for _ in range(q.qsize()) for record in q.get_nowait()]
+
+    records = asyncio.run(main())
+    assert [r["step"] for r in records if "step" in r] == list(range(6))
+
+
+def test_full_asyncio_queue_drops_batches():
+    async def main():
+        q = asyncio.Queue(maxsize=2)
+        logger = Logger()
+        sink = QueueSink(q)
+        logger.add_sink(sink)
+        make_list(logger, 3)
+        logger.close()
+        return q.qsize(), sink.dropped
+
+    size, dropped = asyncio.run(main())
+    assert size == 2
+    # Two snippets and six operations, one record per batch
+    assert dropped == 6
+
+
+def test_asyncio_queue_sink_in_another_thread():
+    loop = asyncio.new_event_loop()
+    q = None
+    received = []
+
+    async def consume():
+        nonlocal q
+        q = asyncio.Queue(maxsize=1)
+        ready.set()
+        while True:
+            batch = await q.get()
+            if batch is None:
+                return
+            received.extend(batch)
+
+    ready = threading.Event()
+    consumer = threading.Thread(target=lambda: loop.run_until_complete(consume()))
+    consumer.start()
+    ready.wait()
+    logger = Logger()
+    logger.add_sink(QueueSink(q, batch_size=2, loop=loop))
+    make_list(logger, 20)
+    logger.close()
+    asyncio.run_coroutine_threadsafe(q.put(None), loop).result()
+    consumer.join()
+    loop.close()
+    assert streamed(received) == logged(logger)
+
+
+def test_sinks_must_write():
+    with pytest.raises(TypeError):
+        Sink()
+
+
+def test_socket_sink():
+    server = socket.create_server(("127.0.0.1", 0))
+    data = []
+
+    def receive():
+        connection, _ = server.accept()
+        with connection:
+            while True:
+                chunk = connection.recv(65536)
+                if not chunk:
+                    return
+                data.append(chunk)
+
+    receiver = threading.Thread(target=receive)
+    receiver.start()
+    logger = Logger()
+    logger.add_sink(SocketSink(server.getsockname(), batch_size=7))
+    make_list(logger, 20)
+    logger.close()
+    receiver.join()
+    server.close()
+
+    records = [json.loads(line) for line in b"".join(data).decode().splitlines()]
+    assert streamed(records) == logged(logger)
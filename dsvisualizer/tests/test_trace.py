@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jose Romero.
+# Distributed under the terms of the Modified BSD License.
+
+import pytest
+
+from dsvisualizer.operations import Metadata, Operation
+from dsvisualizer.trace import OperationsView, Trace
+from dsvisualizer.traits import GetNext, GetValue, Init, SetNext, SetValue
+
+
+OPERATIONS = [
+    Init(0, "10", None),
+    Init(1, "11", 0),
+    GetValue(1),
+    SetValue(1, "10"),
+    GetNext(1),
+    SetNext(1, None),
+    SetNext(0, 1),
+]
+
+
+def test_trace_round_trip():
+    trace = Trace()
+    for i, op in enumerate(OPERATIONS):
+        trace.append(op, i % 2)
+
+    assert len(trace) == len(OPERATIONS)
+    assert [trace.operation(i) for i in range(len(trace))] == OPERATIONS
+    assert [trace.location(i) for i in range(len(trace))] == [
+        i % 2 for i in range(len(OPERATIONS))
+    ]
+    # Values and locations are interned
+    assert trace.strings == ["10", "11"]
+    assert trace.locations == [0, 1]
+
+
+def test_operations_view():
+    trace = Trace()
+    for op in OPERATIONS:
+        trace.append(op, "location")
+
+    view = OperationsView(trace, lambda i: [f"source {i}"], animate_from=2)
+    expected = [
+        Operation(op, Metadata(animate=i >= 2, source=["source 0"]))
+        for i, op in enumerate(OPERATIONS)
+    ]
+    assert view == expected
+    assert view[-1] == expected[-1]
+    assert view[1:3] == expected[1:3]
+
+    # The view does not grow with the trace
+    trace.append(GetValue(0), "location")
+    assert len(view) == len(OPERATIONS)
+    with pytest.raises(IndexError):
+        view[len(OPERATIONS)]
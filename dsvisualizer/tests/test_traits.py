@@ -4,9 +4,13 @@
 # Copyright (c) Jose Romero.
 # Distributed under the terms of the Modified BSD License.
 
+import json
+from dataclasses import asdict
+
 import pytest
 
 from dsvisualizer.operations import Operation, Operations
+from dsvisualizer.trace import OperationsView, Trace
 
 from dsvisualizer.traits import (
     GetValue,
@@ -16,6 +20,7 @@ from dsvisualizer.traits import (
     SetNext,
     deserialize_operations,
     serialize_operations,
+    serialize_operations_binary,
     Metadata,
 )
 
@@ -36,7 +41,8 @@ def test_serialization_and_deserialization():
             Operation(SetValue(2, 13), Metadata(animate=True, source="n3.value = 13")),
             Operation(GetNext(2), Metadata(animate=True, source="next = n3.next")),
             Operation(SetNext(2, 1), Metadata(animate=False, source="n3.next = n2")),
-        ]
+        ],
+        deaths=[(6, 0)],
     )
     serialized = serialize_operations(operations)
     deserialized = deserialize_operations(serialized)
@@ -66,3 +72,101 @@ def test_serialization_of_custom_classes():
     deserialized = deserialize_operations(serialized)
     assert operations == deserialized
     assert serialized == serialize_operations(deserialized)
+
+
+def make_operations(n):
+    operations = []
+    for i in range(n):
+        source = [f"line {i % 5}\n"]
+        operations += [
+            Operation(Init(i, str(i), i - 1 if i else None), Metadata(True, source)),
+            Operation(GetValue(i), Metadata(True, source)),
+            Operation(SetValue(i, str(-i)), Metadata(False, source)),
+            Operation(GetNext(i), Metadata(False, source)),
+            Operation(SetNext(i, None), Metadata(True, source)),
+        ]
+    return Operations(operations=operations)
+
+
+def make_trace_operations(n, animate_from):
+    trace = Trace()
+    for op in make_operations(n).operations:
+        trace.append(op.operation, op.metadata.source[0])
+    return Operations(
+        operations=OperationsView(trace, lambda i: i, animate_from=animate_from),
+        snippets=[[location] for location in trace.locations],
+    )
+
+
+def resolved(operations):
+    return [
+        (op.operation, op.metadata.animate, operations.source(op))
+        for op in operations.operations
+    ]
+
+
+def test_serialization_matches_asdict():
+    operations = make_operations(100)
+    assert json.dumps(serialize_operations(operations)) == json.dumps(
+        asdict(operations)
+    )
+
+
+def test_serialization_of_trace():
+    operations = make_trace_operations(100, animate_from=0)
+    serialized = serialize_operations(operations)
+    assert serialized["snippets"] == [[f"line {i}\n"] for i in range(5)]
+    assert serialized == serialize_operations(
+        Operations(list(operations.operations), snippets=operations.snippets)
+    )
+    deserialized = deserialize_operations(serialized)
+    assert [(op, source) for op, _, source in resolved(deserialized)] == [
+        (op, source) for op, _, source in resolved(make_operations(100))
+    ]
+
+
+def test_round_trip():
+    operations = make_operations(2000)
+    deserialized = deserialize_operations(serialize_operations(operations))
+    assert deserialized == operations
+
+
+def test_binary_serialization():
+    operations = make_operations(100)
+    serialized = serialize_operations_binary(operations)
+    assert serialized["format"] == "binary"
+    assert serialized["opcodes"].nbytes == len(operations.operations)
+    assert serialized["ids"].nbytes == 4 * len(operations.operations)
+
+    # Sources given as lines are added to the snippet table
+    assert serialized["snippets"] == [[f"line {i}\n"] for i in range(5)]
+
+    # Buffers arrive as bytes from the frontend
+    for key in ["opcodes", "ids", "nexts", "values", "sources", "animate"]:
+        serialized[key] = serialized[key].tobytes()
+    assert resolved(deserialize_operations(serialized)) == resolved(operations)
+
+
+def test_binary_serialization_after_sent_strings():
+    operations = make_operations(10)
+    serialized = serialize_operations_binary(operations, strings_from=3)
+    strings = [None] * 3 + serialized["strings"]
+    values = serialized["values"]
+    assert [strings[values[i]] for i in range(0, 50, 5)] == [
+        str(i) for i in range(10)
+    ]
+    with pytest.raises(ValueError):
+        deserialize_operations(serialized)
+
+    trace_operations = make_trace_operations(10, animate_from=0)
+    serialized = serialize_operations_binary(trace_operations, strings_from=3)
+    assert serialized["strings"] == trace_operations.operations.trace.strings[3:]
+
+
+def test_binary_serialization_of_trace():
+    operations = make_trace_operations(100, animate_from=10)
+    serialized = serialize_operations_binary(operations)
+    assert serialized["snippets"] == [[f"line {i}\n"] for i in range(5)]
+    assert deserialize_operations(serialized) == Operations(
+        list(operations.operations), snippets=operations.snippets
+    )
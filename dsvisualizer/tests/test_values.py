@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jose Romero.
+# Distributed under the terms of the Modified BSD License.
+
+import pytest
+
+from dsvisualizer.trace import Trace
+from dsvisualizer.values import ValueFormat
+
+
+class Array:
+    """Stands in for a NumPy array."""
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.size = 1
+        for n in shape:
+            self.size *= n
+        self.dtype = "float64"
+
+    def __str__(self):
+        raise AssertionError("large arrays are not rendered")
+
+
+def test_format():
+    fmt = ValueFormat(max_length=10)
+    assert fmt.format(12) == "12"
+    assert fmt.format("a" * 20) == "a" * 9 + "…"
+    assert ValueFormat().format(list(range(100))).endswith("...]")
+    assert ValueFormat().format(Array((100, 3))) == (
+        "Array(shape=(100, 3), dtype=float64)"
+    )
+    assert ValueFormat(max_length=1).format("abc") == "…"
+    with pytest.raises(ValueError):
+        ValueFormat(max_length=0)
+
+
+def test_immutable_values_are_rendered_lazily():
+    rendered = []
+
+    class Format(ValueFormat):
+        def format(self, value):
+            rendered.append(value)
+            return super().format(value)
+
+    trace = Trace(Format())
+    indices = [trace.intern_value(v) for v in [1, 1, 1.0, True, None, [1]]]
+    assert rendered == [[1]]
+    assert indices[0] == indices[1]
+    assert len(set(indices)) == 5
+
+    assert [trace.strings[i] for i in indices] == [
+        "1",
+        "1",
+        "1.0",
+        "True",
+        "None",
+        "[1]",
+    ]
+    assert rendered == [[1], 1, 1.0, True, None]
@@ -0,0 +1,277 @@
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from dsvisualizer.operations import (
+    GetNext,
+    GetValue,
+    Init,
+    LinkedListOperation,
+    Metadata,
+    Operation,
+    SetNext,
+    SetValue,
+    Traverse,
+)
+from dsvisualizer.values import IMMUTABLE_TYPES, ValueFormat
+
+INIT = 0
+SET_VALUE = 1
+GET_VALUE = 2
+SET_NEXT = 3
+GET_NEXT = 4
+# Stores the last node of the traversal in the `nexts` column
+TRAVERSE = 5
+
+OPCODES = {
+    Init: INIT,
+    SetValue: SET_VALUE,
+    GetValue: GET_VALUE,
+    SetNext: SET_NEXT,
+    GetNext: GET_NEXT,
+    Traverse: TRAVERSE,
+}
+
+# Used in the `nexts` and `values` columns when the operation has no such
+# field, and in `nexts` for a `None` next pointer.
+NONE = -1
+
+
+class Trace:
+    """
+    Struct-of-arrays storage for logged operations. Each operation takes one
+    entry in every column: the opcode, the node id, the next node id, the
+    index of the value in the string table and the index of the source
+    location in the source table.
+
+    Values that aren't strings are rendered with `value_format`, or `str` if
+    it is `None`.
+    """
+
+    def __init__(self, value_format: Optional[ValueFormat] = None):
+        self.opcodes = array("b")
+        self.ids = array("q")
+        self.nexts = array("q")
+        self.values = array("l")
+        self.sources = array("l")
+        self.value_format = value_format
+        self._strings: List[str] = []
+        self.locations: List[Hashable] = []
+        self._string_index: Dict[Hashable, int] = {}
+        self._location_index: Dict[Hashable, int] = {}
+        # Values in the string table that haven't been rendered yet, with
+        # their index
+        self._unrendered: List[Tuple[int, Any]] = []
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    @property
+    def strings(self) -> List[str]:
+        """The string table. Pending values are rendered first."""
+        if self._unrendered:
+            for index, value in self._unrendered:
+                self._strings[index] = self._render(value)
+            self._unrendered.clear()
+        return self._strings
+
+    @strings.setter
+    def strings(self, strings: List[str]):
+        self._strings = strings
+        self._unrendered = []
+
+    def _render(self, value: Any) -> str:
+        if self.value_format is None:
+            return str(value)
+        return self.value_format.format(value)
+
+    def intern_string(self, value: str) -> int:
+        index = self._string_index.get(value)
+        if index is None:
+            index = len(self._strings)
+            self._string_index[value] = index
+            self._strings.append(value)
+        return index
+
+    def intern_value(self, value: Any) -> int:
+        """
+        Index in the string table of the rendered value. Values of immutable
+        types are rendered when the table is read, once per distinct value.
+        Other values are rendered now, so later changes to them don't show.
+        """
+        kind = type(value)
+        if kind is str:
+            if self.value_format is not None:
+                value = self.value_format.truncate(value)
+            return self.intern_string(value)
+        if kind not in IMMUTABLE_TYPES:
+            return self.intern_string(self._render(value))
+        # Keyed by type so that 1, 1.0 and True are rendered separately
+        key = (kind, value)
+        index = self._string_index.get(key)
+        if index is None:
+            index = len(self._strings)
+            self._string_index[key] = index
+            self._strings.append("")
+            self._unrendered.append((index, value))
+        return index
+
+    def intern_location(self, location: Hashable) -> int:
+        index = self._location_index.get(location)
+        if index is None:
+            index = len(self.locations)
+            self._location_index[location] = index
+            self.locations.append(location)
+        return index
+
+    def append(self, op: LinkedListOperation, location: Hashable):
+        opcode = OPCODES[type(op)]
+        if opcode == INIT or opcode == SET_NEXT:
+            next = op.next
+        elif opcode == TRAVERSE:
+            next = op.to
+        else:
+            next = None
+        if opcode == INIT or opcode == SET_VALUE:
+            value = self.intern_value(op.value)
+        else:
+            value = NONE
+        self.record(opcode, op.id, next, value, location)
+
+    def record(
+        self,
+        opcode: int,
+        id: int,
+        next: Optional[int],
+        value: int,
+        location: Hashable,
+    ):
+        """
+        Appends an operation given by its fields. `next` is the next node id,
+        or the last node of a traversal, and is `None` when the operation has
+        none. `value` is the index of the value in the string table, or
+        `NONE`.
+        """
+        self.opcodes.append(opcode)
+        self.ids.append(id)
+        self.nexts.append(NONE if next is None else next)
+        self.values.append(value)
+        self.sources.append(self.intern_location(location))
+
+    def traversed(self) -> Optional[int]:
+        """
+        If the last operation is a `GetNext` or a `Traverse`, returns the id
+        of the last node it visited.
+        """
+        if not self.opcodes:
+            return None
+        opcode = self.opcodes[-1]
+        if opcode == GET_NEXT:
+            return self.ids[-1]
+        elif opcode == TRAVERSE:
+            return self.nexts[-1]
+        return None
+
+    def traverse_to(self, id: int):
+        """Extends the last operation into a `Traverse` that ends at `id`."""
+        self.opcodes[-1] = TRAVERSE
+        self.nexts[-1] = id
+
+    def slice(self, start: int, stop: int) -> "Trace":
+        """Copies the columns between `start` and `stop`. The tables are shared."""
+        trace = Trace(self.value_format)
+        trace.opcodes = self.opcodes[start:stop]
+        trace.ids = self.ids[start:stop]
+        trace.nexts = self.nexts[start:stop]
+        trace.values = self.values[start:stop]
+        trace.sources = self.sources[start:stop]
+        trace._strings = self._strings
+        trace._unrendered = self._unrendered
+        trace.locations = self.locations
+        trace._string_index = self._string_index
+        trace._location_index = self._location_index
+        return trace
+
+    def extend(self, trace: "Trace"):
+        """Appends the columns of a trace that shares the tables of this one."""
+        self.opcodes.extend(trace.opcodes)
+        self.ids.extend(trace.ids)
+        self.nexts.extend(trace.nexts)
+        self.values.extend(trace.values)
+        self.sources.extend(trace.sources)
+
+    def operation(self, i: int) -> LinkedListOperation:
+        """Builds the operation dataclass for the `i`-th entry."""
+        opcode = self.opcodes[i]
+        id = self.ids[i]
+        if opcode == INIT:
+            return Init(id, self.strings[self.values[i]], self._next(i))
+        elif opcode == SET_VALUE:
+            return SetValue(id, self.strings[self.values[i]])
+        elif opcode == GET_VALUE:
+            return GetValue(id)
+        elif opcode == SET_NEXT:
+            return SetNext(id, self._next(i))
+        elif opcode == GET_NEXT:
+            return GetNext(id)
+        elif opcode == TRAVERSE:
+            return Traverse(id, self.nexts[i])
+
+    def location(self, i: int) -> Hashable:
+        return self.locations[self.sources[i]]
+
+    def _next(self, i: int) -> Union[int, None]:
+        next = self.nexts[i]
+        return None if next == NONE else next
+
+
+class OperationsView(Sequence):
+    """
+    Read-only list of `Operation` built on demand from the operations of a
+    `Trace` between `start` and `stop`. `source` formats the source table
+    entry with the given index. Operations at `animate_from` or later in the
+    trace are animated.
+    """
+
+    def __init__(
+        self,
+        trace: Trace,
+        source: Callable[[int], List[str]],
+        animate_from: int = 0,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ):
+        self.trace = trace
+        self.source = source
+        self.animate_from = animate_from
+        self.start = start
+        self._length = (len(trace) if stop is None else stop) - start
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._length))]
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("operation index out of range")
+        i += self.start
+        return Operation(
+            operation=self.trace.operation(i),
+            metadata=Metadata(
+                animate=i >= self.animate_from,
+                source=self.source(self.trace.sources[i]),
+            ),
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, (list, OperationsView)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    def __repr__(self):
+        return f"OperationsView({list(self)!r})"
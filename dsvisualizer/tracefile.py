@@ -0,0 +1,140 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from dsvisualizer.trace import Trace
+
+MAGIC = b"DSVTRACE"
+VERSION = 1
+# Magic, version, number of operations and offset of the tables
+HEADER = struct.Struct("<8sQQQ")
+
+# Typecode of each column in the file. Each column holds one fixed-width
+# little-endian entry per operation and starts at a multiple of 8 bytes.
+COLUMNS = [
+    ("opcodes", "b"),
+    ("ids", "q"),
+    ("nexts", "q"),
+    ("values", "q"),
+    ("sources", "q"),
+]
+
+
+class TraceFile(NamedTuple):
+    """
+    Contents of a trace file. The `sources` column of the trace holds
+    indices into `snippets`. `evicted` operations were dropped before the
+    trace, and `base` is the state of the nodes before its first operation.
+    `mapping` is the memory map of a loaded file, released by `close`.
+    """
+
+    trace: Trace
+    snippets: List[List[str]]
+    evicted: int
+    base: Tuple[Dict[int, int], Dict[int, int]]
+    mapping: Optional[mmap.mmap] = None
+
+    def close(self):
+        """Unmaps a loaded file. The columns of its trace can't be read after."""
+        if self.mapping is None:
+            return
+        for name, _ in COLUMNS:
+            column = getattr(self.trace, name)
+            if isinstance(column, memoryview):
+                column.release()
+        self.mapping.close()
+
+
+def _padding(size: int) -> bytes:
+    return bytes(-size % 8)
+
+
+def _column_bytes(typecode: str, column) -> bytes:
+    if sys.byteorder == "big" or getattr(column, "typecode", None) != typecode:
+        column = array(typecode, column)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def save_trace(path: str, contents: TraceFile):
+    """
+    Writes the trace to `path`: a header, the columns of the trace and the
+    string and snippet tables as JSON.
+    """
+    trace = contents.trace
+    length = len(trace)
+    with open(path, "wb") as f:
+        f.write(bytes(HEADER.size))
+        for name, typecode in COLUMNS:
+            data = _column_bytes(typecode, getattr(trace, name))
+            f.write(data + _padding(len(data)))
+        tables_offset = f.tell()
+        values, nexts = contents.base
+        tables = {
+            "strings": trace.strings,
+            "snippets": contents.snippets,
+            "evicted": contents.evicted,
+            "base": [
+                [id, values.get(id), nexts.get(id)]
+                for id in dict.fromkeys([*values, *nexts])
+            ],
+        }
+        f.write(json.dumps(tables).encode())
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, length, tables_offset))
+
+
+def _mapped_column(buffer: memoryview, typecode: str, offset: int, length: int):
+    """Returns the column at `offset` and the offset of the next one."""
+    size = length * struct.calcsize(typecode)
+    data = buffer[offset : offset + size]
+    next_offset = offset + size + len(_padding(size))
+    if sys.byteorder == "little":
+        return data.cast(typecode), next_offset
+    column = array(typecode)
+    column.frombytes(data)
+    column.byteswap()
+    return column, next_offset
+
+
+def load_trace(path: str) -> TraceFile:
+    """
+    Memory-maps the trace file at `path`. The columns of the trace are views
+    of the file, so they are only read when the operations are accessed,
+    and the trace can't be appended to.
+    """
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, length, tables_offset = HEADER.unpack_from(mapping)
+    if magic != MAGIC:
+        mapping.close()
+        raise ValueError(f"{path} is not a trace file")
+    if version != VERSION:
+        mapping.close()
+        raise ValueError(f"Unsupported trace file version {version}")
+
+    trace = Trace()
+    offset = HEADER.size
+    # Released once the columns are sliced, so they are the only views left
+    with memoryview(mapping) as buffer:
+        for name, typecode in COLUMNS:
+            column, offset = _mapped_column(buffer, typecode, offset, length)
+            setattr(trace, name, column)
+
+    tables: Dict[str, Any] = json.loads(mapping[tables_offset:])
+    trace.strings = tables["strings"]
+    snippets = tables["snippets"]
+    # Each source location is the index of its snippet
+    trace.locations = list(range(len(snippets)))
+    base: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+    # The fields of a node that weren't recorded are null
+    for id, value, next in tables["base"]:
+        if value is not None:
+            base[0][id] = value
+        if next is not None:
+            base[1][id] = next
+    return TraceFile(trace, snippets, tables["evicted"], base, mapping)
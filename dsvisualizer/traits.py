@@ -1,5 +1,7 @@
-from traitlets import TraitType
-from typing import Any, Dict
+import sys
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Tuple
 from dataclasses import asdict
 from dsvisualizer.operations import (
     Init,
@@ -11,47 +13,287 @@ from dsvisualizer.operations import (
     SetValue,
     GetNext,
     SetNext,
+    Traverse,
     LinkedListOperation,
 )
+from dsvisualizer.trace import (
+    GET_NEXT,
+    GET_VALUE,
+    INIT,
+    NONE,
+    SET_NEXT,
+    SET_VALUE,
+    TRAVERSE,
+    OperationsView,
+    Trace,
+)
+
+BINARY_FORMAT = "binary"
+# Keys of the binary format that are sent as buffers
+BINARY_COLUMNS = ["opcodes", "ids", "nexts", "values", "sources", "animate"]
+
+# Encoders and decoders for each kind of operation. The encoders produce the
+# same dictionaries as `dataclasses.asdict`, with the keys in the same order.
+OP_ENCODERS: Dict[type, Callable[[Any], Dict[str, Any]]] = {
+    Init: lambda op: {
+        "operation": "init",
+        "id": op.id,
+        "value": op.value,
+        "next": op.next,
+    },
+    SetValue: lambda op: {"operation": "set_value", "id": op.id, "value": op.value},
+    GetValue: lambda op: {"operation": "get_value", "id": op.id},
+    SetNext: lambda op: {"operation": "set_next", "id": op.id, "next": op.next},
+    GetNext: lambda op: {"operation": "get_next", "id": op.id},
+    Traverse: lambda op: {"operation": "traverse", "id": op.id, "to": op.to},
+}
+
+OP_DECODERS: Dict[str, Callable[[Dict[str, Any]], LinkedListOperation]] = {
+    "init": lambda obj: Init(id=obj["id"], value=obj["value"], next=obj["next"]),
+    "set_value": lambda obj: SetValue(id=obj["id"], value=obj["value"]),
+    "get_value": lambda obj: GetValue(id=obj["id"]),
+    "set_next": lambda obj: SetNext(id=obj["id"], next=obj["next"]),
+    "get_next": lambda obj: GetNext(id=obj["id"]),
+    "traverse": lambda obj: Traverse(id=obj["id"], to=obj["to"]),
+}
+
+# Encoders that read the operations straight from the columns of a trace.
+# They take the node id, the next id and the value.
+TRACE_ENCODERS: Dict[int, Callable[[int, Any, str], Dict[str, Any]]] = {
+    INIT: lambda id, next, value: {
+        "operation": "init",
+        "id": id,
+        "value": value,
+        "next": next,
+    },
+    SET_VALUE: lambda id, next, value: {
+        "operation": "set_value",
+        "id": id,
+        "value": value,
+    },
+    GET_VALUE: lambda id, next, value: {"operation": "get_value", "id": id},
+    SET_NEXT: lambda id, next, value: {"operation": "set_next", "id": id, "next": next},
+    GET_NEXT: lambda id, next, value: {"operation": "get_next", "id": id},
+    TRAVERSE: lambda id, next, value: {"operation": "traverse", "id": id, "to": next},
+}
 
 
 def serialize_op(obj: Dict[str, Any]) -> LinkedListOperation:
-    operation = obj["operation"]
-    if operation == "init":
-        return Init(id=obj["id"], value=obj["value"], next=obj["next"])
-    elif operation == "get_value":
-        return GetValue(id=obj["id"])
-    elif operation == "set_value":
-        return SetValue(id=obj["id"], value=obj["value"])
-    elif operation == "get_next":
-        return GetNext(id=obj["id"])
-    elif operation == "set_next":
-        return SetNext(id=obj["id"], next=obj["next"])
+    return OP_DECODERS[obj["operation"]](obj)
 
 
 def deserialize_operation(obj: Dict[str, Any]) -> Operation:
+    metadata = obj["metadata"]
     return Operation(
-        operation=serialize_op(obj["operation"]), metadata=Metadata(**obj["metadata"])
+        operation=OP_DECODERS[obj["operation"]["operation"]](obj["operation"]),
+        metadata=Metadata(animate=metadata["animate"], source=metadata["source"]),
     )
 
 
-class OperationTrait(TraitType):
-    klass = list
-    default_value = Operations()
+def serialize_operation(op: Operation) -> Dict[str, Any]:
+    return {
+        "operation": OP_ENCODERS[type(op.operation)](op.operation),
+        "metadata": {"animate": op.metadata.animate, "source": op.metadata.source},
+    }
+
+
+def serialize_view(view: OperationsView) -> List[Dict[str, Any]]:
+    """Serializes the operations of a view without building the dataclasses."""
+    trace = view.trace
+    opcodes, ids, nexts, values = trace.opcodes, trace.ids, trace.nexts, trace.values
+    sources, strings = trace.sources, trace.strings
+    source = view.source
+    animate_from = view.animate_from
+    serialized = []
+    for i in range(view.start, view.start + len(view)):
+        next = nexts[i]
+        value = values[i]
+        serialized.append(
+            {
+                "operation": TRACE_ENCODERS[opcodes[i]](
+                    ids[i],
+                    None if next == NONE else next,
+                    None if value == NONE else strings[value],
+                ),
+                "metadata": {
+                    "animate": i >= animate_from,
+                    "source": source(sources[i]),
+                },
+            }
+        )
+    return serialized
 
 
 def serialize_operations(ops: Operations) -> Dict[str, Any]:
-    return asdict(ops)
+    if isinstance(ops.operations, OperationsView):
+        operations = serialize_view(ops.operations)
+    else:
+        operations = [serialize_operation(op) for op in ops.operations]
+    return {
+        "operations": operations,
+        "metadata": asdict(ops.metadata),
+        "snippets": ops.snippets,
+        "initial": [OP_ENCODERS[Init](op) for op in ops.initial],
+        "deaths": [list(death) for death in ops.deaths],
+    }
+
+
+def _as_trace(ops: Operations) -> Tuple[Trace, array, List[Any], array]:
+    """
+    Returns the trace of the operations, the index in the snippet table of
+    the source of each operation, the snippet table and the animate flag of
+    each operation.
+    """
+    view = ops.operations
+    if isinstance(view, OperationsView):
+        start, stop = view.start, view.start + len(view)
+        trace = view.trace.slice(start, stop)
+        sources = array("l", map(view.source, trace.sources))
+        animate_from = min(max(view.animate_from, start), stop)
+        animate = array("b", bytes(animate_from - start))
+        animate.frombytes(b"\x01" * (stop - animate_from))
+        return trace, sources, ops.snippets, animate
+
+    trace = Trace()
+    sources = array("l")
+    snippets = list(ops.snippets)
+    # Sources given as lines are added to the table. Lists can't be
+    # interned, so they are keyed by tuples.
+    snippet_index: Dict[Any, int] = {}
+    animate = array("b")
+    for op in view:
+        trace.append(op.operation, None)
+        source = op.metadata.source
+        if not isinstance(source, int):
+            key = tuple(source) if isinstance(source, list) else source
+            index = snippet_index.get(key)
+            if index is None:
+                index = len(snippets)
+                snippet_index[key] = index
+                snippets.append(source)
+            source = index
+        sources.append(source)
+        animate.append(op.metadata.animate)
+    return trace, sources, snippets, animate
+
+
+def _packed(typecode: str, values) -> memoryview:
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return memoryview(column)
+
+
+def _unpacked(typecode: str, buffer) -> array:
+    column = array(typecode)
+    column.frombytes(memoryview(buffer).cast("B"))
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def serialize_operations_binary(
+    ops: Operations, strings_from: int = 0
+) -> Dict[str, Any]:
+    """
+    Serializes the operations into packed little-endian columns that are sent
+    as binary buffers. Values and sources are indices into the `strings` and
+    `snippets` tables. Sources given as lines are added to the snippet table.
+    Missing values and `None` next pointers are -1.
+
+    `strings_from` is the number of strings the receiver already has, from
+    earlier operations of the same trace. Only the strings after them are
+    sent, and they go at `strings_from` in the receiver's table.
+    """
+    trace, sources, snippets, animate = _as_trace(ops)
+    values = trace.values
+    if isinstance(ops.operations, OperationsView):
+        strings = trace.strings[strings_from:]
+    else:
+        # The operations have a table of their own, which goes after the
+        # strings the receiver has
+        strings = trace.strings
+        if strings_from:
+            values = [NONE if v == NONE else v + strings_from for v in values]
+    return {
+        "format": BINARY_FORMAT,
+        "length": len(trace),
+        "opcodes": _packed("b", trace.opcodes),
+        "ids": _packed("i", trace.ids),
+        "nexts": _packed("i", trace.nexts),
+        "values": _packed("i", values),
+        "sources": _packed("i", sources),
+        "animate": _packed("b", animate),
+        "strings": strings,
+        "strings_from": strings_from,
+        "snippets": snippets,
+        "metadata": asdict(ops.metadata),
+        "initial": [OP_ENCODERS[Init](op) for op in ops.initial],
+        "deaths": [list(death) for death in ops.deaths],
+    }
+
+
+def deserialize_operations_binary(obj: Dict[str, Any]) -> Operations:
+    # The strings sent with earlier operations aren't known here
+    if obj.get("strings_from", 0):
+        raise ValueError("operations use strings that were sent earlier")
+    trace = Trace()
+    trace.opcodes = _unpacked("b", obj["opcodes"])
+    trace.ids = array("q", _unpacked("i", obj["ids"]))
+    trace.nexts = array("q", _unpacked("i", obj["nexts"]))
+    trace.values = array("l", _unpacked("i", obj["values"]))
+    trace.strings = list(obj["strings"])
+    sources = _unpacked("i", obj["sources"])
+    animate = _unpacked("b", obj["animate"])
+    return Operations(
+        operations=[
+            Operation(
+                operation=trace.operation(i),
+                metadata=Metadata(animate=bool(animate[i]), source=sources[i]),
+            )
+            for i in range(obj["length"])
+        ],
+        metadata=VisualizationMetadata(**obj["metadata"]),
+        snippets=obj["snippets"],
+        initial=[OP_DECODERS["init"](op) for op in obj.get("initial", [])],
+        deaths=[tuple(death) for death in obj.get("deaths", [])],
+    )
 
 
 def deserialize_operations(obj: Dict[str, Any]) -> Operations:
+    if obj.get("format") == BINARY_FORMAT:
+        return deserialize_operations_binary(obj)
     return Operations(
         operations=[deserialize_operation(op) for op in obj["operations"]],
         metadata=VisualizationMetadata(**obj["metadata"]),
+        snippets=obj.get("snippets", []),
+        initial=[OP_DECODERS["init"](op) for op in obj.get("initial", [])],
+        deaths=[tuple(death) for death in obj.get("deaths", [])],
     )
 
 
+def operations_to_json(ops: Operations, widget) -> Dict[str, Any]:
+    """Serializes the operations of a widget in the format it uses."""
+    start = time.perf_counter()
+    if widget.binary:
+        state = serialize_operations_binary(ops)
+        widget._strings_sent = max(widget._strings_sent, len(state["strings"]))
+    else:
+        state = serialize_operations(ops)
+    widget.serialization_seconds += time.perf_counter() - start
+    return state
+
+
+def __getattr__(name: str):
+    # The trait needs traitlets, which is only imported with the widget
+    if name == "OperationTrait":
+        from dsvisualizer.widget import OperationTrait
+
+        return OperationTrait
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 operation_serialization = {
     "from_json": lambda obj, _: deserialize_operations(obj),
-    "to_json": lambda op, _: serialize_operations(op),
+    "to_json": operations_to_json,
 }
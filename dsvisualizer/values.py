@@ -0,0 +1,59 @@
+import reprlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Values of these types can't change, so they are rendered when the trace is
+# read instead of when they are logged
+IMMUTABLE_TYPES = frozenset({int, float, complex, bool, bytes, type(None)})
+
+# Renders the built-in containers without visiting all of their items
+_containers = reprlib.Repr()
+_containers.maxlevel = 3
+_containers.maxlist = _containers.maxtuple = 10
+_containers.maxset = _containers.maxfrozenset = _containers.maxdeque = 10
+_containers.maxdict = 6
+_containers.maxstring = _containers.maxother = 40
+
+CONTAINER_TYPES = (list, tuple, dict, set, frozenset)
+
+
+@dataclass(frozen=True)
+class ValueFormat:
+    """
+    How the values of the nodes are shown.
+
+    `max_length`: Longer values are truncated, to at least one character.
+    `None` keeps the whole value.
+
+    `max_array_size`: Arrays, objects with a `shape` and a `dtype` like NumPy
+    arrays, with more items are shown as their type, shape and dtype.
+    """
+
+    max_length: Optional[int] = 80
+    max_array_size: int = 16
+
+    def __post_init__(self):
+        if self.max_length is not None and self.max_length < 1:
+            raise ValueError(f"max_length must be at least 1, got {self.max_length}")
+
+    def format(self, value: Any) -> str:
+        if isinstance(value, CONTAINER_TYPES):
+            text = _containers.repr(value)
+        else:
+            shape = getattr(value, "shape", None)
+            size = getattr(value, "size", None)
+            if (
+                isinstance(shape, tuple)
+                and isinstance(size, int)
+                and size > self.max_array_size
+                and hasattr(value, "dtype")
+            ):
+                text = f"{type(value).__name__}(shape={shape}, dtype={value.dtype})"
+            else:
+                text = str(value)
+        return self.truncate(text)
+
+    def truncate(self, text: str) -> str:
+        if self.max_length is not None and len(text) > self.max_length:
+            return text[: self.max_length - 1] + "…"
+        return text
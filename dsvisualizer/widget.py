@@ -8,13 +8,26 @@
 TODO: Add module docstring
 """
 
+import time
+
 from ipywidgets import DOMWidget
-from traitlets import Unicode, List
+from traitlets import Bool, TraitType, Unicode
 
-from dsvisualizer.traits import OperationTrait, operation_serialization, Init
+from dsvisualizer.operations import Operations
+from dsvisualizer.traits import (
+    BINARY_COLUMNS,
+    operation_serialization,
+    serialize_operations,
+    serialize_operations_binary,
+)
 from ._frontend import module_name, module_version
 
 
+class OperationTrait(TraitType):
+    klass = list
+    default_value = Operations()
+
+
 class OperationsWidget(DOMWidget):
     _model_name = Unicode("OperationsModel").tag(sync=True)
     _model_module = Unicode(module_name).tag(sync=True)
@@ -23,6 +36,42 @@ class OperationsWidget(DOMWidget):
     _view_module = Unicode(module_name).tag(sync=True)
     _view_module_version = Unicode(module_version).tag(sync=True)
 
+    # Send the operations as packed binary buffers instead of a JSON document.
+    # Must be set before the operations.
+    binary = Bool(False).tag(sync=True)
+
     operations = OperationTrait().tag(
         sync=True, **operation_serialization
     )
+
+    # Time spent serializing operations for the frontend, in seconds
+    serialization_seconds = 0.0
+
+    # Strings of the trace the frontend has. Appended binary operations only
+    # send the strings after them.
+    _strings_sent = 0
+
+    def append(self, operations: Operations):
+        """
+        Sends operations to the frontend, which appends them to the ones that
+        are displayed and animates them. The `operations` trait is not changed.
+        """
+        start = time.perf_counter()
+        if self.binary:
+            state = serialize_operations_binary(operations, self._strings_sent)
+            self._strings_sent += len(state["strings"])
+            buffers = [state.pop(key) for key in BINARY_COLUMNS]
+            content = {
+                "method": "append",
+                "operations": state,
+                "buffer_paths": BINARY_COLUMNS,
+            }
+            self.serialization_seconds += time.perf_counter() - start
+            self.send(content, buffers)
+        else:
+            content = {
+                "method": "append",
+                "operations": serialize_operations(operations),
+            }
+            self.serialization_seconds += time.perf_counter() - start
+            self.send(content)
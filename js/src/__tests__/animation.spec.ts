@@ -0,0 +1,187 @@
+// Copyright (c) Jose Romero
+// Distributed under the terms of the Modified BSD License.
+
+import { OperationsAnimation, Viz } from '../animation';
+import { CanvasViz } from '../canvas';
+import { BinaryOperations, Operation } from '../serializers';
+
+// Steps counted after building each list
+const STEPS = 500;
+
+// Builds a list of `length` nodes, then returns the number of changes to the
+// DOM in each step of pushing, setting the values of and appending to the
+// list.
+async function mutations_per_step(length: number): Promise<number[]> {
+  const element = document.createElement('div');
+  const viz = new Viz(element, {});
+  let head: number | null = null;
+  for (let id = 0; id < length; id++) {
+    viz.init({ operation: 'init', id, value: `${id}`, next: head });
+    await viz.display(false);
+    head = id;
+  }
+  let mutations = 0;
+  const observer = new MutationObserver(
+    (records) => (mutations += records.length)
+  );
+  observer.observe(element, {
+    attributes: true,
+    characterData: true,
+    childList: true,
+    subtree: true,
+  });
+  const tail = 0;
+  const counts: number[] = [];
+  for (let step = 0; step < STEPS; step++) {
+    const id = length + step;
+    if (step % 2 === 0) {
+      viz.init({ operation: 'init', id, value: `${id}`, next: head });
+      head = id;
+    } else {
+      viz.init({ operation: 'init', id, value: `${id}`, next: null });
+      await viz.display(false);
+      viz.set_next(step === 1 ? tail : id - 2, id);
+    }
+    await viz.display(false);
+    viz.set_value(head as number, `${step}`);
+    await viz.display(false);
+    counts.push(mutations + observer.takeRecords().length);
+    mutations = 0;
+  }
+  observer.disconnect();
+  return counts;
+}
+
+function inits(length: number, animate: boolean): Operation[] {
+  const operations: Operation[] = [];
+  for (let id = 0; id < length; id++) {
+    operations.push({
+      operation: { operation: 'init', id, value: `${id}`, next: null },
+      metadata: { animate, source: [`n${id} = Node(${id}, None)`] },
+    });
+  }
+  return operations;
+}
+
+describe('Viz', () => {
+  it('should draw each node once', async () => {
+    const element = document.createElement('div');
+    const viz = new Viz(element, {});
+    viz.init({ operation: 'init', id: 0, value: '0', next: null });
+    viz.init({ operation: 'init', id: 1, value: '1', next: 0 });
+    await viz.display(false);
+    viz.set_value(0, 'a');
+    await viz.display(false);
+    const texts = Array.from(element.querySelectorAll('.box text')).map(
+      (e) => e.textContent
+    );
+    expect(texts.sort()).toEqual(['1', 'a']);
+    expect(element.querySelectorAll('.row').length).toBe(1);
+  });
+
+  // The work of a step doesn't depend on the length of the list
+  it('should change the same elements per step on longer lists', async () => {
+    const short = await mutations_per_step(100);
+    const long = await mutations_per_step(4000);
+    expect(long).toEqual(short);
+  });
+
+  it('should switch to the canvas above the threshold', async () => {
+    const element = document.createElement('div');
+    const operations = inits(20, false);
+    const animation = new OperationsAnimation(element, {
+      canvas_threshold: 10,
+    });
+    await animation.append({ operations, metadata: {} });
+    expect(animation.renderer).toBeInstanceOf(CanvasViz);
+    expect(animation.renderer.layout.size).toBe(20);
+    expect(element.querySelector('svg')).toBeNull();
+    expect(element.querySelector('canvas')).not.toBeNull();
+  });
+});
+
+describe('OperationsAnimation', () => {
+  it('should not play while paused', async () => {
+    const element = document.createElement('div');
+    const animation = new OperationsAnimation(element, {});
+    animation.pause();
+    const done = animation.append({
+      operations: inits(10, false),
+      metadata: {},
+    });
+    await new Promise((resolve) => setTimeout(resolve, 50));
+    expect(animation.renderer.layout.size).toBe(0);
+    animation.play();
+    await done;
+    expect(animation.renderer.layout.size).toBe(10);
+  });
+
+  it('should jump to the end without animating', async () => {
+    const element = document.createElement('div');
+    const animation = new OperationsAnimation(element, {});
+    const done = animation.append({
+      operations: inits(1000, true),
+      metadata: {},
+    });
+    animation.jump_to_end();
+    await done;
+    expect(animation.renderer.layout.size).toBe(1000);
+    // Only the source of the last operation of each batch is shown
+    expect(element.querySelector('.source-code')?.textContent).toBe(
+      'n999 = Node(999, None)'
+    );
+  });
+
+  it('should remove the nodes that die', async () => {
+    const element = document.createElement('div');
+    const animation = new OperationsAnimation(element, {});
+    await animation.append({
+      operations: inits(10, false),
+      metadata: {},
+      deaths: [
+        [2, 0],
+        [9, 1],
+      ],
+    });
+    const layout = animation.renderer.layout;
+    expect(layout.size).toBe(8);
+    expect(layout.has(0) || layout.has(1)).toBe(false);
+    expect(element.querySelectorAll('.box').length).toBe(8);
+  });
+
+  it('should build the string table from the appended batches', async () => {
+    const element = document.createElement('div');
+    const animation = new OperationsAnimation(element, {});
+    const batch = (
+      values: number[],
+      strings: string[],
+      strings_from: number
+    ): BinaryOperations => ({
+      format: 'binary',
+      length: values.length,
+      opcodes: new Int8Array(values.length),
+      ids: new Int32Array(values.map((_, i) => strings_from + i)),
+      nexts: new Int32Array(values.length).fill(-1),
+      values: new Int32Array(values),
+      sources: new Int32Array(values.length),
+      animate: new Int8Array(values.length),
+      strings,
+      strings_from,
+      snippets: strings_from === 0 ? [['n = Node(v, None)']] : [],
+      metadata: {},
+    });
+    animation.append(batch([0], ['a'], 0));
+    await animation.append(batch([1, 0], ['b'], 1));
+    const layout = animation.renderer.layout;
+    expect([0, 1, 2].map((id) => layout.value(id))).toEqual(['a', 'b', 'a']);
+  });
+
+  it('should apply the speed to the renderer', () => {
+    const animation = new OperationsAnimation(
+      document.createElement('div'),
+      {}
+    );
+    animation.speed = 4;
+    expect(animation.renderer.speed).toBe(4);
+  });
+});
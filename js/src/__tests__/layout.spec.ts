@@ -0,0 +1,192 @@
+// Copyright (c) Jose Romero
+// Distributed under the terms of the Modified BSD License.
+
+import { Layout } from '../layout';
+
+// Rows of ids in display order, following the next pointers from each head
+function rows(layout: Layout): number[][] {
+  return layout.rows.map((row) => {
+    const ids = [row.head];
+    while (ids[ids.length - 1] !== row.tail) {
+      ids.push(layout.next(ids[ids.length - 1]) as number);
+    }
+    return ids;
+  });
+}
+
+function push(layout: Layout, ids: number[]) {
+  let head: number | null = null;
+  for (const id of ids) {
+    layout.init(id, `${id}`, head);
+    head = id;
+  }
+}
+
+// Builds a list of `length` nodes, then returns the number of nodes and rows
+// changed by each step of pushing to and appending to the list
+function changes_per_step(length: number): number[] {
+  const layout = new Layout();
+  push(layout, [...Array(length).keys()]);
+  layout.changes();
+  let head = length - 1;
+  let tail = 0;
+  const counts: number[] = [];
+  for (let id = length; id < length + 100; id++) {
+    if (id % 2 === 0) {
+      layout.init(id, `${id}`, head);
+      head = id;
+    } else {
+      layout.init(id, `${id}`, null);
+      layout.set_next(tail, id);
+      tail = id;
+    }
+    const changes = layout.changes();
+    counts.push(
+      changes.entered.size +
+        changes.exited.size +
+        changes.moved.size +
+        changes.values.size +
+        changes.rows.size +
+        changes.removed.size
+    );
+  }
+  return counts;
+}
+
+describe('Layout', () => {
+  it('should change the same nodes per step on longer lists', () => {
+    const short = changes_per_step(100);
+    expect(changes_per_step(10000)).toEqual(short);
+    expect(Math.max(...short)).toBeLessThanOrEqual(5);
+  });
+
+  it('should draw a pushed list in one row', () => {
+    const layout = new Layout();
+    push(layout, [0, 1, 2]);
+    expect(rows(layout)).toEqual([[2, 1, 0]]);
+    expect(layout.position(2)).toEqual({ i: 0, j: 0 });
+    expect(layout.position(0)).toEqual({ i: 2, j: 0 });
+  });
+
+  it('should move only the pushed node', () => {
+    const layout = new Layout();
+    push(layout, [0, 1, 2]);
+    layout.changes();
+    layout.init(3, '3', 2);
+    const changes = layout.changes();
+    expect([...changes.entered]).toEqual([3]);
+    expect([...changes.moved]).toEqual([3]);
+    expect(changes.rows.size).toBe(1);
+  });
+
+  it('should append to the tail', () => {
+    const layout = new Layout();
+    push(layout, [0, 1, 2]);
+    layout.init(3, '3', null);
+    expect(rows(layout)).toEqual([[2, 1, 0], [3]]);
+    layout.changes();
+    layout.set_next(0, 3);
+    expect(rows(layout)).toEqual([[2, 1, 0, 3]]);
+    expect(layout.position(3)).toEqual({ i: 3, j: 0 });
+    const changes = layout.changes();
+    expect([...changes.moved]).toEqual([3]);
+    expect(changes.removed.size).toBe(1);
+  });
+
+  it('should split a row when a node is removed', () => {
+    const layout = new Layout();
+    push(layout, [0, 1, 2, 3, 4]);
+    layout.set_next(3, 1);
+    expect(rows(layout)).toEqual([[4, 3, 1, 0], [2]]);
+    expect(layout.position(1)).toEqual({ i: 2, j: 0 });
+    expect(layout.position(2)).toEqual({ i: 0, j: 1 });
+  });
+
+  it('should reverse a list moving one node per step', () => {
+    const layout = new Layout();
+    push(layout, [0, 1, 2, 3, 4, 5]);
+    layout.changes();
+    let previous: number | null = null;
+    let n: number | undefined = 5;
+    while (n !== undefined) {
+      const next = layout.next(n);
+      layout.set_next(n, previous);
+      expect(layout.changes().moved.size).toBeLessThanOrEqual(2);
+      previous = n;
+      n = next;
+    }
+    expect(rows(layout)).toEqual([[0, 1, 2, 3, 4, 5]]);
+  });
+
+  it('should attach nodes added before the node they point to', () => {
+    const layout = new Layout();
+    // The initial nodes of an appended list, in the order of their ids
+    layout.init(0, '0', 1);
+    layout.init(1, '1', 2);
+    layout.init(2, '2', 3);
+    layout.init(3, '3', null);
+    expect(rows(layout)).toEqual([[0, 1, 2, 3]]);
+    expect(layout.position(3)).toEqual({ i: 3, j: 0 });
+  });
+
+  it('should attach a node pointed to before it was added', () => {
+    const layout = new Layout();
+    push(layout, [0, 1]);
+    layout.set_next(0, 2);
+    layout.init(3, '3', 2);
+    layout.init(2, '2', null);
+    expect(rows(layout)).toEqual([[1, 0, 2], [3]]);
+  });
+
+  it('should keep cycles in one row', () => {
+    const layout = new Layout();
+    push(layout, [0, 1, 2]);
+    layout.set_next(0, 2);
+    expect(rows(layout)).toEqual([[2, 1, 0]]);
+    expect(layout.next(0)).toBe(2);
+  });
+
+  it('should draw a node pointing into a list in its own row', () => {
+    const layout = new Layout();
+    push(layout, [0, 1, 2]);
+    layout.init(3, '3', 1);
+    expect(rows(layout)).toEqual([[2, 1, 0], [3]]);
+  });
+
+  it('should update values', () => {
+    const layout = new Layout();
+    push(layout, [0]);
+    layout.changes();
+    layout.set_value(0, 'a');
+    expect(layout.value(0)).toBe('a');
+    expect([...layout.changes().values]).toEqual([0]);
+  });
+
+  it('should find the nodes by row and column', () => {
+    const layout = new Layout();
+    push(layout, [0, 1, 2]);
+    layout.init(3, '3', null);
+    const [first, second] = layout.rows;
+    expect([0, 1, 2, 3].map((i) => layout.at(first, i))).toEqual([
+      2,
+      1,
+      0,
+      undefined,
+    ]);
+    expect(layout.at(second, 0)).toBe(3);
+  });
+
+  it('should remove nodes', () => {
+    const layout = new Layout();
+    push(layout, [0, 1, 2, 3, 4]);
+    layout.changes();
+    layout.remove(4);
+    expect(rows(layout)).toEqual([[3, 2, 1, 0]]);
+    expect(layout.has(4)).toBe(false);
+    expect([...layout.changes().exited]).toEqual([4]);
+    layout.remove(2);
+    expect(rows(layout)).toEqual([[1, 0], [3]]);
+    expect(layout.size).toBe(3);
+    expect(layout.position(0)).toEqual({ i: 1, j: 0 });
+  });
+});
@@ -0,0 +1,96 @@
+// Copyright (c) Jose Romero
+// Distributed under the terms of the Modified BSD License.
+
+import {
+  add_strings,
+  operation_at,
+  operation_serializers,
+  operations_length,
+  operations_snippets,
+} from '../serializers';
+
+function data_view(array: Int8Array | Int32Array): DataView {
+  return new DataView(array.buffer, array.byteOffset, array.byteLength);
+}
+
+describe('operation_serializers', () => {
+  it('should decode the binary format', () => {
+    const ops = operation_serializers.deserialize({
+      format: 'binary',
+      length: 3,
+      opcodes: data_view(new Int8Array([0, 2, 3])),
+      ids: data_view(new Int32Array([0, 0, 0])),
+      nexts: data_view(new Int32Array([-1, -1, 1])),
+      values: data_view(new Int32Array([0, -1, -1])),
+      sources: data_view(new Int32Array([0, 1, 1])),
+      animate: data_view(new Int8Array([0, 1, 1])),
+      strings: ['10'],
+      snippets: [['n = Node(10, None)\n'], ['n.next = m\n']],
+      metadata: {},
+    });
+
+    expect(operations_length(ops)).toBe(3);
+    expect(operations_snippets(ops)).toEqual([
+      ['n = Node(10, None)\n'],
+      ['n.next = m\n'],
+    ]);
+    expect(operation_at(ops, 0)).toEqual({
+      operation: { operation: 'init', id: 0, value: '10', next: null },
+      metadata: { animate: false, source: 0 },
+    });
+    expect(operation_at(ops, 1).operation).toEqual({
+      operation: 'get_value',
+      id: 0,
+    });
+    expect(operation_at(ops, 2)).toEqual({
+      operation: { operation: 'set_next', id: 0, next: 1 },
+      metadata: { animate: true, source: 1 },
+    });
+  });
+
+  it('should decode appended strings with the whole table', () => {
+    const strings = ['a'];
+    const ops = operation_serializers.deserialize({
+      format: 'binary',
+      length: 2,
+      opcodes: data_view(new Int8Array([0, 1])),
+      ids: data_view(new Int32Array([1, 0])),
+      nexts: data_view(new Int32Array([0, -1])),
+      values: data_view(new Int32Array([1, 0])),
+      sources: data_view(new Int32Array([0, 0])),
+      animate: data_view(new Int8Array([1, 1])),
+      strings: ['b'],
+      strings_from: 1,
+      snippets: [],
+      metadata: {},
+    });
+    add_strings(ops, strings);
+    expect(strings).toEqual(['a', 'b']);
+    expect(operation_at(ops, 0, strings).operation).toEqual({
+      operation: 'init',
+      id: 1,
+      value: 'b',
+      next: 0,
+    });
+    expect(operation_at(ops, 1, strings).operation).toEqual({
+      operation: 'set_value',
+      id: 0,
+      value: 'a',
+    });
+  });
+
+  it('should pass the JSON format through', () => {
+    const json = {
+      operations: [
+        {
+          operation: { operation: 'get_next', id: 3 },
+          metadata: { animate: true, source: [] },
+        },
+      ],
+      metadata: {},
+    };
+    const ops = operation_serializers.deserialize(json);
+    expect(operations_length(ops)).toBe(1);
+    expect(operation_at(ops, 0)).toEqual(json.operations[0]);
+  });
+});
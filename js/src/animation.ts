@@ -1,40 +1,35 @@
 import * as d3 from 'd3';
 import {
-  Operations,
+  OperationsData,
   Operation,
-  Init,
+  LinkedListOperation,
   VisualizationMetadata,
+  add_strings,
+  operation_at,
+  operations_deaths,
+  operations_initial,
+  operations_length,
+  operations_snippets,
 } from './serializers';
-
-const WIDTH = 1000;
-const HEIGHT = 250;
-
-const RECT_WIDTH = 100;
-const RECT_HEIGHT = 50;
-// const RECT_Y_OFFSET = 100;
-
-const ITER_HEIGHT = 30;
-// const ITER_PADDING = 5;
-
-const OUTER_PADDING = 40;
-const INNER_PADDING = 50;
-const STEP = 100;
-
-// Default durations
-const FADE = 1000;
-const TRANSITION = 1000;
-
-const ARROW_HEAD_LENGTH = 10;
-const ARROW_HEAD_WIDTH = 8;
-const ARROW_STROKE_WIDTH = 2;
-
-function x_scale(i: number) {
-  return OUTER_PADDING + (STEP + INNER_PADDING) * i;
-}
-
-function y_scale(i: number) {
-  return OUTER_PADDING + 70 * i;
-}
+import { Layout, Row } from './layout';
+import { Renderer } from './renderer';
+import { CanvasViz } from './canvas';
+import {
+  ARROW_HEAD_LENGTH,
+  ARROW_HEAD_WIDTH,
+  ARROW_STROKE_WIDTH,
+  FADE,
+  HEIGHT,
+  INNER_PADDING,
+  ITER_HEIGHT,
+  RECT_HEIGHT,
+  RECT_WIDTH,
+  TRANSITION,
+  WIDTH,
+  column_x,
+  x_scale,
+  y_scale,
+} from './geometry';
 
 const layout = (i: number, j: number) =>
   `translate(${x_scale(i)}, ${y_scale(j)})`;
@@ -121,46 +116,37 @@ export function append_arrow(
   return arrow;
 }
 
-interface VizNode {
-  value: string;
-}
-
-interface BoxData {
-  i: number;
-  id: number;
-  value: string;
-  list_index: number;
-  list_length: number;
-}
-
-// Assumes that there are no cycles pointing to the heads
-function heads(nodes: Map<number, unknown>, edges: Map<number, number>) {
-  const values = new Set(edges.values());
-  return [...nodes.keys()].filter((n) => !values.has(n));
+// Group of the boxes of a row. `x` and `y` are its translation in the
+// container.
+interface RowElement {
+  group: d3.Selection<SVGGElement, unknown, any, any>;
+  x: number;
+  y: number;
 }
 
-function* iterate(
-  k: number,
-  nodes: Map<number, VizNode>,
-  edges: Map<number, number>
-) {
-  let next: number | undefined = k;
-  while (next !== undefined) {
-    yield { id: next, node: nodes.get(next) as VizNode };
-    next = edges.get(next);
-  }
+// Element of a node, with the key of the row and the column it is drawn at
+interface Box {
+  group: d3.Selection<SVGGElement, unknown, any, any>;
+  row: number;
+  column: number;
 }
 
-class Viz {
+export class Viz extends Renderer {
+  private _svg: d3.Selection<SVGSVGElement, unknown, null, undefined>;
   private _container: d3.Selection<any, unknown, any, any>;
-  private _nodes: Map<number, VizNode>;
-  private _edges: Map<number, number>;
-  private _heads: number[];
+  // Elements of the nodes and the rows, by id and by row key. `display()`
+  // only touches the ones that changed.
+  private _boxes: Map<number, Box>;
+  private _rows: Map<number, RowElement>;
   private _iterator: d3.Selection<SVGGElement, unknown, any, any>;
-  private _data: BoxData[];
-  private metadata: VisualizationMetadata;
 
-  constructor(element: HTMLElement, metadata: VisualizationMetadata) {
+  constructor(
+    element: HTMLElement,
+    metadata: VisualizationMetadata,
+    layout: Layout = new Layout()
+  ) {
+    super(metadata, layout);
+
     // Container
     const svg = d3
       .select(element)
@@ -168,11 +154,9 @@ class Viz {
       .attr('viewBox', [0, 0, WIDTH, HEIGHT])
       .classed('viz', true);
 
+    this._svg = svg;
     this._container = svg.append('g');
 
-    // Metadata
-    this.metadata = metadata;
-
     // Zoom
     const zoomBehaviour = d3
       .zoom<any, unknown>()
@@ -187,8 +171,8 @@ class Viz {
 
     svg.call(zoomBehaviour);
 
-    this._nodes = new Map<number, VizNode>();
-    this._edges = new Map<number, number>();
+    this._boxes = new Map();
+    this._rows = new Map();
 
     const iterator = this._container.append('g').attr('class', 'iterator');
     append_arrow(iterator, ITER_HEIGHT).attr(
@@ -200,185 +184,420 @@ class Viz {
   }
 
   async iterate(id: number, animate: boolean) {
-    console.log('iterate  id: ', id, 'animate: ', animate);
     if (!animate) {
       return;
     }
-    const datum = this._data.find((d) => d.id === id);
-    if (!datum) {
-      console.error('No datum for element ', id);
+    const position = this._layout.position(id);
+    if (!position) {
+      console.error('No node with id ', id);
       return;
     }
-    const i = datum.i;
-    const j = datum.list_index;
+    const { i, j } = position;
     transform(
       this._iterator,
       layout(i - 1, j),
       false,
-      this.metadata.transition_duration
+      this.transition_duration
     );
-    await fade_in(this._iterator, animate, this.metadata.fade_in_duration);
+    await fade_in(this._iterator, animate, this.fade_in_duration);
     await transform(
       this._iterator,
       layout(i, j),
       animate,
-      this.metadata.transition_duration
+      this.transition_duration
     );
-    fade_out(this._iterator, animate, this.metadata.fade_in_duration);
+    fade_out(this._iterator, animate, this.fade_in_duration);
     return;
   }
 
-  init(op: Init) {
-    this._nodes.set(op.id, { value: op.value });
-    if (op.next !== null) {
-      this._edges.set(op.id, op.next);
-    }
+  remove() {
+    this._svg.remove();
   }
 
-  set_next(i: number, j: number | null) {
-    if (j !== null) {
-      this._edges.set(i, j);
-    } else {
-      this._edges.delete(i);
+  private row_element(row: Row): RowElement {
+    let element = this._rows.get(row.key);
+    if (element === undefined) {
+      element = {
+        group: this._container.append('g').classed('row', true),
+        x: x_scale(-this._layout.offset(row)),
+        y: y_scale(row.index),
+      };
+      element.group.attr('transform', `translate(${element.x}, ${element.y})`);
+      this._rows.set(row.key, element);
     }
+    return element;
   }
 
-  set_value(i: number, value: string) {
-    const current_value = this._nodes.get(i);
-    if (current_value !== undefined) {
-      current_value.value = value;
-      this._nodes.set(i, current_value);
-    }
-  }
+  private enter(id: number): d3.Selection<SVGGElement, unknown, any, any> {
+    const row = this._layout.row(id) as Row;
+    const column = this._layout.column(id) as number;
+    const box = this.row_element(row)
+      .group.append('g')
+      .classed('box', true)
+      .attr('transform', `translate(${column_x(column)}, 0)`);
+
+    box.append('rect').attr('width', RECT_WIDTH).attr('height', RECT_HEIGHT);
+
+    box
+      .append('text')
+      .text(this._layout.value(id) as string)
+      .attr('text-anchor', 'middle')
+      .attr('dominant-baseline', 'middle')
+      .attr('x', RECT_WIDTH / 2)
+      .attr('y', RECT_HEIGHT / 2);
+
+    append_arrow(box, INNER_PADDING).attr(
+      'transform',
+      `translate(${RECT_WIDTH}, ${RECT_HEIGHT / 2})`
+    );
 
-  update_heads() {
-    this._heads = heads(this._nodes, this._edges);
+    this._boxes.set(id, { group: box, row: row.key, column });
+    return box;
   }
 
-  update_data() {
-    // Define the data to map to the boxes. Uses the entry points or heads
-    // to create a list of lists. Then flattens the list of lists into a
-    // list with all the data for each node.
-    const boxes_data: BoxData[] = this._heads
-      .map((k) => [...iterate(k, this._nodes, this._edges)])
-      .map((list, list_index) =>
-        list.map((datum, i) => {
-          return {
-            i: i,
-            id: datum.id,
-            value: datum.node.value,
-            list_index: list_index,
-            list_length: list.length,
-          };
-        })
-      )
-      .reduce((prev, curr) => prev.concat(curr), []);
-    this._data = boxes_data;
-    console.log(boxes_data);
+  // Moves the box to the group of its row and to its column. A box that
+  // changes rows starts where it was drawn in the previous row.
+  private move(id: number, animate: boolean): Promise<void> {
+    const box = this._boxes.get(id);
+    if (box === undefined) {
+      return Promise.resolve();
+    }
+    const row = this._layout.row(id) as Row;
+    const element = this.row_element(row);
+    if (box.row !== row.key) {
+      const previous = this._rows.get(box.row);
+      const x = column_x(box.column) + (previous ? previous.x - element.x : 0);
+      const y = previous ? previous.y - element.y : 0;
+      box.group.attr('transform', `translate(${x}, ${y})`);
+      (element.group.node() as SVGGElement).appendChild(
+        box.group.node() as SVGGElement
+      );
+      box.row = row.key;
+    }
+    box.column = this._layout.column(id) as number;
+    return transform(
+      box.group,
+      `translate(${column_x(box.column)}, 0)`,
+      animate,
+      this.transition_duration
+    );
   }
 
   async display(animate = true) {
-    this.update_heads();
-    this.update_data();
-
-    // Map the data to the boxes
-    const boxes = this._container
-      .selectAll('.box')
-      .data(this._data, (d) => (d as BoxData).id);
-
-    const enter = (
-      selection: d3.Selection<d3.BaseType, BoxData, any, unknown>
-    ) => {
-      console.log('enter');
-      const boxes_enter = selection
-        .enter()
-        .append('g')
-        .classed('box', true)
-        .attr('transform', (d) => layout(d.i, d.list_index));
-
-      boxes_enter
-        .append('rect')
-        .attr('width', RECT_WIDTH)
-        .attr('height', RECT_HEIGHT);
-
-      boxes_enter
-        .append('text')
-        .text((d) => d.value)
-        .attr('text-anchor', 'middle')
-        .attr('dominant-baseline', 'middle')
-        .attr('x', RECT_WIDTH / 2)
-        .attr('y', RECT_HEIGHT / 2);
-
-      append_arrow(boxes_enter, INNER_PADDING).attr(
-        'transform',
-        `translate(${RECT_WIDTH}, ${RECT_HEIGHT / 2})`
-      );
+    const changes = this._layout.changes();
+    const updates: Promise<void>[] = [];
 
-      return fade_in(boxes_enter, animate, this.metadata.fade_in_duration);
-    };
+    for (const id of changes.exited) {
+      this._boxes.get(id)?.group.remove();
+      this._boxes.delete(id);
+    }
 
-    const update = (
-      selection: d3.Selection<d3.BaseType, BoxData, any, unknown>
-    ) => {
-      console.log('update');
-      return transform(
-        selection,
-        (d) => layout(d.i, d.list_index),
-        animate,
-        this.metadata.transition_duration
-      );
-    };
+    for (const id of changes.moved) {
+      if (!changes.entered.has(id)) {
+        updates.push(this.move(id, animate));
+      }
+    }
+
+    for (const row of changes.rows) {
+      const element = this.row_element(row);
+      const x = x_scale(-this._layout.offset(row));
+      const y = y_scale(row.index);
+      if (x !== element.x || y !== element.y) {
+        element.x = x;
+        element.y = y;
+        updates.push(
+          transform(
+            element.group,
+            `translate(${x}, ${y})`,
+            animate,
+            this.transition_duration
+          )
+        );
+      }
+    }
+
+    for (const row of changes.removed) {
+      const element = this._rows.get(row.key);
+      if (element !== undefined) {
+        element.group.remove();
+        this._rows.delete(row.key);
+      }
+    }
+
+    for (const id of changes.values) {
+      if (!changes.entered.has(id)) {
+        this._boxes
+          .get(id)
+          ?.group.select('text')
+          .text(this._layout.value(id) as string);
+      }
+    }
+
+    await Promise.all(updates);
 
-    await update(boxes);
-    await enter(boxes);
-    return console.log('finish');
+    const entered = [...changes.entered].map((id) => this.enter(id));
+    await Promise.all(
+      entered.map((box) =>
+        fade_in(box, animate, this.fade_in_duration)
+      )
+    );
   }
 }
 
-async function update_viz(viz: Viz, operation: Operation) {
-  const op = operation.operation;
-  const animate = operation.metadata.animate;
+// Time spent applying operations that are not animated before drawing them
+// and yielding to the browser
+const FRAME_BUDGET = 12;
+
+const SPEEDS = [0.25, 0.5, 1, 2, 4, 16];
+
+function next_frame(): Promise<void> {
+  return new Promise((resolve) => requestAnimationFrame(() => resolve()));
+}
+
+// Applies the changes of the operation to the layout
+function apply(viz: Renderer, op: LinkedListOperation) {
   switch (op.operation) {
     case 'init':
       viz.init(op);
       break;
     case 'set_value':
-      // await viz.iterate(op.id, animate);
       viz.set_value(op.id, op.value);
       break;
-    case 'get_value':
-      // await viz.iterate(op.id, animate);
-      break;
     case 'set_next':
-      // await viz.iterate(op.id, animate);
       viz.set_next(op.id, op.next);
       break;
+  }
+}
+
+async function update_viz(viz: Renderer, operation: Operation) {
+  const op = operation.operation;
+  const animate = operation.metadata.animate;
+  apply(viz, op);
+  switch (op.operation) {
     case 'get_next':
       await viz.iterate(op.id, animate);
       break;
+    case 'traverse':
+      await viz.traverse(op.id, op.to, animate);
+      break;
   }
   await viz.display(animate);
 }
 
-export async function animate_operations(
-  element: HTMLElement,
-  ops: Operations
-): Promise<void> {
-  const code = d3
-    .select(element)
-    .append('div')
-    .attr('class', 'source-code-container')
-    .text('Source: ');
-
-  const linked_list_viz = new Viz(element, ops.metadata);
-
-  for (const op of ops.operations) {
-    code.select('.source-code').remove();
-    const pre = code.append('pre').attr('class', 'source-code');
-    for (const line of op.metadata.source) {
+// Nodes above which the canvas renderer is used, unless the metadata sets
+// `canvas_threshold`
+export const CANVAS_THRESHOLD = 2000;
+
+// Plays the operations. The animated ones are played one at a time. The
+// rest are applied in batches that fit in a frame and drawn once per batch,
+// showing the source of the last one.
+export class OperationsAnimation {
+  private element: HTMLElement;
+  private metadata: VisualizationMetadata;
+  private code: d3.Selection<HTMLDivElement, unknown, null, undefined>;
+  private play_button: d3.Selection<
+    HTMLButtonElement,
+    unknown,
+    null,
+    undefined
+  >;
+  private viz: Renderer;
+  private queue: Promise<void> = Promise.resolve();
+  // Batches of operations appended and not played yet
+  private pending = 0;
+  // Set while jumping to the end, the operations are not animated
+  private skipping = false;
+  private _speed = 1;
+  private resume: (() => void) | null = null;
+  private resumed: Promise<void> = Promise.resolve();
+  // Snippets of all the appended operations. Each batch of operations
+  // extends the table with the snippets that are new.
+  private snippets: string[][] = [];
+  // Strings of all the appended binary operations, built the same way
+  private strings: string[] = [];
+
+  constructor(element: HTMLElement, metadata: VisualizationMetadata) {
+    this.element = element;
+    this.metadata = metadata;
+
+    const controls = d3
+      .select(element)
+      .append('div')
+      .attr('class', 'controls');
+    this.play_button = controls
+      .append('button')
+      .text('Pause')
+      .on('click', () => (this.paused ? this.play() : this.pause()));
+    controls
+      .append('select')
+      .on('change', (event) => (this.speed = Number(event.target.value)))
+      .selectAll('option')
+      .data(SPEEDS)
+      .join('option')
+      .attr('value', (d) => d)
+      .property('selected', (d) => d === 1)
+      .text((d) => `${d}x`);
+    controls
+      .append('button')
+      .text('Skip to end')
+      .on('click', () => this.jump_to_end());
+
+    this.code = d3
+      .select(element)
+      .append('div')
+      .attr('class', 'source-code-container')
+      .text('Source: ');
+
+    this.viz = new Viz(element, metadata);
+  }
+
+  // Animates the operations once the previously appended ones are done.
+  append(ops: OperationsData): Promise<void> {
+    const done = () => {
+      if (--this.pending === 0) {
+        this.skipping = false;
+      }
+    };
+    this.pending++;
+    this.queue = this.queue
+      .then(() => this.animate(ops))
+      .then(done, (error) => {
+        done();
+        throw error;
+      });
+    return this.queue;
+  }
+
+  get renderer(): Renderer {
+    return this.viz;
+  }
+
+  get speed(): number {
+    return this._speed;
+  }
+
+  set speed(speed: number) {
+    this._speed = speed;
+    this.viz.speed = speed;
+  }
+
+  get paused(): boolean {
+    return this.resume !== null;
+  }
+
+  // Stops after the operation that is playing
+  pause() {
+    if (this.resume === null) {
+      this.resumed = new Promise((r) => (this.resume = () => r()));
+      this.play_button.text('Play');
+    }
+  }
+
+  play() {
+    const resume = this.resume;
+    this.resume = null;
+    this.play_button.text('Pause');
+    resume?.();
+  }
+
+  // Applies the appended operations without animating them
+  jump_to_end() {
+    if (this.pending > 0) {
+      this.skipping = true;
+    }
+    this.play();
+  }
+
+  // Replaces the SVG renderer with the canvas renderer, which only draws the
+  // visible nodes, once the layout has more nodes than the threshold
+  private pick_renderer() {
+    const threshold = this.metadata.canvas_threshold ?? CANVAS_THRESHOLD;
+    if (this.viz instanceof Viz && this.viz.layout.size > threshold) {
+      const layout = this.viz.layout;
+      this.viz.remove();
+      this.viz = new CanvasViz(this.element, this.metadata, layout);
+      this.viz.speed = this._speed;
+    }
+  }
+
+  private source(op: Operation): string[] {
+    const source = op.metadata.source;
+    return typeof source === 'number' ? this.snippets[source] : source;
+  }
+
+  private show_source(op: Operation) {
+    this.code.select('.source-code').remove();
+    const pre = this.code.append('pre').attr('class', 'source-code');
+    for (const line of this.source(op)) {
       pre.append('code').text(line);
     }
-    await update_viz(linked_list_viz, op);
   }
-  return;
+
+  // Removes the nodes that die after the operation `i`. Returns whether
+  // there were any.
+  private drop(deaths: Map<number, number[]>, i: number): boolean {
+    const ids = deaths.get(i);
+    if (ids === undefined) {
+      return false;
+    }
+    for (const id of ids) {
+      this.viz.drop(id);
+    }
+    return true;
+  }
+
+  private async animate(ops: OperationsData): Promise<void> {
+    for (const snippet of operations_snippets(ops)) {
+      this.snippets.push(snippet);
+    }
+    add_strings(ops, this.strings);
+    const initial = operations_initial(ops);
+    if (initial.length > 0) {
+      for (const op of initial) {
+        this.viz.init(op);
+      }
+      this.pick_renderer();
+      await this.viz.display(false);
+    }
+    const deaths = operations_deaths(ops);
+    const length = operations_length(ops);
+    let i = 0;
+    while (i < length) {
+      await this.resumed;
+      let op = operation_at(ops, i, this.strings);
+      if (op.metadata.animate && !this.skipping) {
+        this.show_source(op);
+        await update_viz(this.viz, op);
+        if (this.drop(deaths, i)) {
+          await this.viz.display(true);
+        }
+        i++;
+        this.pick_renderer();
+        continue;
+      }
+      const start = performance.now();
+      apply(this.viz, op.operation);
+      this.drop(deaths, i++);
+      while (i < length && performance.now() - start < FRAME_BUDGET) {
+        const next = operation_at(ops, i, this.strings);
+        if (next.metadata.animate && !this.skipping) {
+          break;
+        }
+        apply(this.viz, next.operation);
+        this.drop(deaths, i++);
+        op = next;
+      }
+      this.show_source(op);
+      this.pick_renderer();
+      await this.viz.display(false);
+      await next_frame();
+    }
+  }
+}
+
+export function animate_operations(
+  element: HTMLElement,
+  ops: OperationsData
+): Promise<void> {
+  return new OperationsAnimation(element, ops.metadata).append(ops);
 }
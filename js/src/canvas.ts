@@ -0,0 +1,363 @@
+import * as d3 from 'd3';
+import { VisualizationMetadata } from './serializers';
+import { Layout } from './layout';
+import { Renderer } from './renderer';
+import {
+  ARROW_HEAD_LENGTH,
+  ARROW_HEAD_WIDTH,
+  ARROW_STROKE_WIDTH,
+  COLUMN_WIDTH,
+  HEIGHT,
+  INNER_PADDING,
+  ITER_HEIGHT,
+  OUTER_PADDING,
+  RECT_HEIGHT,
+  RECT_WIDTH,
+  ROW_HEIGHT,
+  WIDTH,
+  x_scale,
+  y_scale,
+} from './geometry';
+
+// Below this zoom the values and the arrows are not drawn
+const DETAIL_SCALE = 0.3;
+
+interface Point {
+  x: number;
+  y: number;
+}
+
+interface Tween {
+  done: Promise<void>;
+  stop: () => void;
+}
+
+// Calls `frame` on every animation frame with the eased progress, from 0
+// to 1 in `duration` milliseconds. `stop()` ends it early.
+function tween(duration: number, frame: (t: number) => void): Tween {
+  let resolve: () => void = () => undefined;
+  const done = new Promise<void>((r) => (resolve = () => r()));
+  if (duration <= 0) {
+    frame(1);
+    resolve();
+    return { done, stop: resolve };
+  }
+  const timer = d3.timer((elapsed) => {
+    const t = Math.min(1, elapsed / duration);
+    frame(d3.easeCubic(t));
+    if (t === 1) {
+      timer.stop();
+      resolve();
+    }
+  });
+  const stop = () => {
+    timer.stop();
+    resolve();
+  };
+  return { done, stop };
+}
+
+const lerp = (a: number, b: number, t: number) => a + (b - a) * t;
+
+// Draws the nodes on a canvas. Only the nodes in the visible window are
+// drawn and animated, so the cost of a frame doesn't depend on the number
+// of nodes.
+export class CanvasViz extends Renderer {
+  private _canvas: HTMLCanvasElement;
+  private _context: CanvasRenderingContext2D | null;
+  private _transform: d3.ZoomTransform = d3.zoomIdentity;
+  private _frame: number | null = null;
+  // Positions of the nodes in the last frame, to animate the ones that move
+  private _drawn = new Map<number, Point>();
+  // Positions of the nodes that are moving and opacity of the new nodes
+  private _moving = new Map<number, Point>();
+  private _opacity = new Map<number, number>();
+  private _iterator = { x: 0, y: 0, opacity: 0 };
+  private _iterator_tween: Tween | null = null;
+
+  constructor(
+    element: HTMLElement,
+    metadata: VisualizationMetadata,
+    layout: Layout = new Layout()
+  ) {
+    super(metadata, layout);
+
+    const ratio = window.devicePixelRatio || 1;
+    const canvas = d3
+      .select(element)
+      .append('canvas')
+      .classed('viz', true)
+      .attr('width', WIDTH * ratio)
+      .attr('height', HEIGHT * ratio)
+      .style('width', '100%');
+    this._canvas = canvas.node() as HTMLCanvasElement;
+    this._context = this._canvas.getContext('2d');
+
+    // Zoom
+    const zoomBehaviour = d3
+      .zoom<HTMLCanvasElement, unknown>()
+      .scaleExtent([0.05, 2])
+      .on('zoom', (event) => {
+        this._transform = event.transform;
+        this.request_draw();
+      });
+
+    canvas.call(zoomBehaviour);
+
+    this._layout.changes();
+    this.draw();
+  }
+
+  remove() {
+    if (this._frame !== null) {
+      cancelAnimationFrame(this._frame);
+    }
+    this._iterator_tween?.stop();
+    this._canvas.remove();
+  }
+
+  // Pixels of the page per unit of the drawing, before zooming
+  private scale(): number {
+    return this._canvas.clientWidth ? this._canvas.clientWidth / WIDTH : 1;
+  }
+
+  // Visible rectangle of the drawing, as [x0, y0, x1, y1]
+  private window(): [number, number, number, number] {
+    const t = this._transform;
+    const dx = t.x / this.scale();
+    const dy = t.y / this.scale();
+    return [-dx / t.k, -dy / t.k, (WIDTH - dx) / t.k, (HEIGHT - dy) / t.k];
+  }
+
+  private point(id: number): Point | undefined {
+    const position = this._layout.position(id);
+    if (position === undefined) {
+      return undefined;
+    }
+    return { x: x_scale(position.i), y: y_scale(position.j) };
+  }
+
+  private visible(point: Point): boolean {
+    const [x0, y0, x1, y1] = this.window();
+    return (
+      point.x + RECT_WIDTH + INNER_PADDING >= x0 &&
+      point.x <= x1 &&
+      point.y + RECT_HEIGHT >= y0 &&
+      point.y - ITER_HEIGHT <= y1
+    );
+  }
+
+  private request_draw() {
+    if (this._frame === null) {
+      this._frame = requestAnimationFrame(() => {
+        this._frame = null;
+        this.draw();
+      });
+    }
+  }
+
+  private draw() {
+    const context = this._context;
+    // jsdom and some browsers without a 2D context
+    if (!context) {
+      return;
+    }
+    const style = getComputedStyle(this._canvas);
+    const foreground = style.color || 'black';
+    const box_color =
+      style.getPropertyValue('--box-color').trim() || 'darkcyan';
+    const box_foreground =
+      style.getPropertyValue('--box-fg').trim() || 'white';
+
+    const ratio = this._canvas.width / WIDTH;
+    const t = this._transform;
+    context.setTransform(ratio, 0, 0, ratio, 0, 0);
+    context.clearRect(0, 0, WIDTH, HEIGHT);
+    context.translate(t.x / this.scale(), t.y / this.scale());
+    context.scale(t.k, t.k);
+    context.font = `16px ${style.fontFamily || 'sans-serif'}`;
+    context.textAlign = 'center';
+    context.textBaseline = 'middle';
+    context.lineWidth = ARROW_STROKE_WIDTH;
+    const detail = t.k >= DETAIL_SCALE;
+
+    // Rows and columns in the window
+    const [x0, y0, x1, y1] = this.window();
+    const rows = this._layout.rows;
+    const first_row = Math.max(
+      0,
+      Math.ceil((y0 - OUTER_PADDING - RECT_HEIGHT) / ROW_HEIGHT)
+    );
+    const last_row = Math.min(
+      rows.length - 1,
+      Math.floor((y1 - OUTER_PADDING + ITER_HEIGHT) / ROW_HEIGHT)
+    );
+    const first_column = Math.max(
+      0,
+      Math.ceil(
+        (x0 - OUTER_PADDING - RECT_WIDTH - INNER_PADDING) / COLUMN_WIDTH
+      )
+    );
+    const last_column = Math.floor((x1 - OUTER_PADDING) / COLUMN_WIDTH);
+
+    this._drawn.clear();
+    for (let j = first_row; j <= last_row; j++) {
+      for (let i = first_column; i <= last_column; i++) {
+        const id = this._layout.at(rows[j], i);
+        if (id === undefined) {
+          break;
+        }
+        const point = this._moving.get(id) ?? {
+          x: x_scale(i),
+          y: y_scale(j),
+        };
+        this._drawn.set(id, point);
+        context.globalAlpha = this._opacity.get(id) ?? 1;
+        context.fillStyle = box_color;
+        context.fillRect(point.x, point.y, RECT_WIDTH, RECT_HEIGHT);
+        if (detail) {
+          context.fillStyle = box_foreground;
+          context.fillText(
+            this._layout.value(id) as string,
+            point.x + RECT_WIDTH / 2,
+            point.y + RECT_HEIGHT / 2
+          );
+          context.fillStyle = context.strokeStyle = foreground;
+          draw_arrow(
+            context,
+            point.x + RECT_WIDTH,
+            point.y + RECT_HEIGHT / 2,
+            0,
+            INNER_PADDING
+          );
+        }
+      }
+    }
+
+    const iterator = this._iterator;
+    if (iterator.opacity > 0) {
+      context.globalAlpha = iterator.opacity;
+      context.fillStyle = context.strokeStyle = foreground;
+      draw_arrow(
+        context,
+        iterator.x + RECT_WIDTH / 2,
+        iterator.y - ITER_HEIGHT,
+        Math.PI / 2,
+        ITER_HEIGHT
+      );
+    }
+    context.globalAlpha = 1;
+  }
+
+  private animate(duration: number, frame: (t: number) => void): Tween {
+    return tween(duration, (t) => {
+      frame(t);
+      this.draw();
+    });
+  }
+
+  async iterate(id: number, animate: boolean) {
+    if (!animate) {
+      return;
+    }
+    const point = this.point(id);
+    if (point === undefined || !this.visible(point)) {
+      return;
+    }
+    this._iterator_tween?.stop();
+    const iterator = this._iterator;
+    iterator.x = point.x - COLUMN_WIDTH;
+    iterator.y = point.y;
+    const steps: [number, (t: number) => void][] = [
+      [this.fade_in_duration, (t) => (iterator.opacity = t)],
+      [
+        this.transition_duration,
+        (t) => (iterator.x = point.x - COLUMN_WIDTH * (1 - t)),
+      ],
+    ];
+    for (const [duration, frame] of steps) {
+      this._iterator_tween = this.animate(duration, frame);
+      await this._iterator_tween.done;
+    }
+    this._iterator_tween = this.animate(
+      this.fade_in_duration,
+      (t) => (iterator.opacity = 1 - t)
+    );
+  }
+
+  async display(animate = true) {
+    const changes = this._layout.changes();
+    if (!animate) {
+      this.request_draw();
+      return;
+    }
+
+    // Visible nodes that moved since the last frame, and visible new nodes
+    const moving: [number, Point, Point][] = [];
+    for (const [id, from] of this._drawn) {
+      const to = this.point(id);
+      if (
+        to !== undefined &&
+        (to.x !== from.x || to.y !== from.y) &&
+        this.visible(to)
+      ) {
+        moving.push([id, from, to]);
+      }
+    }
+    const entering = [...changes.entered].filter((id) => {
+      const point = this.point(id);
+      return point !== undefined && this.visible(point);
+    });
+    for (const id of entering) {
+      this._opacity.set(id, 0);
+    }
+
+    if (moving.length > 0) {
+      await this.animate(
+        this.transition_duration,
+        (t) => {
+          for (const [id, from, to] of moving) {
+            this._moving.set(id, {
+              x: lerp(from.x, to.x, t),
+              y: lerp(from.y, to.y, t),
+            });
+          }
+        }
+      ).done;
+      this._moving.clear();
+    }
+    if (entering.length > 0) {
+      await this.animate(this.fade_in_duration, (t) => {
+        for (const id of entering) {
+          this._opacity.set(id, t);
+        }
+      }).done;
+      this._opacity.clear();
+    }
+    this.draw();
+  }
+}
+
+// Draws an arrow of `length` starting at (x, y) in the direction of `angle`
+function draw_arrow(
+  context: CanvasRenderingContext2D,
+  x: number,
+  y: number,
+  angle: number,
+  length: number
+) {
+  context.save();
+  context.translate(x, y);
+  context.rotate(angle);
+  context.beginPath();
+  context.moveTo(0, 0);
+  context.lineTo(length - ARROW_HEAD_LENGTH, 0);
+  context.stroke();
+  context.beginPath();
+  context.moveTo(length - ARROW_HEAD_LENGTH, ARROW_HEAD_WIDTH / 2);
+  context.lineTo(length, 0);
+  context.lineTo(length - ARROW_HEAD_LENGTH, -ARROW_HEAD_WIDTH / 2);
+  context.closePath();
+  context.fill();
+  context.restore();
+}
@@ -0,0 +1,40 @@
+// Sizes of the drawing, shared by the renderers
+
+export const WIDTH = 1000;
+export const HEIGHT = 250;
+
+export const RECT_WIDTH = 100;
+export const RECT_HEIGHT = 50;
+// const RECT_Y_OFFSET = 100;
+
+export const ITER_HEIGHT = 30;
+// const ITER_PADDING = 5;
+
+export const OUTER_PADDING = 40;
+export const INNER_PADDING = 50;
+export const STEP = 100;
+
+// Default durations
+export const FADE = 1000;
+export const TRANSITION = 1000;
+
+export const ARROW_HEAD_LENGTH = 10;
+export const ARROW_HEAD_WIDTH = 8;
+export const ARROW_STROKE_WIDTH = 2;
+
+// Distance between the columns and between the rows
+export const COLUMN_WIDTH = STEP + INNER_PADDING;
+export const ROW_HEIGHT = 70;
+
+export function x_scale(i: number) {
+  return OUTER_PADDING + COLUMN_WIDTH * i;
+}
+
+export function y_scale(i: number) {
+  return OUTER_PADDING + ROW_HEIGHT * i;
+}
+
+// Position of a node relative to the head of its row
+export function column_x(column: number) {
+  return COLUMN_WIDTH * column;
+}
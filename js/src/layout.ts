@@ -0,0 +1,316 @@
+// Positions of the nodes, updated incrementally as the operations are
+// applied. Each chain of nodes is drawn in a row. The nodes of a row have
+// consecutive columns, and every node after the first is laid out after the
+// node that points to it, its parent. Columns are relative to the row: a row
+// is drawn shifted so that its head is in the first column, so a node can be
+// pushed in front of a row without moving the rest of it.
+//
+// Splitting or joining rows moves the nodes of the shorter part, so the
+// usual operations on a list (push, append, remove after a node, reverse in
+// place) update a constant number of nodes and rows.
+
+export interface Row {
+  // Identifies the row while it exists
+  key: number;
+  // Vertical position
+  index: number;
+  head: number;
+  tail: number;
+}
+
+interface LayoutNode {
+  value: string;
+  next: number | null;
+  parent: number | null;
+  row: Row;
+  column: number;
+}
+
+export interface Position {
+  // Column relative to the head of the row
+  i: number;
+  // Index of the row
+  j: number;
+}
+
+// What changed since the last call to `Layout.changes()`
+export interface LayoutChanges {
+  // Nodes that were added
+  entered: Set<number>;
+  // Nodes that were removed
+  exited: Set<number>;
+  // Nodes that changed their row or column
+  moved: Set<number>;
+  // Nodes that changed their value
+  values: Set<number>;
+  // Rows that were added, or changed their index or head
+  rows: Set<Row>;
+  // Rows that were removed
+  removed: Set<Row>;
+}
+
+function no_changes(): LayoutChanges {
+  return {
+    entered: new Set(),
+    exited: new Set(),
+    moved: new Set(),
+    values: new Set(),
+    rows: new Set(),
+    removed: new Set(),
+  };
+}
+
+export class Layout {
+  private _nodes = new Map<number, LayoutNode>();
+  private _rows: Row[] = [];
+  // Ids of the nodes by row key and column, to find the nodes in a window
+  private _columns = new Map<number, Map<number, number>>();
+  // Ids of the nodes pointing to each id that hasn't been added yet, so they
+  // are attached when it is
+  private _pending = new Map<number, number[]>();
+  private _keys = 0;
+  private _changes = no_changes();
+
+  get size(): number {
+    return this._nodes.size;
+  }
+
+  get rows(): readonly Row[] {
+    return this._rows;
+  }
+
+  has(id: number): boolean {
+    return this._nodes.has(id);
+  }
+
+  value(id: number): string | undefined {
+    return this._nodes.get(id)?.value;
+  }
+
+  next(id: number): number | undefined {
+    const next = this._nodes.get(id)?.next;
+    return next === null ? undefined : next;
+  }
+
+  row(id: number): Row | undefined {
+    return this._nodes.get(id)?.row;
+  }
+
+  // Column of the node relative to its row, as stored. Use `position()` for
+  // the column relative to the head.
+  column(id: number): number | undefined {
+    return this._nodes.get(id)?.column;
+  }
+
+  // Column of the head of the row
+  offset(row: Row): number {
+    return this.get(row.head).column;
+  }
+
+  // Id of the node in the column `i` relative to the head of the row
+  at(row: Row, i: number): number | undefined {
+    return this._columns.get(row.key)?.get(this.offset(row) + i);
+  }
+
+  position(id: number): Position | undefined {
+    const node = this._nodes.get(id);
+    if (node === undefined) {
+      return undefined;
+    }
+    return { i: node.column - this.offset(node.row), j: node.row.index };
+  }
+
+  // Returns the changes since the previous call and starts tracking anew
+  changes(): LayoutChanges {
+    const changes = this._changes;
+    this._changes = no_changes();
+    return changes;
+  }
+
+  init(id: number, value: string, next: number | null): void {
+    if (this._nodes.has(id)) {
+      this.set_value(id, value);
+      this.set_next(id, next);
+      return;
+    }
+    const row = this.add_row(id);
+    this._nodes.set(id, { value, next, parent: null, row, column: 0 });
+    this.columns(row).set(0, id);
+    this._changes.entered.add(id);
+    // A new node pointing to the head of a row joins it. A node pointing to
+    // a node that already has a parent is drawn in its own row.
+    const target = next !== null ? this._nodes.get(next) : undefined;
+    if (next !== null && target !== undefined && target.parent === null) {
+      this.attach(id, next);
+    } else if (next !== null && target === undefined) {
+      this.wait(id, next);
+    }
+    // Nodes added before it that point to it, the first one still pointing
+    // to it becomes its parent
+    const waiting = this._pending.get(id);
+    if (waiting !== undefined) {
+      this._pending.delete(id);
+      const parent = waiting.find((w) => this._nodes.get(w)?.next === id);
+      if (parent !== undefined) {
+        this.attach(parent, id);
+      }
+    }
+  }
+
+  set_next(id: number, next: number | null): void {
+    const node = this._nodes.get(id);
+    if (node === undefined || node.next === next) {
+      return;
+    }
+    const previous = node.next;
+    node.next = next;
+    if (previous !== null && this._nodes.get(previous)?.parent === id) {
+      this.detach(previous);
+    }
+    if (next !== null && this._nodes.has(next)) {
+      this.attach(id, next);
+    } else if (next !== null) {
+      this.wait(id, next);
+    }
+  }
+
+  set_value(id: number, value: string): void {
+    const node = this._nodes.get(id);
+    if (node !== undefined) {
+      node.value = value;
+      this._changes.values.add(id);
+    }
+  }
+
+  // Removes the node. The row is split around it.
+  remove(id: number): void {
+    const node = this._nodes.get(id);
+    if (node === undefined) {
+      return;
+    }
+    if (node.parent !== null) {
+      this.detach(id);
+    }
+    if (node.next !== null && this._nodes.get(node.next)?.parent === id) {
+      this.detach(node.next);
+    }
+    // The node is alone in its row
+    this.remove_row(node.row);
+    this._nodes.delete(id);
+    this._changes.entered.delete(id);
+    this._changes.moved.delete(id);
+    this._changes.values.delete(id);
+    this._changes.exited.add(id);
+  }
+
+  // Attaches `id` to `next` when `next` is added
+  private wait(id: number, next: number): void {
+    const waiting = this._pending.get(next);
+    if (waiting === undefined) {
+      this._pending.set(next, [id]);
+    } else {
+      waiting.push(id);
+    }
+  }
+
+  private get(id: number): LayoutNode {
+    return this._nodes.get(id) as LayoutNode;
+  }
+
+  private add_row(id: number): Row {
+    const row = {
+      key: this._keys++,
+      index: this._rows.length,
+      head: id,
+      tail: id,
+    };
+    this._rows.push(row);
+    this._columns.set(row.key, new Map());
+    this._changes.rows.add(row);
+    return row;
+  }
+
+  private columns(row: Row): Map<number, number> {
+    return this._columns.get(row.key) as Map<number, number>;
+  }
+
+  private remove_row(row: Row): void {
+    this._rows.splice(row.index, 1);
+    this._columns.delete(row.key);
+    for (let j = row.index; j < this._rows.length; j++) {
+      this._rows[j].index = j;
+      this._changes.rows.add(this._rows[j]);
+    }
+    this._changes.rows.delete(row);
+    this._changes.removed.add(row);
+  }
+
+  // Moves the nodes from `from` to `to`, following the row, to `row`,
+  // shifting their columns by `shift`
+  private move(from: number, to: number, row: Row, shift: number): void {
+    let id = from;
+    for (;;) {
+      const node = this.get(id);
+      this.columns(node.row).delete(node.column);
+      node.row = row;
+      node.column += shift;
+      this.columns(row).set(node.column, id);
+      this._changes.moved.add(id);
+      if (id === to) {
+        break;
+      }
+      id = node.next as number;
+    }
+  }
+
+  // Makes `id` the parent of `next`, joining their rows
+  private attach(id: number, next: number): void {
+    const node = this.get(id);
+    const target = this.get(next);
+    // `id` is the tail of its row, so `next` is before it in the same row
+    // and the edge closes a cycle
+    if (target.row === node.row) {
+      return;
+    }
+    if (target.parent !== null) {
+      this.detach(next);
+    }
+    const left = node.row;
+    const right = target.row;
+    const left_length = node.column - this.offset(left) + 1;
+    const right_length = this.get(right.tail).column - target.column + 1;
+    if (left_length <= right_length) {
+      this.move(left.head, id, right, target.column - 1 - node.column);
+      right.head = left.head;
+      this._changes.rows.add(right);
+      this.remove_row(left);
+    } else {
+      this.move(next, right.tail, left, node.column + 1 - target.column);
+      left.tail = right.tail;
+      this.remove_row(right);
+    }
+    target.parent = id;
+  }
+
+  // Removes the parent of `id`, splitting its row before it
+  private detach(id: number): void {
+    const node = this.get(id);
+    const parent = node.parent as number;
+    node.parent = null;
+    const row = node.row;
+    const before = node.column - this.offset(row);
+    const after = this.get(row.tail).column - node.column + 1;
+    if (after <= before) {
+      const split = this.add_row(id);
+      split.tail = row.tail;
+      this.move(id, row.tail, split, 0);
+      row.tail = parent;
+    } else {
+      const split = this.add_row(row.head);
+      split.tail = parent;
+      this.move(row.head, parent, split, 0);
+      row.head = id;
+      this._changes.rows.add(row);
+    }
+  }
+}
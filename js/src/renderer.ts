@@ -0,0 +1,66 @@
+import { Init, VisualizationMetadata } from './serializers';
+import { Layout } from './layout';
+import { FADE, TRANSITION } from './geometry';
+
+// Draws the nodes of a layout. The operations update the layout and
+// `display()` draws what changed since it was last called.
+export abstract class Renderer {
+  protected _layout: Layout;
+  protected metadata: VisualizationMetadata;
+  // Playback speed. The durations of the animations are divided by it.
+  speed = 1;
+
+  constructor(metadata: VisualizationMetadata, layout: Layout) {
+    this.metadata = metadata;
+    this._layout = layout;
+  }
+
+  get layout(): Layout {
+    return this._layout;
+  }
+
+  protected get transition_duration(): number {
+    return (this.metadata.transition_duration ?? TRANSITION) / this.speed;
+  }
+
+  protected get fade_in_duration(): number {
+    return (this.metadata.fade_in_duration ?? FADE) / this.speed;
+  }
+
+  // Moves the iterator to the node
+  abstract iterate(id: number, animate: boolean): Promise<void>;
+
+  abstract display(animate?: boolean): Promise<void>;
+
+  // Removes the elements of the renderer from the page
+  abstract remove(): void;
+
+  // Moves the iterator along the chain of nodes from `from` to `to`
+  async traverse(from: number, to: number, animate: boolean) {
+    let id: number | undefined = from;
+    while (id !== undefined) {
+      await this.iterate(id, animate);
+      if (id === to) {
+        break;
+      }
+      id = this._layout.next(id);
+    }
+  }
+
+  init(op: Init) {
+    this._layout.init(op.id, op.value, op.next);
+  }
+
+  set_next(i: number, j: number | null) {
+    this._layout.set_next(i, j);
+  }
+
+  set_value(i: number, value: string) {
+    this._layout.set_value(i, value);
+  }
+
+  // Removes a node that is no longer reachable
+  drop(id: number) {
+    this._layout.remove(id);
+  }
+}
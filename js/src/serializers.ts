@@ -27,16 +27,25 @@ export type GetNext = {
   id: number;
 };
 
+// Consecutive get_next on the nodes of a chain, from `id` to `to`
+export type Traverse = {
+  operation: 'traverse';
+  id: number;
+  to: number;
+};
+
 export type LinkedListOperation =
   | Init
   | SetValue
   | GetValue
   | SetNext
-  | GetNext;
+  | GetNext
+  | Traverse;
 
 export type Metadata = {
   animate: boolean;
-  source: string[];
+  // Index in the snippet table, or the lines of source code
+  source: number | string[];
 };
 
 export type Operation = {
@@ -47,19 +56,176 @@ export type Operation = {
 export type VisualizationMetadata = {
   transition_duration?: number;
   fade_in_duration?: number;
+  // Nodes above which the visualization is drawn on a canvas
+  canvas_threshold?: number;
 };
 
 export type Operations = {
   operations: Operation[];
   metadata: VisualizationMetadata;
+  // Snippets added to the table of the visualization
+  snippets?: string[][];
+  // Nodes shown without animation before the operations
+  initial?: Init[];
+  // Nodes removed after the operations, as [index of the operation, id]
+  deaths?: [number, number][];
 };
 
-function serialize_operations(ops: Operations): Operations {
+// Operations sent as packed columns. Values and sources are indices into
+// `strings` and `snippets`. Missing values and null next pointers are -1.
+// The last node of a traverse is stored in `nexts`. Appended operations only
+// send the strings that are new, which go at `strings_from` in the table of
+// the visualization.
+export type BinaryOperations = {
+  format: 'binary';
+  length: number;
+  opcodes: Int8Array;
+  ids: Int32Array;
+  nexts: Int32Array;
+  values: Int32Array;
+  sources: Int32Array;
+  animate: Int8Array;
+  strings: string[];
+  strings_from?: number;
+  snippets: string[][];
+  metadata: VisualizationMetadata;
+  initial?: Init[];
+  deaths?: [number, number][];
+};
+
+export type OperationsData = Operations | BinaryOperations;
+
+const OPCODES = [
+  'init',
+  'set_value',
+  'get_value',
+  'set_next',
+  'get_next',
+  'traverse',
+] as const;
+
+function is_binary(ops: OperationsData): ops is BinaryOperations {
+  return (<BinaryOperations>ops).format === 'binary';
+}
+
+export function operations_snippets(ops: OperationsData): string[][] {
+  return ops.snippets || [];
+}
+
+// Adds the strings of the operations to the string table of the
+// visualization
+export function add_strings(ops: OperationsData, strings: string[]): void {
+  if (!is_binary(ops)) {
+    return;
+  }
+  const from = ops.strings_from ?? 0;
+  ops.strings.forEach((s, i) => {
+    strings[from + i] = s;
+  });
+}
+
+export function operations_initial(ops: OperationsData): Init[] {
+  return ops.initial || [];
+}
+
+// Ids of the nodes removed after each operation, by index of the operation
+export function operations_deaths(ops: OperationsData): Map<number, number[]> {
+  const deaths = new Map<number, number[]>();
+  for (const [i, id] of ops.deaths || []) {
+    const ids = deaths.get(i);
+    if (ids === undefined) {
+      deaths.set(i, [id]);
+    } else {
+      ids.push(id);
+    }
+  }
+  return deaths;
+}
+
+export function operations_length(ops: OperationsData): number {
+  return is_binary(ops) ? ops.length : ops.operations.length;
+}
+
+// `strings` is the table the values index, the strings of `ops` by default
+export function operation_at(
+  ops: OperationsData,
+  i: number,
+  strings?: string[]
+): Operation {
+  if (!is_binary(ops)) {
+    return ops.operations[i];
+  }
+  const table = strings ?? ops.strings;
+  const id = ops.ids[i];
+  const next = ops.nexts[i] === -1 ? null : ops.nexts[i];
+  const value = ops.values[i] === -1 ? null : table[ops.values[i]];
+  const metadata = {
+    animate: ops.animate[i] !== 0,
+    source: ops.sources[i],
+  };
+  switch (OPCODES[ops.opcodes[i]]) {
+    case 'init':
+      return { operation: { operation: 'init', id, value, next }, metadata };
+    case 'set_value':
+      return { operation: { operation: 'set_value', id, value }, metadata };
+    case 'get_value':
+      return { operation: { operation: 'get_value', id }, metadata };
+    case 'set_next':
+      return { operation: { operation: 'set_next', id, next }, metadata };
+    case 'get_next':
+      return { operation: { operation: 'get_next', id }, metadata };
+    case 'traverse':
+      return {
+        operation: { operation: 'traverse', id, to: ops.nexts[i] },
+        metadata,
+      };
+  }
+  throw new Error(`Unknown opcode ${ops.opcodes[i]}`);
+}
+
+// Typed array views over the buffers of the message. The buffers are only
+// copied if they are not aligned to the size of the elements.
+function int8_view(data: DataView): Int8Array {
+  return new Int8Array(data.buffer, data.byteOffset, data.byteLength);
+}
+
+function int32_view(data: DataView): Int32Array {
+  if (data.byteOffset % 4 === 0) {
+    return new Int32Array(data.buffer, data.byteOffset, data.byteLength / 4);
+  }
+  return new Int32Array(
+    data.buffer.slice(data.byteOffset, data.byteOffset + data.byteLength)
+  );
+}
+
+function serialize_operations(ops: OperationsData): OperationsData {
+  if (is_binary(ops)) {
+    // The typed arrays are sent as buffers
+    return { ...ops };
+  }
   return JSON.parse(JSON.stringify(ops));
 }
 
-function deserialize_operations(obj: unknown): Operations {
-  return <Operations>obj;
+function deserialize_operations(obj: any): OperationsData {
+  if (obj.format !== 'binary') {
+    return <Operations>obj;
+  }
+  return {
+    format: 'binary',
+    length: obj.length,
+    opcodes: int8_view(obj.opcodes),
+    ids: int32_view(obj.ids),
+    nexts: int32_view(obj.nexts),
+    values: int32_view(obj.values),
+    sources: int32_view(obj.sources),
+    animate: int8_view(obj.animate),
+    strings: obj.strings,
+    strings_from: obj.strings_from,
+    snippets: obj.snippets,
+    metadata: obj.metadata,
+    initial: obj.initial,
+    deaths: obj.deaths,
+  };
 }
 
 export const operation_serializers = {
@@ -9,9 +9,9 @@ import {
 
 // Import the CSS
 import '../css/widget.css';
-import { operation_serializers, Operations } from './serializers';
+import { operation_serializers, OperationsData } from './serializers';
 
-import { animate_operations } from './animation';
+import { OperationsAnimation } from './animation';
 
 export class OperationsModel extends DOMWidgetModel {
   defaults() {
@@ -19,7 +19,8 @@ export class OperationsModel extends DOMWidgetModel {
       ...super.defaults(),
       _model_name: 'OperationsModel',
       _view_name: 'OperationsView',
-      operations: <Operations>{ operations: [], metadata: {} },
+      binary: false,
+      operations: <OperationsData>{ operations: [], metadata: {} },
     };
   }
 
@@ -27,6 +28,28 @@ export class OperationsModel extends DOMWidgetModel {
     ...DOMWidgetModel.serializers,
     operations: operation_serializers,
   };
+
+  // Operations appended by the kernel after `operations` was synced
+  appended: OperationsData[] = [];
+
+  initialize(attributes: any, options: any): void {
+    super.initialize(attributes, options);
+    this.on('msg:custom', this.on_custom_message, this);
+  }
+
+  private on_custom_message(content: any, buffers: DataView[]): void {
+    if (content.method !== 'append') {
+      return;
+    }
+    const obj = content.operations;
+    const buffer_paths: string[] = content.buffer_paths || [];
+    buffer_paths.forEach((key, i) => {
+      obj[key] = buffers[i];
+    });
+    const ops = operation_serializers.deserialize(obj);
+    this.appended.push(ops);
+    this.trigger('append', ops);
+  }
 }
 
 export class OperationsView extends DOMWidgetView {
@@ -44,7 +67,17 @@ export class OperationsView extends DOMWidgetView {
     this.value_changed();
     this.model.on('change:operations', this.value_changed);
 
-    animate_operations(this.container, this.operations);
+    const animation = new OperationsAnimation(
+      this.container,
+      this.operations.metadata
+    );
+    animation.append(this.operations);
+    for (const ops of (this.model as OperationsModel).appended) {
+      animation.append(ops);
+    }
+    this.listenTo(this.model, 'append', (ops: OperationsData) =>
+      animation.append(ops)
+    );
   }
 
   value_changed(): void {
@@ -52,11 +85,11 @@ export class OperationsView extends DOMWidgetView {
     console.log(this.operations);
   }
 
-  get operations(): Operations {
+  get operations(): OperationsData {
     return this.model.get('operations');
   }
 
-  set operations(operations: Operations) {
+  set operations(operations: OperationsData) {
     this.model.set('operations', operations);
   }
 }
@@ -84,7 +84,6 @@ setup_args = dict(
         'License :: OSI Approved :: BSD License',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
@@ -92,7 +91,7 @@ setup_args = dict(
         'Framework :: Jupyter',
     ],
     include_package_data = True,
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     install_requires = [
         'ipywidgets>=7.0.0',
     ],